@@ -0,0 +1,37 @@
+"""
+Settings para los benchmarks (manage.py bench_auth): misma aplicación, pero base de datos,
+caché y hasher elegidos por variables de entorno para poder medirlos sin Postgres ni Redis.
+"""
+import tempfile
+
+from .settings import *  # noqa: F401,F403
+from .settings import USER_CACHE_ALIAS, os
+
+ALLOWED_HOSTS = ['*']
+
+# BENCH_DB=sqlite (default) o postgres (usa DATABASES de settings.py)
+if os.getenv('BENCH_DB', 'sqlite') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('BENCH_SQLITE_PATH', os.path.join(tempfile.gettempdir(), 'auth_bench.sqlite3')),
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+        }
+    }
+    # Las migraciones 0002-0004 son SQL de Postgres: en SQLite el esquema se crea con --run-syncdb
+    MIGRATION_MODULES = {'users': None}
+
+# BENCH_CACHE=locmem (default) o redis. Siempre los dos alias: 'default' (revocación) y USER_CACHE_ALIAS
+if os.getenv('BENCH_CACHE', 'locmem') == 'locmem':
+    CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'default'},
+        USER_CACHE_ALIAS: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'users'},
+    }
+# Con redis se usan los CACHES de settings.py, que ya definen ambos alias
+
+# BENCH_PASSWORD_HASHER=pbkdf2 (el de producción) o md5 (aísla el coste del resto del request)
+BENCH_PASSWORD_HASHERS = {
+    'pbkdf2': ['django.contrib.auth.hashers.PBKDF2PasswordHasher'],
+    'md5': ['django.contrib.auth.hashers.MD5PasswordHasher'],
+}
+PASSWORD_HASHERS = BENCH_PASSWORD_HASHERS[os.getenv('BENCH_PASSWORD_HASHER', 'pbkdf2')]
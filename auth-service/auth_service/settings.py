@@ -50,7 +50,8 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware'
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'users.middleware.HashingBusyMiddleware',
 ]
 
 ROOT_URLCONF = 'auth_service.urls'
@@ -81,6 +82,10 @@ import os
 from datetime import timedelta
 from pathlib import Path
 
+# wsgi (gunicorn sync, default) o asgi (gunicorn + uvicorn workers, vistas async en users.async_views)
+SERVER_MODE = os.getenv('SERVER_MODE', 'wsgi')
+USER_VIEWS_ASYNC = os.getenv('USER_VIEWS_ASYNC', '1' if SERVER_MODE == 'asgi' else '0') == '1'
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -88,35 +93,81 @@ DATABASES = {
         'USER': os.getenv('DB_USER'),
         'PASSWORD': os.getenv('DB_PASS'),
         'HOST': os.getenv('DB_HOST'),
-        'PORT': '5432',
+        'PORT': os.getenv('DB_PORT', '5432'),
+        # Conexiones persistentes: se reutilizan entre requests durante DB_CONN_MAX_AGE segundos
+        # (0 = una conexión nueva por request) y se comprueban antes de reutilizarlas.
+        # Con ASGI Django no reutiliza conexiones entre requests, así que el default es 0.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '0' if SERVER_MODE == 'asgi' else '60')),
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', '1') == '1',
+        'OPTIONS': {
+            'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '5')),
+        },
     }
 }
 
+REDIS_CACHE_LOCATION = f"redis://{os.getenv('REDIS_HOST', 'redis')}:{os.getenv('REDIS_PORT', 6379)}/1"
+
 CACHES = {
+    # Revocación de tokens y datos que no pueden perderse en silencio: un fallo de Redis es un error
     "default": {
         "BACKEND": "django_redis.cache.RedisCache",
-        "LOCATION": f"redis://{os.getenv('REDIS_HOST', 'redis')}:{os.getenv('REDIS_PORT', 6379)}/1",
+        "LOCATION": REDIS_CACHE_LOCATION,
         "OPTIONS": {
             "CLIENT_CLASS": "django_redis.client.DefaultClient",
         }
-    }
+    },
+    # Usuarios autenticados por JWT (users.authentication): si Redis no responde la caché se comporta
+    # como vacía (se consulta Postgres) en lugar de hacer fallar la autenticación o el guardado de usuarios
+    "users": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": REDIS_CACHE_LOCATION,
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            "IGNORE_EXCEPTIONS": True,
+        }
+    },
 }
+USER_CACHE_ALIAS = "users"
+
+# Segundos que un usuario autenticado por JWT queda en caché (users.authentication)
+USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL_SECONDS', '60'))
 
 from datetime import timedelta
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     )
 }
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
+    # Clave compartida con los servicios que verifican tokens localmente (loans_service)
+    'SIGNING_KEY': os.getenv('JWT_SIGNING_KEY') or SECRET_KEY,
+    # Claims de permisos versionados (users.tokens)
+    'TOKEN_OBTAIN_SERIALIZER': 'users.tokens.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'users.tokens.VersionedTokenRefreshSerializer',
 }
 
 AUTH_USER_MODEL = 'users.User'
 
+# Revocación de tokens (users.revocation): filtro de Bloom por proceso, sincronizado con Redis
+REVOCATION_REFRESH_SECONDS = float(os.getenv('REVOCATION_REFRESH_SECONDS', '2'))
+REVOCATION_REBUILD_SECONDS = float(os.getenv('REVOCATION_REBUILD_SECONDS', '600'))
+REVOCATION_BLOOM_CAPACITY = int(os.getenv('REVOCATION_BLOOM_CAPACITY', '100000'))
+REVOCATION_BLOOM_ERROR_RATE = float(os.getenv('REVOCATION_BLOOM_ERROR_RATE', '0.001'))
+
+# Token compartido para los endpoints internos (/api/users/...), enviado en X-Internal-Token
+INTERNAL_API_TOKEN = os.getenv('INTERNAL_API_TOKEN', '')
+
+
+# Hashing de passwords en un pool de procesos (users.hashing); 0 workers = en el hilo del request.
+# Solo hay hashes en paralelo si el servidor atiende requests concurrentes (gunicorn gthread con WEB_THREADS
+# hilos, o ASGI): el hilo del request espera el resultado del pool.
+PASSWORD_HASHING_WORKERS = int(os.getenv('PASSWORD_HASHING_WORKERS', os.cpu_count() or 1))
+PASSWORD_HASHING_MAX_QUEUE = int(os.getenv('PASSWORD_HASHING_MAX_QUEUE', '64'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
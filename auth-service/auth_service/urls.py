@@ -15,14 +15,21 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
-from users import views
+from django.conf import settings
+from django.urls import path, include, re_path
+from users import async_views, views
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/register/', views.register),
+    path('api/register/', async_views.register if settings.USER_VIEWS_ASYNC else views.register),
     path('api/token/', TokenObtainPairView.as_view()),
     path('api/token/refresh/', TokenRefreshView.as_view()),
-    path('api/me/', views.me),
+    path('api/logout/', views.logout),
+    path('api/me/', async_views.me if settings.USER_VIEWS_ASYNC else views.me),
+    path('api/users/import/', views.import_users),
+    path('api/db/pool/', views.db_pool),
+    # Internos (entre servicios). /api/users/<id> acepta la ruta sin barra final, como la llama loans_service
+    path('api/users/status/', views.users_status),
+    re_path(r'^api/users/(?P<user_id>\d+)/?$', views.user_status),
 ]
\ No newline at end of file
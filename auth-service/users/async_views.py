@@ -0,0 +1,55 @@
+import json
+
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .authentication import CachedJWTAuthentication
+from .models import User
+
+# Versiones async de users.views para el despliegue ASGI (USER_VIEWS_ASYNC=1).
+# Mismas URLs y respuestas; el ORM async no ocupa un hilo mientras espera a Postgres.
+
+
+def _error(detail, status_code, headers=None):
+    body = detail if isinstance(detail, dict) else {'detail': detail}
+    return JsonResponse(body, status=status_code, headers=headers)
+
+
+@csrf_exempt
+@require_POST
+async def register(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return _error('JSON parse error', status.HTTP_400_BAD_REQUEST)
+    email = data.get('email') if isinstance(data, dict) else None
+    password = data.get('password') if isinstance(data, dict) else None
+    if not email or not password:
+        return JsonResponse({'error': 'Email y password son requeridos'}, status=status.HTTP_400_BAD_REQUEST)
+    if await User.objects.filter(email=email).aexists():
+        return JsonResponse({'error': 'Usuario ya existe'}, status=status.HTTP_400_BAD_REQUEST)
+    await User.objects.acreate_user(email=email, password=password)
+    return JsonResponse({'message': 'Usuario creado exitosamente'})
+
+
+@require_GET
+async def me(request):
+    authenticator = CachedJWTAuthentication()
+    try:
+        result = await authenticator.aauthenticate(request)
+    except APIException as e:
+        return _error(e.detail, e.status_code, {'WWW-Authenticate': authenticator.authenticate_header(request)})
+    if result is None:
+        return _error('Authentication credentials were not provided.', status.HTTP_401_UNAUTHORIZED,
+                      {'WWW-Authenticate': authenticator.authenticate_header(request)})
+    user, _ = result
+    return JsonResponse({
+        'id': user.id,
+        'email': user.email,
+        'is_active': user.is_active,
+        'is_staff': user.is_staff,
+        'is_superuser': user.is_superuser,
+    })
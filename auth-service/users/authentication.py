@@ -0,0 +1,113 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .revocation import get_revocation_list
+
+# Campos necesarios para autenticar y para /api/me; el resto (password, grupos) se carga bajo demanda
+CACHED_USER_FIELDS = ("id", "email", "is_active", "is_staff", "is_superuser", "last_login")
+
+
+def user_cache_key(user_id) -> str:
+    return f"users:auth:{user_id}"
+
+
+def user_cache():
+    """Alias de caché de usuarios: tolera caídas de Redis, a diferencia de 'default' (revocación)"""
+    return caches[settings.USER_CACHE_ALIAS]
+
+
+def invalidate_cached_user(user_id) -> None:
+    user_cache().delete(user_cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication que resuelve el usuario del token desde la caché (Redis)
+    en lugar de consultar la base de datos en cada request.
+
+    La entrada se guarda USER_CACHE_TTL segundos y se invalida en los signals
+    post_save/post_delete de User (users.signals). También rechaza los tokens
+    revocados (users.revocation).
+    """
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        if get_revocation_list().is_revoked(validated_token):
+            raise InvalidToken(_("Token revocado"))
+        return validated_token
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Necesita el hash del password, que no se guarda en caché
+            return super().get_user(validated_token)
+
+        key = user_cache_key(self._user_id(validated_token))
+        values = user_cache().get(key)
+        if values is None:
+            user = super().get_user(validated_token)
+            user_cache().set(key, self._cache_values(user), settings.USER_CACHE_TTL)
+            return user
+        return self._cached_user(values)
+
+    async def aauthenticate(self, request):
+        """Versión async de authenticate() para las vistas async (users.async_views)"""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = await self.aget_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_validated_token(self, raw_token):
+        # La firma se verifica en memoria; solo la consulta de revocación va a Redis
+        validated_token = super().get_validated_token(raw_token)
+        if await get_revocation_list().ais_revoked(validated_token):
+            raise InvalidToken(_("Token revocado"))
+        return validated_token
+
+    async def aget_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            return await sync_to_async(super().get_user)(validated_token)
+
+        user_id = self._user_id(validated_token)
+        key = user_cache_key(user_id)
+        values = await user_cache().aget(key)
+        if values is not None:
+            return self._cached_user(values)
+
+        try:
+            user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        await user_cache().aset(key, self._cache_values(user), settings.USER_CACHE_TTL)
+        return user
+
+    @staticmethod
+    def _user_id(validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    @staticmethod
+    def _cache_values(user):
+        return {f: getattr(user, f) for f in CACHED_USER_FIELDS}
+
+    def _cached_user(self, values):
+        # Instancia con campos diferidos: un save() posterior solo actualiza estos campos.
+        # from_db espera los valores en el orden de los campos del modelo.
+        fields = [f.attname for f in self.user_model._meta.concrete_fields if f.attname in values]
+        user = self.user_model.from_db(DEFAULT_DB_ALIAS, fields, [values[f] for f in fields])
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
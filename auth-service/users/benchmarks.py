@@ -0,0 +1,121 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+# Utilidades compartidas por los comandos bench_*: generador de carga con hilos y servidores locales
+
+
+def summarize(latencies_ms, errors, elapsed):
+    latencies_ms = sorted(latencies_ms)
+
+    def pct(p):
+        return round(latencies_ms[min(len(latencies_ms) - 1, int(len(latencies_ms) * p))], 2) if latencies_ms else None
+
+    return {
+        'requests': len(latencies_ms),
+        'errors': errors,
+        'rps': round(len(latencies_ms) / elapsed, 1) if elapsed > 0 else None,
+        'p50_ms': pct(0.50),
+        'p90_ms': pct(0.90),
+        'p99_ms': pct(0.99),
+        'max_ms': round(latencies_ms[-1], 2) if latencies_ms else None,
+    }
+
+
+def run_load(call, concurrency, total):
+    """
+    Ejecuta `call(i)` `total` veces repartidas en `concurrency` hilos.
+    `call` devuelve el status HTTP; 4xx/5xx o una excepción cuentan como error.
+    """
+    per_thread = max(1, total // concurrency)
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def worker(offset):
+        local = []
+        local_errors = 0
+        for i in range(per_thread):
+            started = time.perf_counter()
+            try:
+                ok = call(offset + i) < 400
+            except Exception:
+                ok = False
+            if ok:
+                local.append((time.perf_counter() - started) * 1000)
+            else:
+                local_errors += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=worker, args=(n * per_thread,)) for n in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return summarize(latencies, errors[0], time.perf_counter() - started)
+
+
+def http_request(method, url, body=None, headers=None, timeout=30):
+    """Request HTTP con urllib; devuelve (status, cuerpo JSON o None)"""
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(url, data=data, method=method, headers={
+        'Content-Type': 'application/json', **(headers or {}),
+    })
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            payload = response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        payload, status = e.read(), e.code
+    try:
+        return status, json.loads(payload) if payload else None
+    except ValueError:
+        return status, None
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(server, workers, port, env=None, cwd=None):
+    """Arranca gunicorn (wsgi o asgi con workers uvicorn) y espera a que acepte conexiones"""
+    app = 'auth_service.asgi:application' if server == 'asgi' else 'auth_service.wsgi:application'
+    cmd = [sys.executable, '-m', 'gunicorn', app, '--workers', str(workers), '--bind', f'127.0.0.1:{port}',
+           '--log-level', 'warning']
+    if server == 'asgi':
+        cmd += ['-k', 'uvicorn.workers.UvicornWorker']
+    else:
+        # Igual que el Dockerfile: hilos gthread para que el pool de hashing trabaje en paralelo
+        cmd += ['--worker-class', 'gthread', '--threads', os.environ.get('WEB_THREADS', '8')]
+    process = subprocess.Popen(cmd, cwd=cwd, env={**os.environ, **(env or {}), 'SERVER_MODE': server},
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'gunicorn terminó al arrancar: {process.stderr.read().decode()[-2000:]}')
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError('gunicorn no arrancó en 30 segundos')
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
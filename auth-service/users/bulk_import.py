@@ -0,0 +1,168 @@
+import codecs
+import csv
+import json
+
+from django.db import IntegrityError, transaction
+
+from . import hashing
+from .models import User
+
+FORMATS = ('csv', 'json', 'jsonl')
+CONTENT_TYPES = {
+    'text/csv': 'csv',
+    'application/json': 'json',
+    'application/x-ndjson': 'jsonl',
+    'application/jsonl': 'jsonl',
+}
+
+
+class BulkImportError(Exception):
+    pass
+
+
+def _csv_lines(stream):
+    for number, line in enumerate(stream, start=1):
+        try:
+            yield line.decode('utf-8-sig' if number == 1 else 'utf-8')
+        except UnicodeDecodeError:
+            where = 'la cabecera' if number == 1 else f'la fila {number - 1}'
+            raise BulkImportError(f'El CSV debe estar en UTF-8 (error en {where})')
+
+
+def _json_items(stream, chunk_size=64 * 1024):
+    """
+    Elementos de una lista JSON leídos del stream por bloques de `chunk_size` bytes:
+    en memoria solo hay el bloque actual y el elemento que se está decodificando.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder('utf-8-sig')()
+    buf, pos, eof = '', 0, False
+    state = 'start'  # start -> first -> (sep -> item)* -> fin
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        try:
+            buf = buf[pos:] + text.decode(chunk or b'', final=eof)
+        except UnicodeDecodeError:
+            raise BulkImportError('El JSON debe estar en UTF-8')
+        pos = 0
+
+    while True:
+        while pos < len(buf) and buf[pos].isspace():
+            pos += 1
+        if pos >= len(buf):
+            if eof:
+                raise BulkImportError('JSON inválido: lista incompleta' if state != 'start' else 'JSON vacío')
+            fill()
+            continue
+        char = buf[pos]
+        if state == 'start':
+            if char != '[':
+                raise BulkImportError('El JSON debe ser una lista de usuarios')
+            pos += 1
+            state = 'first'
+        elif state == 'sep' or (state == 'first' and char == ']'):
+            if char == ']':
+                return
+            if char != ',':
+                raise BulkImportError(f'JSON inválido: se esperaba "," o "]" y llegó {char!r}')
+            pos += 1
+            state = 'item'
+        else:
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except ValueError as e:
+                if eof:
+                    raise BulkImportError(f'JSON inválido: {e}')
+                fill()  # el elemento sigue en el próximo bloque
+                continue
+            if end == len(buf) and not eof:
+                fill()  # un número al final del bloque puede estar cortado
+                continue
+            yield item
+            pos = end
+            state = 'sep'
+
+
+def read_rows(stream, fmt):
+    """
+    Lee usuarios ({"email", "password"}) de un stream binario en CSV (con cabecera),
+    JSON (lista) o JSON lines. Los tres formatos se leen de forma incremental, sin
+    cargar el cuerpo completo en memoria.
+    """
+    if fmt == 'csv':
+        yield from csv.DictReader(_csv_lines(stream))
+    elif fmt == 'jsonl':
+        for line in stream:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield None
+    elif fmt == 'json':
+        yield from _json_items(stream)
+    else:
+        raise BulkImportError(f'Formato no soportado: {fmt}')
+
+
+def import_users(rows, batch_size=1000, pool=None):
+    """
+    Crea usuarios en bloque y devuelve el estado de cada fila:
+    created, exists (email ya registrado), duplicate (repetido en la entrada) o invalid.
+
+    Por cada lote de `batch_size` filas: una consulta para los emails existentes, el
+    hashing de los passwords en paralelo en el pool de procesos y un bulk_create. Todos
+    los lotes van en una misma transacción: o se crean todos o ninguno. Los usuarios no
+    se acumulan en memoria; lo que crece con la entrada es el informe por fila y el
+    conjunto de emails vistos.
+    """
+    pool = pool or hashing.get_hasher_pool()
+    results = []
+    seen = set()
+    batch = []
+
+    def flush():
+        existing = set(User.objects.filter(email__in=[r['email'] for r, _ in batch]).values_list('email', flat=True))
+        new = [(r, password) for r, password in batch if r['email'] not in existing]
+        for r, _ in batch:
+            if r['email'] in existing:
+                r['status'] = 'exists'
+        hashes = pool.map(hashing.encode_password, [password for _, password in new])
+        User.objects.bulk_create([User(email=r['email'], password=encoded) for (r, _), encoded in zip(new, hashes)])
+        for r, _ in new:
+            r['status'] = 'created'
+        batch.clear()
+
+    try:
+        with transaction.atomic():
+            for number, row in enumerate(rows, start=1):
+                email = password = None
+                if isinstance(row, dict):
+                    email = User.objects.normalize_email(str(row.get('email') or '').strip())
+                    password = row.get('password')
+                result = {'row': number, 'email': email or None, 'status': 'pending'}
+                results.append(result)
+
+                if not email or '@' not in email or not password:
+                    result['status'] = 'invalid'
+                    result['error'] = 'Email y password son requeridos'
+                    continue
+                if email in seen:
+                    result['status'] = 'duplicate'
+                    continue
+                seen.add(email)
+                batch.append((result, str(password)))
+                if len(batch) >= batch_size:
+                    flush()
+            if batch:
+                flush()
+    except IntegrityError:
+        # Algún email se registró mientras se importaba: no se creó ninguno
+        raise BulkImportError('Emails registrados durante la importación, vuelve a intentarlo')
+
+    summary = {status: 0 for status in ('created', 'exists', 'duplicate', 'invalid')}
+    for result in results:
+        summary[result['status']] += 1
+    return {'total': len(results), **summary, 'results': results}
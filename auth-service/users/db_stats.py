@@ -0,0 +1,46 @@
+import threading
+
+from django.conf import settings
+
+
+class ConnectionStats:
+    """
+    Uso de las conexiones a la base de datos en este proceso.
+
+    Con conexiones persistentes (DB_CONN_MAX_AGE > 0) connections_per_request
+    tiende a 0; sin ellas cada request abre una conexión nueva (1.0).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.requests = 0
+        self.in_flight = 0
+
+    def connection_opened(self):
+        with self._lock:
+            self.opened += 1
+
+    def request_started(self):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+
+    def request_finished(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def snapshot(self):
+        db = settings.DATABASES['default']
+        with self._lock:
+            return {
+                'conn_max_age': db.get('CONN_MAX_AGE', 0),
+                'conn_health_checks': db.get('CONN_HEALTH_CHECKS', False),
+                'connections_opened': self.opened,
+                'requests': self.requests,
+                'requests_in_flight': self.in_flight,
+                'connections_per_request': round(self.opened / self.requests, 3) if self.requests else None,
+            }
+
+
+stats = ConnectionStats()
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.contrib.auth import hashers
+
+logger = logging.getLogger(__name__)
+
+
+class HashingBusy(Exception):
+    """Pool de hashing saturado; users.middleware.HashingBusyMiddleware lo convierte en 503"""
+
+    def __init__(self, message='Servicio ocupado, intenta de nuevo en unos segundos'):
+        super().__init__(message)
+
+
+def _init_worker(settings_module):
+    # Con el start method "spawn" el proceso hijo no hereda Django configurado
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def encode_password(raw_password):
+    return hashers.make_password(raw_password)
+
+
+def verify_encoded(raw_password, encoded):
+    return hashers.verify_password(raw_password, encoded)
+
+
+class PasswordHasherPool:
+    """
+    Ejecuta el hashing de passwords (PBKDF2, CPU-bound) en un pool de procesos
+    para no bloquear el hilo del request ni competir por el GIL.
+
+    Como máximo `workers + max_queue` operaciones en curso; por encima se
+    rechaza con HashingBusy (503) en lugar de encolar sin límite.
+    Con workers=0 el hashing se hace en el propio hilo, como Django por defecto.
+
+    Si un proceso del pool muere (p. ej. OOM kill) el executor queda roto para
+    siempre: se reemplaza por uno nuevo y la operación se reintenta una vez.
+    """
+
+    def __init__(self, workers, max_queue):
+        self.workers = workers
+        self._slots = threading.BoundedSemaphore(workers + max_queue) if workers > 0 else None
+        self._executor_lock = threading.Lock()
+        self._executor = self._new_executor() if workers > 0 else None
+
+    def _new_executor(self):
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'auth_service.settings'),),
+        )
+
+    def _replace_broken(self, broken):
+        """Nuevo executor si `broken` sigue siendo el actual (varios hilos pueden verlo roto a la vez)"""
+        with self._executor_lock:
+            if self._executor is broken:
+                logger.warning('Pool de hashing roto, se crea uno nuevo')
+                broken.shutdown(wait=False)
+                self._executor = self._new_executor()
+            return self._executor
+
+    def _call(self, call):
+        """call(executor) con un reintento sobre un executor nuevo si el actual está roto"""
+        executor = self._executor
+        try:
+            return call(executor)
+        except BrokenProcessPool:
+            return call(self._replace_broken(executor))
+
+    async def _acall(self, call):
+        executor = self._executor
+        try:
+            return await call(executor)
+        except BrokenProcessPool:
+            return await call(self._replace_broken(executor))
+
+    def run(self, fn, *args):
+        if self._executor is None:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            return self._call(lambda executor: executor.submit(fn, *args).result())
+        finally:
+            self._slots.release()
+
+    async def arun(self, fn, *args):
+        """Como run() pero sin bloquear el event loop (vistas async)"""
+        if self._executor is None:
+            return await sync_to_async(fn, thread_sensitive=False)(*args)
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            return await self._acall(lambda executor: asyncio.wrap_future(executor.submit(fn, *args)))
+        finally:
+            self._slots.release()
+
+    def map(self, fn, items, chunksize=32):
+        """Reparte `items` entre todos los workers (importaciones en bloque; no cuenta en la cola)"""
+        if self._executor is None:
+            return [fn(item) for item in items]
+        items = list(items)
+        return self._call(lambda executor: list(executor.map(fn, items, chunksize=chunksize)))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_hasher_pool():
+    global _pool, _pool_pid
+    # Se crea al primer uso en cada proceso (gunicorn hace fork de los workers)
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = PasswordHasherPool(settings.PASSWORD_HASHING_WORKERS, settings.PASSWORD_HASHING_MAX_QUEUE)
+                _pool_pid = os.getpid()
+    return _pool
+
+
+def reset_hasher_pool():
+    """Cierra el pool; el próximo uso crea otro con la configuración actual"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.shutdown()
+        _pool = None
+
+
+@receiver(setting_changed)
+def _reset_on_setting_changed(setting, **kwargs):
+    # Los procesos del pool copian PASSWORD_HASHERS al arrancar (override_settings en tests y benchmarks)
+    if setting in ('PASSWORD_HASHERS', 'PASSWORD_HASHING_WORKERS', 'PASSWORD_HASHING_MAX_QUEUE'):
+        reset_hasher_pool()
+
+
+def make_password(raw_password):
+    """make_password de Django ejecutado en el pool; genera el mismo formato de hash"""
+    if raw_password is None:
+        return hashers.make_password(None)
+    return get_hasher_pool().run(encode_password, raw_password)
+
+
+def check_password(raw_password, encoded, setter=None):
+    """check_password de Django ejecutado en el pool, incluida la actualización de hashes antiguos"""
+    is_correct, must_update = get_hasher_pool().run(verify_encoded, raw_password, encoded)
+    if setter and is_correct and must_update:
+        setter(raw_password)
+    return is_correct
+
+
+async def amake_password(raw_password):
+    if raw_password is None:
+        return hashers.make_password(None)
+    return await get_hasher_pool().arun(encode_password, raw_password)
+
+
+async def acheck_password(raw_password, encoded, setter=None):
+    is_correct, must_update = await get_hasher_pool().arun(verify_encoded, raw_password, encoded)
+    if setter and is_correct and must_update:
+        await setter(raw_password)
+    return is_correct
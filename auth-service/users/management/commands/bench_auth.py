@@ -0,0 +1,137 @@
+import json
+import os
+import platform
+import subprocess
+import time
+import uuid
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+
+from users.benchmarks import free_port, http_request, run_load, start_server, stop_server
+from users.models import User
+
+ENDPOINTS = ('token', 'refresh', 'me', 'register')
+BENCH_EMAIL = 'bench@example.com'
+BENCH_PASSWORD = 'bench-pass-123'
+
+
+class Command(BaseCommand):
+    help = ('Benchmark de /api/token/, /api/token/refresh/, /api/me/ y /api/register/ con el test client de Django '
+            'y con gunicorn (WSGI/ASGI) por número de workers y hasher. '
+            'Ejecutar con DJANGO_SETTINGS_MODULE=auth_service.bench_settings')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', default='client,server', help='client (en proceso) y/o server (gunicorn)')
+        parser.add_argument('--servers', default='wsgi,asgi')
+        parser.add_argument('--workers', default='1,2', help='Workers de gunicorn a probar')
+        parser.add_argument('--hashers', default='pbkdf2,md5', help='Claves de BENCH_PASSWORD_HASHERS')
+        parser.add_argument('--endpoints', default=','.join(ENDPOINTS))
+        parser.add_argument('--requests', type=int, default=100, help='Requests por endpoint y configuración')
+        parser.add_argument('--concurrency', type=int, default=8, help='Hilos cliente en modo server')
+        parser.add_argument('--output', default='bench_results.json')
+
+    def handle(self, *args, **options):
+        if not hasattr(settings, 'BENCH_PASSWORD_HASHERS'):
+            raise CommandError('Ejecutar con DJANGO_SETTINGS_MODULE=auth_service.bench_settings')
+        if settings.DATABASES['default']['ENGINE'].endswith('sqlite3'):
+            call_command('migrate', run_syncdb=True, verbosity=0)
+
+        endpoints = options['endpoints'].split(',')
+        results = []
+        for hasher in options['hashers'].split(','):
+            with override_settings(PASSWORD_HASHERS=settings.BENCH_PASSWORD_HASHERS[hasher]):
+                self._create_bench_user()
+                if 'client' in options['modes']:
+                    for endpoint in endpoints:
+                        stats = self._run_client(endpoint, options['requests'])
+                        results.append(self._report('client', None, None, hasher, endpoint, 1, stats))
+                if 'server' in options['modes']:
+                    for server in options['servers'].split(','):
+                        for workers in [int(w) for w in options['workers'].split(',')]:
+                            results += self._run_server(server, workers, hasher, endpoints, options)
+        User.objects.filter(email__startswith='bench-').delete()
+
+        with open(options['output'], 'w') as f:
+            json.dump({'meta': self._meta(options), 'results': results}, f, indent=2)
+        self.stdout.write(f'Resultados en {options["output"]}')
+
+    def _create_bench_user(self):
+        User.objects.filter(email=BENCH_EMAIL).delete()
+        User.objects.create_user(email=BENCH_EMAIL, password=BENCH_PASSWORD)
+
+    def _calls(self, request):
+        """Una función call(i) -> status por endpoint, sobre `request(method, path, body, headers)`"""
+        status, tokens = request('POST', '/api/token/', {'email': BENCH_EMAIL, 'password': BENCH_PASSWORD}, {})
+        if status != 200:
+            raise CommandError(f'Login del usuario de benchmark falló ({status})')
+        auth = {'Authorization': f'Bearer {tokens["access"]}'}
+        run_id = uuid.uuid4().hex[:8]
+        return {
+            'token': lambda i: request('POST', '/api/token/', {'email': BENCH_EMAIL, 'password': BENCH_PASSWORD}, {})[0],
+            'refresh': lambda i: request('POST', '/api/token/refresh/', {'refresh': tokens['refresh']}, {})[0],
+            'me': lambda i: request('GET', '/api/me/', None, auth)[0],
+            'register': lambda i: request('POST', '/api/register/',
+                                          {'email': f'bench-{run_id}-{i}@example.com', 'password': BENCH_PASSWORD}, {})[0],
+        }
+
+    def _run_client(self, endpoint, total):
+        client = Client()
+
+        def request(method, path, body, headers):
+            if method == 'GET':
+                response = client.get(path, headers=headers)
+            else:
+                response = client.post(path, body, content_type='application/json', headers=headers)
+            return response.status_code, response.json() if response.status_code == 200 else None
+
+        return run_load(self._calls(request)[endpoint], 1, total)
+
+    def _run_server(self, server, workers, hasher, endpoints, options):
+        port = free_port()
+        env = {'DJANGO_SETTINGS_MODULE': 'auth_service.bench_settings', 'BENCH_PASSWORD_HASHER': hasher}
+        process = start_server(server, workers, port, env=env, cwd=settings.BASE_DIR)
+        try:
+            base = f'http://127.0.0.1:{port}'
+            calls = self._calls(lambda method, path, body, headers: http_request(method, base + path, body, headers))
+            return [
+                self._report('server', server, workers, hasher, endpoint, options['concurrency'],
+                             run_load(calls[endpoint], options['concurrency'], options['requests']))
+                for endpoint in endpoints
+            ]
+        finally:
+            stop_server(process)
+
+    def _report(self, mode, server, workers, hasher, endpoint, concurrency, stats):
+        row = {'mode': mode, 'server': server, 'workers': workers, 'hasher': hasher,
+               'endpoint': endpoint, 'concurrency': concurrency, **stats}
+        self.stdout.write(
+            f'{mode:<6} {server or "-":<5} {workers or "-":>2}w {hasher:<7} {endpoint:<9} '
+            f'{stats["rps"] or 0:>8.1f} req/s  p50 {stats["p50_ms"] or 0:>7.1f}  p99 {stats["p99_ms"] or 0:>7.1f} ms  '
+            f'errores {stats["errors"]}'
+        )
+        return row
+
+    @staticmethod
+    def _meta(options):
+        try:
+            commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                    cwd=settings.BASE_DIR).stdout.strip() or None
+        except OSError:
+            commit = None
+        return {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'git_commit': commit,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'cpu_count': os.cpu_count(),
+            'database': settings.DATABASES['default']['ENGINE'].rsplit('.', 1)[-1],
+            'cache': settings.CACHES['default']['BACKEND'].rsplit('.', 1)[-1],
+            'hashing_workers': settings.PASSWORD_HASHING_WORKERS,
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+        }
@@ -0,0 +1,51 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connections
+
+from users.db_stats import stats
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Compara requests/seg con y sin conexiones persistentes (ciclo de request de Django + una consulta)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=8, help='Hilos (como los threads de gunicorn)')
+        parser.add_argument('--max-age', type=int, default=60, help='CONN_MAX_AGE de la prueba con persistencia')
+
+    def handle(self, *args, **options):
+        db = connections.settings['default']
+        original = db.get('CONN_MAX_AGE', 0)
+        self.stdout.write(f'{"CONN_MAX_AGE":>12} {"req/s":>10} {"conexiones":>11}')
+        try:
+            for max_age in (0, options['max_age']):
+                db['CONN_MAX_AGE'] = max_age
+                rps, opened = self._run(options['requests'], options['concurrency'])
+                self.stdout.write(f'{max_age:>12} {rps:>10.0f} {opened:>11}')
+        finally:
+            db['CONN_MAX_AGE'] = original
+
+    def _run(self, total, concurrency):
+        per_thread = total // concurrency
+
+        def worker():
+            for _ in range(per_thread):
+                # Mismas señales que un request real: cierran o reutilizan la conexión según CONN_MAX_AGE
+                request_started.send(sender=self.__class__)
+                User.objects.filter(pk=1).exists()
+                request_finished.send(sender=self.__class__)
+            connections.close_all()
+
+        opened = stats.opened
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+        return per_thread * concurrency / elapsed, stats.opened - opened
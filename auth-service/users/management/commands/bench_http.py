@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.benchmarks import http_request, run_load
+
+
+class Command(BaseCommand):
+    help = ('Carga HTTP contra un auth-service en marcha (GET /api/me/) a varios niveles de concurrencia; '
+            'ejecutarlo contra el despliegue WSGI y el ASGI para compararlos')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://localhost:8000')
+        parser.add_argument('--email', required=True)
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--concurrency', default='1,8,32,64')
+        parser.add_argument('--requests', type=int, default=2000, help='Requests por nivel de concurrencia')
+
+    def handle(self, *args, **options):
+        base = options['url'].rstrip('/')
+        try:
+            status, tokens = http_request('POST', f'{base}/api/token/',
+                                          {'email': options['email'], 'password': options['password']})
+        except OSError as e:
+            raise CommandError(f'No se pudo obtener el token: {e}')
+        if status != 200:
+            raise CommandError(f'No se pudo obtener el token ({status})')
+        auth = {'Authorization': f'Bearer {tokens["access"]}'}
+
+        self.stdout.write(f'{"concurrencia":>12} {"req/s":>8} {"p50 ms":>8} {"p99 ms":>8} {"errores":>8}')
+        for concurrency in [int(c) for c in options['concurrency'].split(',')]:
+            stats = run_load(lambda i: http_request('GET', f'{base}/api/me/', headers=auth)[0],
+                             concurrency, options['requests'])
+            self.stdout.write(f'{concurrency:>12} {stats["rps"] or 0:>8.0f} {stats["p50_ms"] or 0:>8.1f} '
+                              f'{stats["p99_ms"] or 0:>8.1f} {stats["errors"]:>8}')
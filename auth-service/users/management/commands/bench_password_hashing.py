@@ -0,0 +1,46 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import hashers
+from django.core.management.base import BaseCommand
+
+from users.hashing import PasswordHasherPool, verify_encoded
+
+
+class Command(BaseCommand):
+    help = 'Mide logins/seg (verificación de password) según el número de workers del pool de hashing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', default='0,1,2,4', help='Lista de workers a probar (0 = en el hilo)')
+        parser.add_argument('--logins', type=int, default=200, help='Verificaciones por prueba')
+        parser.add_argument('--concurrency', type=int, default=32, help='Requests concurrentes simulados (hilos)')
+
+    def handle(self, *args, **options):
+        encoded = hashers.make_password('benchmark-password')
+        logins = options['logins']
+        concurrency = options['concurrency']
+
+        self.stdout.write(f'{"workers":>8} {"logins/s":>10} {"p50 ms":>8} {"p99 ms":>8}')
+        for workers in [int(w) for w in options['workers'].split(',')]:
+            pool = PasswordHasherPool(workers, max_queue=concurrency)
+            try:
+                # Arranca los procesos antes de medir
+                pool.run(verify_encoded, 'warmup', encoded)
+                latencies = []
+
+                def login(_):
+                    started = time.perf_counter()
+                    pool.run(verify_encoded, 'benchmark-password', encoded)
+                    latencies.append((time.perf_counter() - started) * 1000)
+
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=concurrency) as threads:
+                    list(threads.map(login, range(logins)))
+                elapsed = time.perf_counter() - started
+            finally:
+                pool.shutdown()
+
+            latencies.sort()
+            p50 = latencies[len(latencies) // 2]
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            self.stdout.write(f'{workers:>8} {logins / elapsed:>10.1f} {p50:>8.1f} {p99:>8.1f}')
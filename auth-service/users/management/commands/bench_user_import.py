@@ -0,0 +1,55 @@
+import io
+import time
+
+from django.db import transaction
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from users.bulk_import import import_users, read_rows
+from users.hashing import PasswordHasherPool
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Compara la importación en bloque con el registro uno a uno; no deja usuarios creados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100000)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=None, help='Workers del pool (por defecto, PASSWORD_HASHING_WORKERS)')
+        parser.add_argument('--baseline', type=int, default=200, help='Usuarios creados uno a uno para comparar')
+        parser.add_argument('--fast-hasher', action='store_true',
+                            help='Usa MD5 para medir solo parseo e inserts (PBKDF2 domina con 100k usuarios)')
+
+    def handle(self, *args, **options):
+        from django.conf import settings
+
+        hashers = ['django.contrib.auth.hashers.MD5PasswordHasher'] if options['fast_hasher'] else settings.PASSWORD_HASHERS
+        workers = options['workers'] if options['workers'] is not None else settings.PASSWORD_HASHING_WORKERS
+        n = options['users']
+        body = 'email,password\n' + ''.join(f'bench{i}@example.com,bench-pass-{i}\n' for i in range(n))
+
+        with override_settings(PASSWORD_HASHERS=hashers):
+            # El pool se crea después del override para que los procesos hereden el hasher
+            pool = PasswordHasherPool(workers, max_queue=0)
+            try:
+                with transaction.atomic():
+                    started = time.perf_counter()
+                    report = import_users(read_rows(io.BytesIO(body.encode()), 'csv'),
+                                          batch_size=options['batch_size'], pool=pool)
+                    bulk = time.perf_counter() - started
+
+                    baseline = min(options['baseline'], n)
+                    started = time.perf_counter()
+                    for i in range(baseline):
+                        email = f'single{i}@example.com'
+                        if not User.objects.filter(email=email).exists():
+                            User.objects.create_user(email=email, password=f'bench-pass-{i}')
+                    single = time.perf_counter() - started
+                    transaction.set_rollback(True)
+            finally:
+                pool.shutdown()
+
+        self.stdout.write(f'bulk import: {report["created"]} usuarios en {bulk:.1f}s ({n / bulk:.0f} usuarios/s, {workers} workers)')
+        if baseline:
+            self.stdout.write(f'uno a uno:   {baseline} usuarios en {single:.1f}s ({baseline / single:.0f} usuarios/s)')
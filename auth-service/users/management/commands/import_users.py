@@ -0,0 +1,36 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.bulk_import import FORMATS, BulkImportError, import_users, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Importa usuarios desde un archivo CSV (email,password), JSON o JSON lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Archivo a importar')
+        parser.add_argument('--format', choices=FORMATS, help='Por defecto, según la extensión del archivo')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--report', help='Escribe el estado de cada fila en este archivo (JSON lines)')
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or os.path.splitext(options['path'])[1].lstrip('.').lower()
+        if fmt not in FORMATS:
+            raise CommandError(f'Formato no reconocido, usa --format ({", ".join(FORMATS)})')
+
+        with open(options['path'], 'rb') as stream:
+            try:
+                report = import_users(read_rows(stream, fmt), batch_size=options['batch_size'])
+            except BulkImportError as e:
+                raise CommandError(str(e))
+
+        if options['report']:
+            with open(options['report'], 'w') as out:
+                for result in report['results']:
+                    out.write(json.dumps(result) + '\n')
+        self.stdout.write(
+            f"{report['total']} filas: {report['created']} creados, {report['exists']} ya existían, "
+            f"{report['duplicate']} duplicados, {report['invalid']} inválidos"
+        )
@@ -0,0 +1,18 @@
+from django.http import JsonResponse
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework import status
+
+from .hashing import HashingBusy
+
+
+class HashingBusyMiddleware(MiddlewareMixin):
+    """
+    Pool de hashing saturado -> 503, en cualquier vista: DRF, vistas async, el admin o
+    authenticate() desde una vista normal (DRF re-lanza las excepciones que no son suyas).
+    """
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, HashingBusy):
+            return JsonResponse({'detail': str(exception)}, status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                headers={'Retry-After': '5'})
+        return None
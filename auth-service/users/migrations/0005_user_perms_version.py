@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('users', '0004_set_is_admin_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='perms_version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
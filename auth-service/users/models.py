@@ -1,6 +1,8 @@
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.db import models
 
+from . import hashing
+
 
 class UserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
@@ -12,6 +14,16 @@ class UserManager(BaseUserManager):
         user.save(using=self._db)
         return user
 
+    async def acreate_user(self, email, password=None, **extra_fields):
+        if not email:
+            raise ValueError("El correo electrónico es obligatorio")
+        email = self.normalize_email(email)
+        user = self.model(email=email, **extra_fields)
+        user.password = await hashing.amake_password(password)
+        user._password = password
+        await user.asave(using=self._db)
+        return user
+
     def create_superuser(self, email, password=None, **extra_fields):
         extra_fields.setdefault("is_staff", True)
         extra_fields.setdefault("is_superuser", True)
@@ -24,15 +36,67 @@ class UserManager(BaseUserManager):
 
         return self.create_user(email, password, **extra_fields)
 
+    def bump_perms_version(self, user_ids):
+        """Invalida los permisos embebidos en los tokens ya emitidos (se rechazan al refrescar)"""
+        self.filter(pk__in=list(user_ids)).update(perms_version=models.F("perms_version") + 1)
+
+
+# Campos que se embeben en el token (users.tokens); cambiarlos incrementa perms_version
+PERMISSION_FLAGS = ("is_active", "is_staff", "is_superuser")
+
 
 class User(AbstractBaseUser, PermissionsMixin):
     email = models.EmailField(unique=True)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    perms_version = models.PositiveIntegerField(default=1)
 
     USERNAME_FIELD = "email"
 
     objects = UserManager()
 
+    def set_password(self, raw_password):
+        self.password = hashing.make_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        def setter(raw_password):
+            self.set_password(raw_password)
+            # Evita que save() dispare password_changed
+            self._password = None
+            self.save(update_fields=["password"])
+
+        return hashing.check_password(raw_password, self.password, setter)
+
+    async def acheck_password(self, raw_password):
+        async def setter(raw_password):
+            self.password = await hashing.amake_password(raw_password)
+            self._password = None
+            await self.asave(update_fields=["password"])
+
+        return await hashing.acheck_password(raw_password, self.password, setter)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_flags = instance._permission_flags()
+        return instance
+
+    def _permission_flags(self):
+        # __dict__ para no cargar campos diferidos
+        return {f: self.__dict__[f] for f in PERMISSION_FLAGS if f in self.__dict__}
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, "_loaded_flags", None)
+        bump = bool(loaded) and any(self.__dict__.get(f) != v for f, v in loaded.items())
+        if bump:
+            self.perms_version = models.F("perms_version") + 1
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "perms_version"}
+        super().save(*args, **kwargs)
+        if bump:
+            self.refresh_from_db(fields=["perms_version"])
+        self._loaded_flags = self._permission_flags()
+
     def __str__(self):
         return self.email
@@ -0,0 +1,20 @@
+import hmac
+
+from django.conf import settings
+from rest_framework.permissions import BasePermission
+
+INTERNAL_TOKEN_HEADER = 'X-Internal-Token'
+
+
+class IsInternalServiceOrStaff(BasePermission):
+    """
+    Endpoints internos (llamadas entre servicios): header X-Internal-Token igual a
+    INTERNAL_API_TOKEN, o un usuario staff autenticado con JWT.
+    """
+
+    def has_permission(self, request, view):
+        expected = settings.INTERNAL_API_TOKEN
+        sent = request.headers.get(INTERNAL_TOKEN_HEADER)
+        if expected and sent and hmac.compare_digest(expected.encode(), sent.encode()):
+            return True
+        return bool(request.user and request.user.is_staff)
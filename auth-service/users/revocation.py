@@ -0,0 +1,218 @@
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.settings import api_settings
+
+KEY_PREFIX = 'revocation'
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationFailed(Exception):
+    """La revocación no quedó guardada en la caché compartida (Redis caído)"""
+
+
+class BloomFilter:
+    """Filtro de Bloom en memoria: sin falsos negativos, falsos positivos ~error_rate"""
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.sha256(item.encode()).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:16], 'big') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class RevocationList:
+    """
+    Revocación de tokens guardada en la caché (Redis; locmem en tests).
+
+    - Token: revocation:jti:<jti> hasta que el token expira (logout).
+    - Usuario: revocation:user:<id> = instante de la revocación; se rechazan los tokens
+      emitidos antes (logout en todos los dispositivos, usuario desactivado).
+
+    Cada revocación se añade además a un log numerado (revocation:seq / revocation:log:<n>).
+    Cada proceso mantiene un filtro de Bloom con esas entradas y lo actualiza leyendo el log
+    en segundo plano: si el token no está en el filtro se acepta sin consultar Redis; solo
+    los posibles positivos se confirman contra la caché. Hasta la primera sincronización
+    (el hilo la hace al arrancar) todos los tokens se confirman contra la caché.
+
+    Si Redis no responde al confirmar, el token se acepta (fail open), igual que el hilo
+    mantiene el filtro actual cuando no puede sincronizar: la autenticación sigue
+    funcionando sin Redis y las revocaciones vuelven a aplicarse al recuperarse.
+    """
+
+    def __init__(self, capacity=100000, error_rate=0.001, refresh_seconds=2.0, rebuild_seconds=600.0,
+                 now=time.time):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_seconds = refresh_seconds
+        self.rebuild_seconds = rebuild_seconds
+        self._now = now
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._seen_seq = 0
+        self._built_at = 0.0
+        self._ready = False
+        self._lock = threading.Lock()
+        self._thread = None
+        # Entradas viven lo mismo que el refresh token más largo
+        self.entry_ttl = int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+
+    # Escritura
+
+    def revoke_token(self, jti, exp):
+        ttl = int(exp - self._now())
+        if ttl <= 0:
+            return
+        self._store(f'{KEY_PREFIX}:jti:{jti}', 1, ttl, f'jti:{jti}')
+
+    def revoke_user(self, user_id):
+        self._store(f'{KEY_PREFIX}:user:{user_id}', int(self._now()), self.entry_ttl, f'user:{user_id}')
+
+    def _store(self, key, value, ttl, item):
+        """Guarda la revocación y la añade al log; lanza RevocationFailed si no quedó persistida"""
+        try:
+            cache.set(key, value, ttl)
+            cache.add(f'{KEY_PREFIX}:seq', 0, None)
+            seq = cache.incr(f'{KEY_PREFIX}:seq')
+            if not isinstance(seq, int):
+                raise RevocationFailed(f'incr de {KEY_PREFIX}:seq devolvió {seq!r}')
+            cache.set(f'{KEY_PREFIX}:log:{seq}', item, self.entry_ttl)
+        except Exception as e:
+            # Sin esto el logout respondería 200 y el token seguiría valiendo en los demás procesos
+            logger.error('No se pudo guardar la revocación %s: %s', item, e)
+            if isinstance(e, RevocationFailed):
+                raise
+            raise RevocationFailed(str(e)) from e
+        # Este proceso la ve al instante; el resto en el próximo sync
+        self._bloom.add(item)
+
+    # Lectura
+
+    def is_revoked(self, token):
+        """`token`: payload ya validado (jti, user_id, iat)"""
+        keys = self._candidate_keys(token)
+        if not keys:
+            return False
+        try:
+            values = cache.get_many(keys)
+        except Exception as e:
+            return self._unavailable(e)
+        return self._revoked(token, values)
+
+    async def ais_revoked(self, token):
+        """Versión async de is_revoked(): la consulta a Redis no bloquea el event loop"""
+        keys = self._candidate_keys(token)
+        if not keys:
+            return False
+        try:
+            values = await cache.aget_many(keys)
+        except Exception as e:
+            return self._unavailable(e)
+        return self._revoked(token, values)
+
+    @staticmethod
+    def _unavailable(error):
+        logger.warning('Revocación no verificable, se acepta el token: %s', error)
+        return False
+
+    def _candidate_keys(self, token):
+        # Solo se consulta Redis si el filtro no descarta el token
+        jti = token.get(api_settings.JTI_CLAIM)
+        user_id = token.get(api_settings.USER_ID_CLAIM)
+        keys = []
+        if jti and (not self._ready or f'jti:{jti}' in self._bloom):
+            keys.append(f'{KEY_PREFIX}:jti:{jti}')
+        if user_id is not None and (not self._ready or f'user:{user_id}' in self._bloom):
+            keys.append(f'{KEY_PREFIX}:user:{user_id}')
+        return keys
+
+    @staticmethod
+    def _revoked(token, values):
+        if f'{KEY_PREFIX}:jti:{token.get(api_settings.JTI_CLAIM)}' in values:
+            return True
+        revoked_at = values.get(f'{KEY_PREFIX}:user:{token.get(api_settings.USER_ID_CLAIM)}')
+        return revoked_at is not None and token.get('iat', 0) <= revoked_at
+
+    # Sincronización del filtro
+
+    def sync(self):
+        """Añade al filtro las revocaciones nuevas del log; lo reconstruye cada rebuild_seconds"""
+        with self._lock:
+            rebuild = self._now() - self._built_at > self.rebuild_seconds
+            if rebuild:
+                # Reconstruir descarta las entradas ya expiradas. Todas las entradas del log
+                # tienen el mismo TTL, así que expiran en orden: se empieza por la más antigua viva.
+                bloom = BloomFilter(self.capacity, self.error_rate)
+                start = cache.get(f'{KEY_PREFIX}:floor') or 1
+            else:
+                bloom, start = self._bloom, self._seen_seq + 1
+            last = cache.get(f'{KEY_PREFIX}:seq') or 0
+            oldest = None
+            for chunk in range(start, last + 1, 1000):
+                keys = [f'{KEY_PREFIX}:log:{n}' for n in range(chunk, min(chunk + 1000, last + 1))]
+                found = cache.get_many(keys)
+                for key, item in found.items():
+                    bloom.add(item)
+                if found and oldest is None:
+                    oldest = min(int(key.rsplit(':', 1)[1]) for key in found)
+            if rebuild:
+                cache.set(f'{KEY_PREFIX}:floor', oldest or last + 1, None)
+                self._built_at = self._now()
+            self._bloom, self._seen_seq = bloom, last
+            self._ready = True
+
+    def start(self):
+        if self._thread is not None or self.refresh_seconds <= 0:
+            return
+        self._thread = threading.Thread(target=self._run, name='revocation-sync', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.sync()
+            except Exception:
+                # Redis caído: se mantiene el filtro actual y se reintenta
+                pass
+            time.sleep(self.refresh_seconds)
+
+
+_revocations = None
+_revocations_pid = None
+_revocations_lock = threading.Lock()
+
+
+def get_revocation_list():
+    global _revocations, _revocations_pid
+    if _revocations is None or _revocations_pid != os.getpid():
+        with _revocations_lock:
+            if _revocations is None or _revocations_pid != os.getpid():
+                revocations = RevocationList(
+                    capacity=settings.REVOCATION_BLOOM_CAPACITY,
+                    error_rate=settings.REVOCATION_BLOOM_ERROR_RATE,
+                    refresh_seconds=settings.REVOCATION_REFRESH_SECONDS,
+                    rebuild_seconds=settings.REVOCATION_REBUILD_SECONDS,
+                )
+                # Sin sync aquí: el hilo la hace en segundo plano y, mientras tanto, is_revoked
+                # consulta la caché directamente (ni bloquea la request ni falla sin Redis)
+                revocations.start()
+                _revocations, _revocations_pid = revocations, os.getpid()
+    return _revocations
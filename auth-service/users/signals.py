@@ -0,0 +1,67 @@
+from django.contrib.auth.models import Group
+from django.core.signals import request_finished, request_started
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_cached_user
+from .db_stats import stats
+from .models import User
+from .revocation import get_revocation_list
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    # Síncrono a propósito: save() no puede ejecutarse en el event loop (el ORM lo rechaza)
+    # y asave() lo ejecuta en el hilo de sync_to_async, así que el delete nunca bloquea el loop
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def revoke_tokens_on_deactivation(sender, instance, created, **kwargs):
+    # Los tokens ya emitidos dejan de valer sin esperar a que expiren
+    loaded = getattr(instance, '_loaded_flags', {})
+    if not created and loaded.get('is_active') and not instance.is_active:
+        get_revocation_list().revoke_user(instance.pk)
+
+
+@receiver(connection_created)
+def count_connection(sender, connection, **kwargs):
+    stats.connection_opened()
+
+
+@receiver(request_started)
+def count_request_started(sender, **kwargs):
+    stats.request_started()
+
+
+@receiver(request_finished)
+def count_request_finished(sender, **kwargs):
+    stats.request_finished()
+
+
+def _bump_on_m2m_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+        return
+    if not reverse:
+        # user.groups / user.user_permissions: un solo usuario; clear se cuenta en post_clear
+        if action != 'pre_clear':
+            User.objects.bump_perms_version([instance.pk])
+    elif action == 'pre_clear':
+        # group.user_set.clear(): después ya no se sabe qué usuarios tenía
+        User.objects.bump_perms_version(instance.user_set.values_list('pk', flat=True))
+    elif action != 'post_clear':
+        User.objects.bump_perms_version(pk_set)
+
+
+def _bump_on_group_permissions_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    groups = [instance.pk] if not reverse else (pk_set if action != 'pre_clear' else instance.group_set.values_list('pk', flat=True))
+    User.objects.bump_perms_version(User.objects.filter(groups__in=list(groups)).values_list('pk', flat=True))
+
+
+m2m_changed.connect(_bump_on_m2m_change, sender=User.groups.through)
+m2m_changed.connect(_bump_on_m2m_change, sender=User.user_permissions.through)
+m2m_changed.connect(_bump_on_group_permissions_change, sender=Group.permissions.through)
@@ -1,3 +1,540 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import os
+import tempfile
+import time
+from unittest.mock import patch
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.contrib.auth.models import Group, Permission
+from django.contrib.auth.hashers import check_password as django_check_password
+from django.contrib.auth.hashers import make_password as django_make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncRequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from . import async_views, bulk_import, hashing, revocation
+from .bulk_import import BulkImportError
+from .authentication import user_cache, user_cache_key
+from .db_stats import ConnectionStats
+from .hashing import PasswordHasherPool
+from .revocation import BloomFilter, RevocationList, get_revocation_list
+from .models import User
+
+LOCMEM_CACHE = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "default"},
+    "users": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "users"},
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user_cache().clear()
+        self.user = User.objects.create_user(email="ana@example.com", password="secret-pass-123")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def test_me_skips_db_when_user_cached(self):
+        self.assertEqual(self.client.get("/api/me/").status_code, 200)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/me/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["email"], "ana@example.com")
+        self.assertEqual(len(queries), 0)
+
+    def test_save_invalidates_cache(self):
+        self.client.get("/api/me/")
+        self.assertIsNotNone(user_cache().get(user_cache_key(self.user.pk)))
+
+        self.user.is_staff = True
+        self.user.save()
+        self.assertIsNone(user_cache().get(user_cache_key(self.user.pk)))
+        self.assertTrue(self.client.get("/api/me/").json()["is_staff"])
+
+    def test_deactivated_user_rejected(self):
+        self.client.get("/api/me/")
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get("/api/me/").status_code, 401)
+
+    def test_deleted_user_rejected(self):
+        self.client.get("/api/me/")
+        self.user.delete()
+        self.assertEqual(self.client.get("/api/me/").status_code, 401)
+
+    def test_saving_cached_user_keeps_password(self):
+        self.client.get("/api/me/")
+        response = self.client.get("/api/me/")
+        cached = response.wsgi_request.user
+        cached.is_staff = True
+        cached.save()
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("secret-pass-123"))
+        self.assertTrue(self.user.is_staff)
+
+
+class PasswordHashingTests(TestCase):
+    def setUp(self):
+        self.pool = PasswordHasherPool(workers=1, max_queue=0)
+        self.addCleanup(self.pool.shutdown)
+        patcher = patch.object(hashing, 'get_hasher_pool', return_value=self.pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_hash_compatible_with_django(self):
+        user = User.objects.create_user(email="ana@example.com", password="secret-pass-123")
+        self.assertTrue(django_check_password("secret-pass-123", user.password))
+
+        user.password = django_make_password("other-pass-456")
+        self.assertTrue(user.check_password("other-pass-456"))
+        self.assertFalse(user.check_password("wrong"))
+
+    def test_outdated_hash_upgraded_on_login(self):
+        user = User.objects.create_user(email="ana@example.com", password="x")
+        old = PBKDF2PasswordHasher().encode("secret-pass-123", "somesalt", iterations=1000)
+        User.objects.filter(pk=user.pk).update(password=old)
+
+        response = APIClient().post("/api/token/", {"email": "ana@example.com", "password": "secret-pass-123"})
+        self.assertEqual(response.status_code, 200)
+        user.refresh_from_db()
+        self.assertNotEqual(user.password, old)
+        self.assertTrue(django_check_password("secret-pass-123", user.password))
+
+    def test_full_queue_outside_drf_is_503(self):
+        User.objects.create_user(email="staff@example.com", password="secret-pass-123", is_staff=True)
+        self.pool._slots.acquire()
+        with self.assertRaises(hashing.HashingBusy):
+            authenticate(email="staff@example.com", password="secret-pass-123")
+        response = self.client.post("/admin/login/", {"username": "staff@example.com", "password": "secret-pass-123"})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "5")
+
+    def test_broken_pool_is_replaced(self):
+        self.assertTrue(self.pool.run(hashing.encode_password, "secret-pass-123"))
+        broken = self.pool._executor
+        for process in list(broken._processes.values()):
+            process.kill()
+            process.join()
+
+        encoded = self.pool.run(hashing.encode_password, "secret-pass-123")
+        self.assertTrue(django_check_password("secret-pass-123", encoded))
+        self.assertIsNot(self.pool._executor, broken)
+
+    def test_full_queue_rejected(self):
+        self.pool._slots.acquire()
+        response = APIClient().post("/api/register/", {"email": "ana@example.com", "password": "secret-pass-123"})
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(User.objects.filter(email="ana@example.com").exists())
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class BulkImportTests(TestCase):
+    def setUp(self):
+        patcher = patch.object(hashing, 'get_hasher_pool', return_value=PasswordHasherPool(workers=0, max_queue=0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        User.objects.create_user(email="existing@example.com", password="secret-pass-123")
+        self.staff = User.objects.create_user(email="staff@example.com", password="x", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_csv_import_reports_each_row(self):
+        body = (
+            "email,password\n"
+            "ana@example.com,pass-1\n"
+            "existing@example.com,pass-2\n"
+            "ana@example.com,pass-3\n"
+            ",pass-4\n"
+            "luis@example.com,pass-5\n"
+        )
+        response = self.client.post("/api/users/import/", body, content_type="text/csv")
+        self.assertEqual(response.status_code, 200)
+        report = response.json()
+        self.assertEqual([r["status"] for r in report["results"]],
+                         ["created", "exists", "duplicate", "invalid", "created"])
+        self.assertEqual(report["created"], 2)
+        self.assertTrue(User.objects.get(email="luis@example.com").check_password("pass-5"))
+
+    def test_json_import(self):
+        rows = [{"email": f"user{i}@example.com", "password": f"pass-{i}"} for i in range(5)]
+        response = self.client.post("/api/users/import/", rows, format="json")
+        self.assertEqual(response.json()["created"], 5)
+        self.assertEqual(User.objects.filter(email__startswith="user").count(), 5)
+
+    def test_csv_not_utf8_is_bad_request(self):
+        body = "email,password\nana@example.com,pass-1\n".encode() + "josé@example.com,pass-2\n".encode("latin-1")
+        response = self.client.post("/api/users/import/", body, content_type="text/csv")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("fila 2", response.json()["error"])
+
+    def test_json_list_is_read_incrementally(self):
+        rows = [{"email": f"user{i}@example.com", "password": f"pass-{i}", "nota": "x" * i} for i in range(40)]
+        stream = io.BytesIO(json.dumps(rows, indent=2).encode())
+        self.assertEqual(list(bulk_import._json_items(stream, chunk_size=7)), rows)
+        stream = io.BytesIO(b'[1, 2345, {"a": [1, 2]}]')
+        self.assertEqual(list(bulk_import._json_items(stream, chunk_size=3)), [1, 2345, {"a": [1, 2]}])
+        for body in (b'{"email": "a@example.com"}', b'[{"email": "a"} {"email": "b"}]', b'[{"email": "a"},'):
+            with self.assertRaises(BulkImportError):
+                list(bulk_import._json_items(io.BytesIO(body), chunk_size=4))
+
+    def test_batches_query_existing_once_each(self):
+        rows = [{"email": f"user{i}@example.com", "password": f"pass-{i}"} for i in range(5)]
+        rows.append({"email": "existing@example.com", "password": "p"})
+        with CaptureQueriesContext(connection) as queries:
+            report = bulk_import.import_users(rows, batch_size=2)
+        self.assertEqual(report["created"], 5)
+        self.assertEqual(report["exists"], 1)
+        selects = [q for q in queries if q["sql"].startswith("SELECT")]
+        self.assertEqual(len(selects), 3)
+
+    def test_batches_are_inserted_as_they_go_in_one_transaction(self):
+        def rows():
+            for i in range(5):
+                yield {"email": f"user{i}@example.com", "password": f"pass-{i}"}
+            raise BulkImportError("cuerpo inválido")
+
+        with patch.object(User.objects, "bulk_create", wraps=User.objects.bulk_create) as bulk_create:
+            with self.assertRaises(BulkImportError):
+                bulk_import.import_users(rows(), batch_size=2)
+        self.assertEqual([len(call.args[0]) for call in bulk_create.call_args_list], [2, 2])
+        self.assertFalse(User.objects.filter(email__startswith="user").exists())
+
+    def test_jsonl_invalid_line(self):
+        body = '{"email": "ana@example.com", "password": "p"}\nnot json\n'
+        response = self.client.post("/api/users/import/", body, content_type="application/x-ndjson")
+        self.assertEqual([r["status"] for r in response.json()["results"]], ["created", "invalid"])
+
+    def test_requires_staff(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.get(email="existing@example.com"))
+        response = client.post("/api/users/import/", "email,password\n", content_type="text/csv")
+        self.assertEqual(response.status_code, 403)
+
+    def test_unsupported_content_type(self):
+        response = self.client.post("/api/users/import/", "x", content_type="text/plain")
+        self.assertEqual(response.status_code, 415)
+
+    def test_management_command(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "users.csv")
+            with open(path, "w") as f:
+                f.write("email,password\nana@example.com,pass-1\nexisting@example.com,pass-2\n")
+            out = io.StringIO()
+            call_command("import_users", path, stdout=out)
+        self.assertIn("1 creados, 1 ya existían", out.getvalue())
+        self.assertTrue(User.objects.filter(email="ana@example.com").exists())
+
+
+class DBPoolStatsTests(TestCase):
+    def test_connections_per_request(self):
+        stats = ConnectionStats()
+        for _ in range(4):
+            stats.request_started()
+            stats.request_finished()
+        stats.connection_opened()
+        snapshot = stats.snapshot()
+        self.assertEqual(snapshot["requests"], 4)
+        self.assertEqual(snapshot["requests_in_flight"], 0)
+        self.assertEqual(snapshot["connections_per_request"], 0.25)
+
+    def test_endpoint_staff_only(self):
+        client = APIClient()
+        user = User.objects.create_user(email="ana@example.com", password="x")
+        client.force_authenticate(user)
+        self.assertEqual(client.get("/api/db/pool/").status_code, 403)
+
+        user.is_staff = True
+        user.save()
+        response = client.get("/api/db/pool/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("connections_opened", response.json())
+        self.assertGreaterEqual(response.json()["requests_in_flight"], 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class AsyncViewsTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        user_cache().clear()
+        patcher = patch.object(hashing, 'get_hasher_pool', return_value=PasswordHasherPool(workers=0, max_queue=0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.factory = AsyncRequestFactory()
+
+    async def test_register(self):
+        body = {"email": "ana@example.com", "password": "secret-pass-123"}
+        response = await async_views.register(self.factory.post("/api/register/", body, content_type="application/json"))
+        self.assertEqual(response.status_code, 200)
+        user = await User.objects.aget(email="ana@example.com")
+        self.assertTrue(await user.acheck_password("secret-pass-123"))
+
+        response = await async_views.register(self.factory.post("/api/register/", body, content_type="application/json"))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.content), {"error": "Usuario ya existe"})
+
+    async def test_me(self):
+        user = await User.objects.acreate_user(email="ana@example.com", password="secret-pass-123")
+        auth = f"Bearer {AccessToken.for_user(user)}"
+        for _ in range(2):  # la segunda vez desde la caché
+            response = await async_views.me(self.factory.get("/api/me/", headers={"Authorization": auth}))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(json.loads(response.content)["email"], "ana@example.com")
+
+    async def test_cache_is_not_used_on_the_event_loop(self):
+        # Las llamadas síncronas a la caché (revocación y signals) deben ir en el hilo de sync_to_async
+        on_loop = []
+
+        def recording(fn):
+            def wrapper(*args, **kwargs):
+                try:
+                    asyncio.get_running_loop()
+                    on_loop.append(fn.__name__)
+                except RuntimeError:
+                    pass
+                return fn(*args, **kwargs)
+            return wrapper
+
+        user = await User.objects.acreate_user(email="ana@example.com", password="secret-pass-123")
+        await sync_to_async(get_revocation_list().revoke_user)(user.pk)
+        auth = f"Bearer {AccessToken.for_user(user)}"
+        with patch.object(cache, "get_many", recording(cache.get_many)), \
+                patch.object(user_cache(), "delete", recording(user_cache().delete)):
+            response = await async_views.me(self.factory.get("/api/me/", headers={"Authorization": auth}))
+            user.is_staff = True
+            await user.asave()
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(on_loop, [])
+
+    async def test_me_requires_token(self):
+        response = await async_views.me(self.factory.get("/api/me/"))
+        self.assertEqual(response.status_code, 401)
+        self.assertIn("Bearer", response["WWW-Authenticate"])
+
+        response = await async_views.me(self.factory.get("/api/me/", headers={"Authorization": "Bearer nope"}))
+        self.assertEqual(response.status_code, 401)
+
+
+@override_settings(INTERNAL_API_TOKEN="internal-secret")
+class UserStatusTests(TestCase):
+    def setUp(self):
+        self.ana = User.objects.create_user(email="ana@example.com", password="x")
+        self.luis = User.objects.create_user(email="luis@example.com", password="x", is_active=False)
+        self.client = APIClient()
+        self.client.credentials(HTTP_X_INTERNAL_TOKEN="internal-secret")
+
+    def test_batch_status_single_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/api/users/status/?ids={self.ana.pk},{self.luis.pk},999999")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("password", queries[0]["sql"])
+        self.assertEqual(response.json(), {
+            "users": [
+                {"id": self.ana.pk, "email": "ana@example.com", "status": "active"},
+                {"id": self.luis.pk, "email": "luis@example.com", "status": "inactive"},
+            ],
+            "missing": [999999],
+        })
+
+    def test_etag_revalidation(self):
+        url = f"/api/users/status/?ids={self.ana.pk}"
+        etag = self.client.get(url)["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+        self.ana.is_active = False
+        self.ana.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_single_user_without_trailing_slash(self):
+        response = self.client.get(f"/api/users/{self.ana.pk}")
+        self.assertEqual(response.json(), {"id": self.ana.pk, "email": "ana@example.com", "status": "active"})
+        self.assertEqual(self.client.get("/api/users/999999").status_code, 404)
+
+    def test_requires_internal_token_or_staff(self):
+        client = APIClient()
+        self.assertEqual(client.get(f"/api/users/{self.ana.pk}").status_code, 401)
+        client.credentials(HTTP_X_INTERNAL_TOKEN="wrong")
+        self.assertEqual(client.get(f"/api/users/{self.ana.pk}").status_code, 401)
+
+        staff = User.objects.create_user(email="staff@example.com", password="x", is_staff=True)
+        client.force_authenticate(staff)
+        self.assertEqual(client.get(f"/api/users/{self.ana.pk}").status_code, 200)
+
+    def test_invalid_ids(self):
+        self.assertEqual(self.client.get("/api/users/status/?ids=a,b").status_code, 400)
+        self.assertEqual(self.client.get("/api/users/status/").status_code, 400)
+
+
+class PermissionClaimsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="ana@example.com", password="secret-pass-123")
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post("/api/token/", {"email": "ana@example.com", "password": "secret-pass-123"})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def refresh(self, tokens):
+        return self.client.post("/api/token/refresh/", {"refresh": tokens["refresh"]})
+
+    def test_claims_embedded_at_login(self):
+        group = Group.objects.create(name="bibliotecarios")
+        group.permissions.add(Permission.objects.get(codename="view_user"))
+        self.user.groups.add(group)
+
+        claims = AccessToken(self.login()["access"]).payload
+        self.user.refresh_from_db()
+        self.assertFalse(claims["is_staff"])
+        self.assertEqual(claims["perms"], ["users.view_user"])
+        self.assertEqual(claims["pv"], self.user.perms_version)
+
+        access = self.refresh(self.login()).json()["access"]
+        self.assertEqual(AccessToken(access)["perms"], ["users.view_user"])
+
+    def test_flag_change_invalidates_refresh(self):
+        tokens = self.login()
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(self.user.perms_version, 2)
+        self.assertEqual(self.refresh(tokens).status_code, 401)
+        self.assertTrue(AccessToken(self.login()["access"])["is_staff"])
+
+    def test_unrelated_save_keeps_version(self):
+        tokens = self.login()
+        self.user.last_login = None
+        self.user.save()
+        self.assertEqual(self.refresh(tokens).status_code, 200)
+
+    def test_group_permission_change_invalidates_refresh(self):
+        group = Group.objects.create(name="bibliotecarios")
+        self.user.groups.add(group)
+        tokens = self.login()
+
+        group.permissions.add(Permission.objects.get(codename="view_user"))
+        self.assertEqual(self.refresh(tokens).status_code, 401)
+
+        tokens = self.login()
+        group.user_set.clear()
+        self.assertEqual(self.refresh(tokens).status_code, 401)
+
+    def test_deactivated_user_cannot_refresh(self):
+        tokens = self.login()
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.refresh(tokens).status_code, 401)
+
+
+class BloomFilterTests(TestCase):
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        items = [f"jti:{i}" for i in range(1000)]
+        for item in items:
+            bloom.add(item)
+        self.assertTrue(all(item in bloom for item in items))
+        false_positives = sum(f"other:{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class RevocationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user_cache().clear()
+        self.revocations = RevocationList(refresh_seconds=0)
+        self.revocations.sync()
+        patcher = patch.multiple(revocation, _revocations=self.revocations, _revocations_pid=os.getpid())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(email="ana@example.com", password="secret-pass-123")
+        self.refresh = RefreshToken.for_user(self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.refresh.access_token}")
+
+    def test_logout_revokes_access_and_refresh(self):
+        self.assertEqual(self.client.get("/api/me/").status_code, 200)
+        response = self.client.post("/api/logout/", {"refresh": str(self.refresh)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get("/api/me/").status_code, 401)
+        response = APIClient().post("/api/token/refresh/", {"refresh": str(self.refresh)})
+        self.assertEqual(response.status_code, 401)
+
+    def test_deactivation_revokes_all_tokens(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertTrue(self.revocations.is_revoked(self.refresh.access_token))
+        self.assertTrue(self.revocations.is_revoked(self.refresh))
+
+    def test_other_process_sees_revocation_after_sync(self):
+        other = RevocationList(refresh_seconds=0)
+        other.sync()
+        self.revocations.revoke_user(self.user.pk)
+        self.assertFalse(other.is_revoked(self.refresh.access_token))
+        other.sync()
+        self.assertTrue(other.is_revoked(self.refresh.access_token))
+
+    def test_tokens_issued_after_user_revocation_are_valid(self):
+        revocations = RevocationList(refresh_seconds=0, now=lambda: time.time() - 10)
+        revocations.revoke_user(self.user.pk)
+        self.assertFalse(revocations.is_revoked(RefreshToken.for_user(self.user).access_token))
+
+    def test_bloom_miss_skips_cache(self):
+        with patch.object(cache, "get_many") as get_many:
+            self.assertFalse(self.revocations.is_revoked(self.refresh.access_token))
+        get_many.assert_not_called()
+
+    def test_logout_fails_when_revocation_not_persisted(self):
+        with patch.object(cache, "incr", side_effect=ConnectionError("redis down")):
+            response = self.client.post("/api/logout/", {"refresh": str(self.refresh)})
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(self.revocations.is_revoked(self.refresh.access_token))
+        self.assertEqual(self.client.get("/api/me/").status_code, 200)
+
+    def test_swallowed_cache_error_is_not_success(self):
+        # Un backend con IGNORE_EXCEPTIONS devuelve None en lugar de lanzar
+        with patch.object(cache, "incr", return_value=None):
+            with self.assertRaises(revocation.RevocationFailed):
+                self.revocations.revoke_user(self.user.pk)
+        self.assertIsNone(cache.get("revocation:log:None"))
+        self.assertNotIn(f"user:{self.user.pk}", self.revocations._bloom)
+
+    def test_unsynced_list_checks_the_cache(self):
+        self.revocations.revoke_user(self.user.pk)
+        fresh = RevocationList(refresh_seconds=0)
+        self.assertTrue(fresh.is_revoked(self.refresh.access_token))
+
+    def test_redis_down_at_startup_fails_open(self):
+        # Primer request del proceso con Redis caído: sin sync bloqueante y el token se acepta
+        with patch.multiple(revocation, _revocations=None, _revocations_pid=None), \
+                patch.object(RevocationList, "start"), \
+                patch.object(RevocationList, "sync", side_effect=ConnectionError("redis down")) as sync, \
+                patch.object(cache, "get_many", side_effect=ConnectionError("redis down")):
+            self.assertEqual(self.client.get("/api/me/").status_code, 200)
+        sync.assert_not_called()
+
+    def test_redis_down_on_possible_hit_fails_open(self):
+        self.revocations.revoke_token(self.refresh.access_token["jti"], time.time() + 60)
+        with patch.object(cache, "get_many", side_effect=ConnectionError("redis down")):
+            self.assertFalse(self.revocations.is_revoked(self.refresh.access_token))
+
+    def test_rebuild_skips_expired_log_entries(self):
+        self.revocations.revoke_token("old", time.time() + 60)
+        cache.delete("revocation:log:1")
+        self.revocations.revoke_token("new", time.time() + 60)
+        other = RevocationList(refresh_seconds=0)
+        other.sync()
+        self.assertEqual(cache.get("revocation:floor"), 2)
+        self.assertIn("jti:new", other._bloom)
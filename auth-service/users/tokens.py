@@ -0,0 +1,50 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+from .revocation import get_revocation_list
+
+
+def permission_claims(user):
+    """
+    Claims de autorización, calculados una vez al hacer login: los servicios que
+    verifican el token autorizan sin consultar grupos ni permisos en la base de datos.
+    """
+    return {
+        'is_staff': user.is_staff,
+        'is_superuser': user.is_superuser,
+        # El superusuario tiene todos los permisos: no hace falta listarlos
+        'perms': [] if user.is_superuser else sorted(user.get_all_permissions()),
+        'pv': user.perms_version,
+    }
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        for claim, value in permission_claims(user).items():
+            token[claim] = value
+        return token
+
+
+class VersionedTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    El access token nuevo copia los claims del refresh token, así que antes de emitirlo
+    se compara su `pv` con perms_version: si los permisos cambiaron hay que hacer login.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if get_revocation_list().is_revoked(refresh):
+            raise InvalidToken(_('Token revocado'))
+        current = (
+            User.objects.filter(**{api_settings.USER_ID_FIELD: refresh.get(api_settings.USER_ID_CLAIM)}, is_active=True)
+            .values_list('perms_version', flat=True)
+            .first()
+        )
+        if current is None or refresh.get('pv') != current:
+            raise InvalidToken(_('Los permisos del usuario cambiaron, inicia sesión de nuevo'))
+        return super().validate(attrs)
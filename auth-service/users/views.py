@@ -28,3 +28,111 @@ def me(request):
         'is_staff': user.is_staff,
         'is_superuser': user.is_superuser,
     })
+
+from rest_framework.permissions import IsAdminUser
+from .bulk_import import CONTENT_TYPES, BulkImportError, import_users as bulk_import_users, read_rows
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def import_users(request):
+    fmt = CONTENT_TYPES.get(request.content_type.split(';')[0].strip())
+    if fmt is None:
+        return Response({'error': f'Content-Type soportados: {", ".join(CONTENT_TYPES)}'},
+                        status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+    if request.stream is None:
+        return Response({'error': 'No se enviaron usuarios'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        report = bulk_import_users(read_rows(request.stream, fmt))
+    except BulkImportError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(report)
+
+from .db_stats import stats as db_stats
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def db_pool(request):
+    return Response(db_stats.snapshot())
+
+import hashlib
+import json
+from django.utils.http import parse_etags, quote_etag
+from .permissions import IsInternalServiceOrStaff
+
+MAX_STATUS_IDS = 500
+STATUS_FIELDS = ('id', 'email', 'is_active')
+
+
+def _user_status(user):
+    return {'id': user.id, 'email': user.email, 'status': 'active' if user.is_active else 'inactive'}
+
+
+def _etag_response(request, payload):
+    # El cliente guarda el ETag y revalida con If-None-Match: si nada cambió responde 304 sin cuerpo
+    etag = quote_etag(hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest())
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(payload)
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([IsInternalServiceOrStaff])
+def user_status(request, user_id):
+    user = User.objects.filter(id=user_id).only(*STATUS_FIELDS).first()
+    if user is None:
+        return Response({'error': 'Usuario no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+    return _etag_response(request, _user_status(user))
+
+
+@api_view(['GET'])
+@permission_classes([IsInternalServiceOrStaff])
+def users_status(request):
+    try:
+        ids = sorted({int(i) for i in request.query_params.get('ids', '').split(',') if i.strip()})
+    except ValueError:
+        return Response({'error': 'ids debe ser una lista de enteros separados por coma'}, status=status.HTTP_400_BAD_REQUEST)
+    if not ids or len(ids) > MAX_STATUS_IDS:
+        return Response({'error': f'Se requieren entre 1 y {MAX_STATUS_IDS} ids'}, status=status.HTTP_400_BAD_REQUEST)
+
+    users = [_user_status(u) for u in User.objects.filter(id__in=ids).only(*STATUS_FIELDS).order_by('id')]
+    found = {u['id'] for u in users}
+    return _etag_response(request, {'users': users, 'missing': [i for i in ids if i not in found]})
+
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from .revocation import RevocationFailed, get_revocation_list
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def logout(request):
+    """Revoca el access token usado y el refresh token enviado; con "all" todos los del usuario"""
+    try:
+        return _logout(request)
+    except RevocationFailed:
+        # El cliente debe reintentar: sus tokens siguen siendo válidos
+        return Response({'error': 'No se pudo cerrar la sesión, inténtalo de nuevo'},
+                        status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+def _logout(request):
+    revocations = get_revocation_list()
+    if request.data.get('all'):
+        revocations.revoke_user(request.user.pk)
+        return Response({'message': 'Sesiones cerradas'})
+
+    refresh = request.data.get('refresh')
+    if refresh:
+        try:
+            token = RefreshToken(refresh)
+        except TokenError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if str(token.get(jwt_settings.USER_ID_CLAIM)) != str(request.user.pk):
+            return Response({'error': 'El refresh token no pertenece al usuario'}, status=status.HTTP_400_BAD_REQUEST)
+        revocations.revoke_token(token[jwt_settings.JTI_CLAIM], token['exp'])
+    revocations.revoke_token(request.auth[jwt_settings.JTI_CLAIM], request.auth['exp'])
+    return Response({'message': 'Sesión cerrada'})
@@ -0,0 +1,51 @@
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timezone
+from typing import Optional
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+@dataclass(frozen=True)
+class LoanCreated:
+    loan_id: str
+    user_id: str
+    book_id: str
+    start_date: date
+    due_date: date
+    occurred_at: str = field(default_factory=_now)
+    type: str = "LoanCreated"
+
+
+@dataclass(frozen=True)
+class LoanReturned:
+    loan_id: str
+    user_id: str
+    book_id: str
+    return_date: date
+    occurred_at: str = field(default_factory=_now)
+    type: str = "LoanReturned"
+
+
+EVENT_TYPES = {cls.__name__: cls for cls in (LoanCreated, LoanReturned)}
+DATE_FIELDS = ("start_date", "due_date", "return_date")
+
+
+def event_to_dict(event) -> dict:
+    data = asdict(event)
+    for key in DATE_FIELDS:
+        if key in data:
+            data[key] = data[key].isoformat()
+    return data
+
+
+def event_from_dict(data: dict) -> Optional[object]:
+    cls = EVENT_TYPES.get(data.get("type"))
+    if cls is None:
+        return None
+    values = dict(data)
+    for key in DATE_FIELDS:
+        if key in values:
+            values[key] = date.fromisoformat(values[key])
+    return cls(**values)
@@ -1,7 +1,8 @@
-from typing import Dict
+from typing import Dict, List, Set
 
 
 class BooksPort:
     async def get_book(self, book_id: str) -> Dict: ...
     async def mark_loaned(self, book_id: str) -> None: ...
-    async def mark_returned(self, book_id: str) -> None: ...
\ No newline at end of file
+    async def mark_returned(self, book_id: str) -> None: ...
+    async def mark_returned_many(self, book_ids: List[str]) -> Set[str]: ...  # returns the book_ids that failed
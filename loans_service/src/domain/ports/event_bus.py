@@ -0,0 +1,11 @@
+from typing import Awaitable, Callable, List
+
+EventHandler = Callable[[List[object]], Awaitable[None]]
+
+
+class EventBus:
+    async def publish(self, event: object) -> None: ...
+    # broadcast: every process receives every event (no shared offset, nothing to clean up)
+    def subscribe(self, consumer: str, handler: EventHandler, broadcast: bool = False) -> None: ...
+    async def start(self) -> None: ...
+    async def stop(self) -> None: ...
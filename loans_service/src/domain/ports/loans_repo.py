@@ -1,8 +1,12 @@
-from typing import Optional
+from typing import Dict, List, Optional
 from ..entities.loan import Loan
 
 
 class LoansPort:
     async def save(self, loan: Loan) -> None: ...
     async def get(self, loan_id: str) -> Optional[Loan]: ...
-    async def mark_returned(self, loan_id: str) -> None: ...
\ No newline at end of file
+    async def mark_returned(self, loan_id: str) -> None: ...
+    async def list_active(self) -> List[Loan]: ...
+    async def list_ids(self) -> List[str]: ...  # every loan, any status
+    async def get_many(self, loan_ids: List[str]) -> Dict[str, Loan]: ...
+    async def save_many(self, loans: List[Loan]) -> None: ...
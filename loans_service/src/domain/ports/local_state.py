@@ -0,0 +1,17 @@
+from typing import Dict, Optional
+
+
+class LocalStatePort:
+    """
+    Cheap, in-process knowledge used to validate before calling other services.
+    Every method returns None when nothing is known locally (the default).
+    """
+
+    def get_user(self, user_id: str) -> Optional[Dict]:
+        return None
+
+    def get_user_active_loans_count(self, user_id: str) -> Optional[int]:
+        return None
+
+    def get_book(self, book_id: str) -> Optional[Dict]:
+        return None
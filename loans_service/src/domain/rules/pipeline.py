@@ -0,0 +1,125 @@
+import asyncio
+import inspect
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from ...infrastructure.logging.json_logger import logger
+from ...infrastructure.metrics.registry import metrics
+from ...infrastructure.services import deadline
+
+# Cost tiers for data sources: everything local is fetched (and checked) before
+# anything that needs the network.
+LOCAL = 0
+REMOTE = 10
+
+RULE_BUCKETS_MS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)
+
+
+@dataclass(frozen=True)
+class Rule:
+    """A validation step: `check(ctx)` raises ValueError once all `needs` keys are in ctx"""
+    name: str
+    needs: Tuple[str, ...]
+    check: Callable[[Dict[str, Any]], None]
+    cost: int = 0
+    message: str = ""
+
+
+@dataclass(frozen=True)
+class Source:
+    """
+    Where a ctx key can come from. `fetch` may be sync or async and returns None
+    when it doesn't know the value, so the next (more expensive) source is tried.
+    """
+    key: str
+    fetch: Callable[[], Any]
+    cost: int = REMOTE
+
+
+class ValidationPipeline:
+    """
+    Runs rules as soon as their data is available, cheapest first.
+
+    Data is fetched tier by tier: all missing keys the cheapest remaining tier can
+    provide are fetched together (concurrently), then every rule whose inputs are
+    now present runs. The first failing rule short-circuits the rest, so local
+    rejections never pay for a network call.
+    """
+
+    def __init__(self, rules: Sequence[Rule], name: str = "validation"):
+        self.rules = sorted(rules, key=lambda r: r.cost)
+        self.name = name
+
+    async def run(self, ctx: Dict[str, Any], sources: Sequence[Source]) -> Dict[str, Any]:
+        pending = list(self.rules)
+        untried = sorted(sources, key=lambda s: s.cost)
+
+        while True:
+            for rule in [r for r in pending if all(k in ctx for k in r.needs)]:
+                self._check(rule, ctx)
+                pending.remove(rule)
+            if not pending:
+                return ctx
+
+            missing = {k for r in pending for k in r.needs if k not in ctx}
+            candidates = [s for s in untried if s.key in missing]
+            if not candidates:
+                raise LookupError(f"No source for {sorted(missing)}")
+
+            tier = candidates[0].cost
+            if tier > LOCAL:
+                deadline.check("remote validation")
+            batch = [s for s in candidates if s.cost == tier]
+            for source in batch:
+                untried.remove(source)
+
+            values = await self._fetch_all(batch)
+            for source, value in zip(batch, values):
+                if value is not None and source.key not in ctx:
+                    ctx[source.key] = value
+
+    def _check(self, rule: Rule, ctx: Dict[str, Any]) -> None:
+        start = time.perf_counter()
+        try:
+            rule.check(ctx)
+        except ValueError:
+            metrics.inc("loans_validation_rejections_total", pipeline=self.name, rule=rule.name)
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            metrics.observe("loans_validation_rule_ms", elapsed_ms,
+                            buckets=RULE_BUCKETS_MS, pipeline=self.name, rule=rule.name)
+        if rule.message:
+            logger.info(rule.message, extra={
+                **{k: ctx[k] for k in ("user_id", "book_id") if k in ctx},
+                "stage": f"rule:{rule.name}",
+                "duration_ms": round(elapsed_ms, 3),
+            })
+
+    async def _fetch_all(self, batch: List[Source]) -> List[Any]:
+        if len(batch) == 1:
+            return [await self._fetch(batch[0])]
+
+        tasks = [asyncio.ensure_future(self._fetch(s)) for s in batch]
+        done, running = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in running:
+            task.cancel()
+        errors = [t.exception() for t in tasks if t in done and t.exception() is not None]
+        if errors:
+            raise errors[0]
+        return [task.result() for task in tasks]
+
+    async def _fetch(self, source: Source) -> Any:
+        start = time.perf_counter()
+        value = source.fetch()
+        if inspect.isawaitable(value):
+            value = await value
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        tier = "local" if source.cost <= LOCAL else "remote"
+        metrics.observe("loans_validation_fetch_ms", elapsed_ms,
+                        buckets=RULE_BUCKETS_MS, pipeline=self.name, source=source.key, tier=tier)
+        if tier == "remote":
+            logger.info("Validation data fetched", extra={"stage": f"fetch:{source.key}",
+                                                          "duration_ms": round(elapsed_ms, 3)})
+        return value
@@ -1,4 +1,5 @@
 from datetime import timedelta
+from .pipeline import Rule
 
 MAX_ACTIVE_LOANS = 3
 MAX_DAYS = 15
@@ -17,4 +18,18 @@ def validate_user_loans_count(count: int):
 
 def validate_book_available(book_status: str):
     if book_status != "available":
-        raise ValueError("Book is not available")
\ No newline at end of file
+        raise ValueError("Book is not available")
+
+
+# Reglas de creación de préstamo en orden de prioridad del mensaje de error.
+# Los datos que necesita cada regla los resuelve ValidationPipeline (local primero, remoto después).
+CREATE_LOAN_RULES = [
+    Rule("max_days", ("days",), lambda ctx: validate_max_days(ctx["days"]),
+         cost=0, message="Max days validation passed"),
+    Rule("user_active", ("user",), lambda ctx: validate_user_active(ctx["user"]["status"]),
+         cost=1, message="User active validation passed"),
+    Rule("user_loans_count", ("active_loans",), lambda ctx: validate_user_loans_count(ctx["active_loans"]),
+         cost=2, message="User loans count validation passed"),
+    Rule("book_available", ("book",), lambda ctx: validate_book_available(ctx["book"]["status"]),
+         cost=3, message="Book availability validation passed"),
+]
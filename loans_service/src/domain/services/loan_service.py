@@ -1,25 +1,50 @@
 from datetime import timedelta
+from typing import List, Optional
 from ..ports.loans_repo import LoansPort
 from ..ports.users_repo import UsersPort
 from ..ports.books_repo import BooksPort
 from ..ports.clock import Clock
 from ..ports.uuid_gen import UUIDGen
-from ..rules.validators import (
-    validate_max_days,
-    validate_user_active,
-    validate_user_loans_count,
-    validate_book_available,
-)
+from ..ports.event_bus import EventBus
+from ..events.loan_events import LoanCreated, LoanReturned
+from ..ports.local_state import LocalStatePort
+from ..rules.validators import CREATE_LOAN_RULES
+from ..rules.pipeline import LOCAL, REMOTE, Source, ValidationPipeline
 from ...infrastructure.logging.json_logger import logger
+from ...infrastructure.services import deadline
 
 
 class LoanDomainService:
-    def __init__(self, users: UsersPort, books: BooksPort, loans: LoansPort, clock: Clock, uuidgen: UUIDGen):
+    def __init__(self, users: UsersPort, books: BooksPort, loans: LoansPort, clock: Clock, uuidgen: UUIDGen,
+                 events: EventBus = None, local: LocalStatePort = None):
         self.users = users
         self.books = books
         self.loans = loans
         self.clock = clock
         self.uuidgen = uuidgen
+        self.events = events
+        self.local = local or LocalStatePort()
+        self.create_pipeline = ValidationPipeline(CREATE_LOAN_RULES, name="create_loan")
+
+    def _create_sources(self, user_id: str, book_id: str):
+        # Local knowledge first; remote lookups only for what is still unknown
+        return [
+            Source("user", lambda: self.local.get_user(user_id), LOCAL),
+            Source("active_loans", lambda: self.local.get_user_active_loans_count(user_id), LOCAL),
+            Source("book", lambda: self.local.get_book(book_id), LOCAL),
+            Source("user", lambda: self.users.get_user(user_id), REMOTE),
+            Source("active_loans", lambda: self.users.get_user_active_loans_count(user_id), REMOTE),
+            Source("book", lambda: self.books.get_book(book_id), REMOTE),
+        ]
+
+    async def _emit(self, event) -> None:
+        # The loan is already persisted: a failing bus must not fail the request
+        if self.events is None:
+            return
+        try:
+            await self.events.publish(event)
+        except Exception as e:
+            logger.error("Failed to publish loan event", extra={"loan_id": event.loan_id, "error": str(e)})
 
     async def create_loan(self, user_id: str, book_id: str, days: int):
         logger.info("Creating loan", extra={
@@ -29,23 +54,10 @@ class LoanDomainService:
         })
         
         try:
-            validate_max_days(days)
-            logger.info("Max days validation passed", extra={"user_id": user_id, "book_id": book_id, "days": days})
-            
-            user = await self.users.get_user(user_id)
-            validate_user_active(user['status'])
-            logger.info("User active validation passed", extra={"user_id": user_id, "user_status": user['status']})
-            
-            count = await self.users.get_user_active_loans_count(user_id)
-            validate_user_loans_count(count)
-            logger.info("User loans count validation passed", extra={
-                "user_id": user_id,
-                "active_loans_count": count
-            })
-            
-            book = await self.books.get_book(book_id)
-            validate_book_available(book['status'])
-            logger.info("Book availability validation passed", extra={"book_id": book_id, "book_status": book['status']})
+            await self.create_pipeline.run(
+                {"user_id": user_id, "book_id": book_id, "days": days},
+                self._create_sources(user_id, book_id),
+            )
 
             loan_id = self.uuidgen.new()
             start = self.clock.today()
@@ -59,8 +71,12 @@ class LoanDomainService:
                 'due_date': due,
                 'status': 'active'
             }
-            await self.loans.save(loan)
-            await self.books.mark_loaned(book_id)
+            deadline.check("persisting loan")
+            with deadline.detached():
+                await self.loans.save(loan)
+                await self.books.mark_loaned(book_id)
+            await self._emit(LoanCreated(loan_id=loan_id, user_id=user_id, book_id=book_id,
+                                         start_date=start, due_date=due))
             
             logger.info("Loan created successfully", extra={
                 "user_id": user_id,
@@ -79,7 +95,8 @@ class LoanDomainService:
             })
             raise
 
-    async def return_loan(self, loan_id: str):
+    async def return_loan(self, loan_id: str, owner: Optional[str] = None):
+        """`owner`: when given, only that user's loan can be returned (PermissionError otherwise)"""
         logger.info("Returning loan", extra={"loan_id": loan_id})
         
         try:
@@ -87,6 +104,9 @@ class LoanDomainService:
             if not loan:
                 logger.warning("Loan not found", extra={"loan_id": loan_id})
                 raise ValueError("Loan not found")
+            if owner is not None and loan['user_id'] != owner:
+                logger.warning("Loan belongs to another user", extra={"loan_id": loan_id, "user_id": owner})
+                raise PermissionError("Loan belongs to another user")
             if loan['status'] != 'active':
                 logger.warning("Loan is not active", extra={
                     "loan_id": loan_id,
@@ -94,10 +114,14 @@ class LoanDomainService:
                 })
                 raise ValueError("Loan is not active")
             
+            deadline.check("persisting return")
             loan['status'] = 'returned'
             loan['return_date'] = self.clock.today()
-            await self.loans.save(loan)
-            await self.books.mark_available(loan['book_id'])
+            with deadline.detached():
+                await self.loans.save(loan)
+                await self.books.mark_returned(loan['book_id'])
+            await self._emit(LoanReturned(loan_id=loan_id, user_id=loan['user_id'], book_id=loan['book_id'],
+                                          return_date=loan['return_date']))
             
             logger.info("Loan returned successfully", extra={
                 "loan_id": loan_id,
@@ -113,4 +137,47 @@ class LoanDomainService:
                 "loan_id": loan_id,
                 "error": str(e)
             })
-            raise
\ No newline at end of file
+            raise
+
+    async def return_loans(self, loan_ids: List[str], owner: Optional[str] = None) -> List[dict]:
+        """
+        Return many loans at once: one bulk read, one bulk write and one batch of
+        book notifications. Returns a status entry per (unique) loan id; with `owner`,
+        other users' loans are reported as "forbidden" and left untouched.
+        """
+        loan_ids = list(dict.fromkeys(loan_ids))
+        logger.info("Returning loans in bulk", extra={"loans_count": len(loan_ids)})
+
+        found = await self.loans.get_many(loan_ids)
+        today = self.clock.today()
+        results = {}
+        returned = []
+        for loan_id in loan_ids:
+            loan = found.get(loan_id)
+            if not loan:
+                results[loan_id] = {"loan_id": loan_id, "status": "not_found", "detail": "Loan not found"}
+            elif owner is not None and loan['user_id'] != owner:
+                results[loan_id] = {"loan_id": loan_id, "status": "forbidden",
+                                    "detail": "Loan belongs to another user"}
+            elif loan['status'] != 'active':
+                results[loan_id] = {"loan_id": loan_id, "status": "not_active", "detail": "Loan is not active"}
+            else:
+                returned.append({**loan, 'status': 'returned', 'return_date': today})
+                results[loan_id] = {"loan_id": loan_id, "status": "returned"}
+
+        if returned:
+            deadline.check("persisting returns")
+            with deadline.detached():
+                await self.loans.save_many(returned)
+                failed_books = await self.books.mark_returned_many([l['book_id'] for l in returned])
+                for loan in returned:
+                    if loan['book_id'] in failed_books:
+                        results[loan['loan_id']]["detail"] = "Book status update failed"
+                    await self._emit(LoanReturned(loan_id=loan['loan_id'], user_id=loan['user_id'],
+                                                  book_id=loan['book_id'], return_date=today))
+
+        logger.info("Bulk loan return finished", extra={
+            "loans_count": len(loan_ids),
+            "returned_count": len(returned)
+        })
+        return [results[loan_id] for loan_id in loan_ids]
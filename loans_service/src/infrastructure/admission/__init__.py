@@ -0,0 +1 @@
+# Admission control package
\ No newline at end of file
@@ -0,0 +1,148 @@
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Deque, Optional
+
+from ..metrics.registry import metrics
+
+
+class Overloaded(Exception):
+    """Raised when a request cannot be admitted (queue full or queue wait expired)"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class GradientLimit:
+    """
+    Latency-based concurrency limit (Gradient2 style).
+
+    Tracks a fast and a slow EWMA of request latency. While the fast average stays
+    close to the long-term baseline the limit grows by roughly sqrt(limit); when latency
+    climbs the limit shrinks proportionally to the gradient long/short.
+    """
+
+    def __init__(self, initial: int = 20, min_limit: int = 4, max_limit: int = 200,
+                 tolerance: float = 1.5, smoothing: float = 0.2):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self._short_rtt: Optional[float] = None
+        self._long_rtt: Optional[float] = None
+
+    @property
+    def current(self) -> int:
+        return int(self.limit)
+
+    def on_sample(self, rtt: float, inflight: int) -> None:
+        if self._short_rtt is None:
+            self._short_rtt = self._long_rtt = rtt
+            return
+        self._short_rtt = self._short_rtt * 0.9 + rtt * 0.1
+        self._long_rtt = self._long_rtt * 0.99 + rtt * 0.01
+
+        # Don't grow the limit when the service isn't using it
+        if inflight < self.limit / 2:
+            return
+
+        gradient = max(0.5, min(1.0, self.tolerance * self._long_rtt / self._short_rtt))
+        new_limit = self.limit * gradient + math.sqrt(self.limit)
+        new_limit = self.limit * (1 - self.smoothing) + new_limit * self.smoothing
+        self.limit = max(self.min_limit, min(self.max_limit, new_limit))
+
+        # Let the baseline recover after a sustained latency shift
+        if self._long_rtt / self._short_rtt > 2:
+            self._long_rtt *= 0.95
+
+
+class AdmissionController:
+    """
+    Global concurrency limit with a bounded FIFO wait queue.
+
+    Requests over the adaptive limit wait in the queue for up to `queue_timeout`
+    seconds; when the queue is full they are rejected immediately.
+    """
+
+    def __init__(self, limit: GradientLimit, max_queue: int = 50, queue_timeout: float = 1.0):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.inflight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, timeout: Optional[float] = None) -> float:
+        """
+        Wait for a slot; returns the monotonic start time to pass to `release`.
+        `timeout` can only shorten the queue wait (e.g. to the request's remaining budget).
+        """
+        wait = self.queue_timeout if timeout is None else max(0.0, min(self.queue_timeout, timeout))
+        if self.inflight < self.limit.current and not self._waiters:
+            self.inflight += 1
+            self._publish()
+            return time.monotonic()
+
+        if len(self._waiters) >= self.max_queue:
+            metrics.inc("loans_admission_rejected_total", reason="queue_full")
+            raise Overloaded("queue_full", retry_after=self.queue_timeout)
+
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        self._publish()
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), timeout=wait)
+        except asyncio.TimeoutError:
+            if fut.done() and not fut.cancelled():
+                # Slot handed over right as the wait expired: give it back
+                self.inflight -= 1
+                self._wake()
+            else:
+                fut.cancel()
+                self._remove(fut)
+            metrics.inc("loans_admission_rejected_total", reason="queue_timeout")
+            self._publish()
+            raise Overloaded("queue_timeout", retry_after=self.queue_timeout)
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.inflight -= 1
+                self._wake()
+            else:
+                fut.cancel()
+                self._remove(fut)
+            self._publish()
+            raise
+        return time.monotonic()
+
+    def release(self, started: float) -> None:
+        rtt = time.monotonic() - started
+        self.limit.on_sample(rtt, self.inflight)
+        self.inflight -= 1
+        self._wake()
+        self._publish()
+
+    def _wake(self) -> None:
+        while self._waiters and self.inflight < self.limit.current:
+            fut = self._waiters.popleft()
+            if fut.done():
+                continue
+            self.inflight += 1
+            fut.set_result(None)
+
+    def _remove(self, fut: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(fut)
+        except ValueError:
+            pass
+
+    def _publish(self) -> None:
+        metrics.set_gauge("loans_admission_limit", self.limit.current)
+        metrics.set_gauge("loans_admission_inflight", self.inflight)
+        metrics.set_gauge("loans_admission_queue_depth", len(self._waiters))
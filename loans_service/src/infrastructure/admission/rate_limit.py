@@ -0,0 +1,37 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Tuple
+
+
+class TokenBucketLimiter:
+    """
+    Per-key token buckets (one per user), refilled lazily on access.
+
+    Buckets live in a bounded LRU so an unbounded set of user ids can't grow
+    memory without limit; an evicted bucket simply starts full again.
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 10000,
+                 now: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._now = now
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def try_acquire(self, key: str) -> Tuple[bool, float]:
+        """Take one token for `key`. Returns (allowed, seconds until a token is available)"""
+        now = self._now()
+        tokens, last = self._buckets.pop(key, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+
+        if tokens >= 1:
+            allowed, wait = True, 0.0
+            tokens -= 1
+        else:
+            allowed, wait = False, (1 - tokens) / self.rate
+
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return allowed, wait
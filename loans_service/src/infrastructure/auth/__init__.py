@@ -0,0 +1 @@
+# Auth package
\ No newline at end of file
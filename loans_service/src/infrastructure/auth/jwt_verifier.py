@@ -0,0 +1,162 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+import jwt
+
+from ..logging.json_logger import logger
+from ..metrics.registry import metrics
+
+
+class InvalidToken(Exception):
+    pass
+
+
+class KeysUnavailable(Exception):
+    """No verification keys yet and the key source can't be reached"""
+
+
+class StaticKeyProvider:
+    """
+    Shared HMAC keys (SimpleJWT's HS256 SIGNING_KEY). The first key is current;
+    the rest are previous keys still accepted while old tokens expire (rotation).
+    """
+
+    def __init__(self, keys: List[str]):
+        self.keys = [k for k in keys if k]
+
+    async def candidates(self, kid: Optional[str]) -> List:
+        return self.keys
+
+
+class JWKSKeyProvider:
+    """
+    Public keys from a JWKS endpoint (RS256/ES256), cached in memory for `ttl` seconds.
+    An unknown `kid` triggers a refresh, at most once per `min_refresh` seconds.
+
+    A failed refresh keeps serving the keys already fetched and is not retried for
+    `min_refresh` seconds; only with no keys at all does it raise KeysUnavailable.
+    """
+
+    def __init__(self, url: str, ttl: float = 300.0, min_refresh: float = 30.0,
+                 fetch: Optional[Callable[[str], Awaitable[Dict]]] = None, now: Callable[[], float] = time.monotonic):
+        self.url = url
+        self.ttl = ttl
+        self.min_refresh = min_refresh
+        self._fetch = fetch or self._http_fetch
+        self._now = now
+        self._keys: Dict[str, object] = {}
+        self._fetched_at: Optional[float] = None
+        self._failed_at: Optional[float] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    @staticmethod
+    async def _http_fetch(url: str) -> Dict:
+        async with httpx.AsyncClient(timeout=3.0) as client:
+            r = await client.get(url)
+            r.raise_for_status()
+            return r.json()
+
+    async def _refresh(self) -> None:
+        data = await self._fetch(self.url)
+        self._keys = {
+            jwk.get("kid", ""): jwt.PyJWK.from_json(json.dumps(jwk)).key
+            for jwk in data.get("keys", [])
+        }
+        self._fetched_at = self._now()
+        metrics.inc("loans_jwt_jwks_refresh_total")
+        logger.info("JWKS keys refreshed", extra={"url": self.url})
+
+    def _needs_refresh(self, kid: Optional[str]) -> bool:
+        now = self._now()
+        if self._failed_at is not None and now - self._failed_at < self.min_refresh:
+            return False
+        if self._fetched_at is None or now - self._fetched_at > self.ttl:
+            return True
+        return kid is not None and kid not in self._keys and now - self._fetched_at > self.min_refresh
+
+    async def candidates(self, kid: Optional[str]) -> List:
+        if self._needs_refresh(kid):
+            if self._lock is None:
+                self._lock = asyncio.Lock()
+            async with self._lock:
+                # Concurrent requests wait for a single refresh
+                if self._needs_refresh(kid):
+                    try:
+                        await self._refresh()
+                        self._failed_at = None
+                    except Exception as e:
+                        self._failed_at = self._now()
+                        metrics.inc("loans_jwt_jwks_refresh_failures_total")
+                        logger.error("JWKS refresh failed", extra={"url": self.url, "error": str(e)})
+        if self._fetched_at is None:
+            raise KeysUnavailable(f"No keys from {self.url}")
+        if kid is not None:
+            return [self._keys[kid]] if kid in self._keys else []
+        return list(self._keys.values())
+
+
+class JWTVerifier:
+    """
+    Verifies SimpleJWT access tokens locally (no call to auth-service).
+
+    Successfully verified claims are kept in an LRU keyed by the SHA-256 of the token,
+    so repeated requests with the same token skip the signature check until `exp`.
+    """
+
+    def __init__(self, keys, algorithms: List[str], leeway: float = 0, cache_size: int = 10000,
+                 token_type: str = "access", now: Callable[[], float] = time.time):
+        self.keys = keys
+        self.algorithms = algorithms
+        self.leeway = leeway
+        self.cache_size = cache_size
+        self.token_type = token_type
+        self._now = now
+        self._cache: "OrderedDict[bytes, Dict]" = OrderedDict()
+
+    async def verify(self, token: str) -> Dict:
+        digest = hashlib.sha256(token.encode()).digest()
+        claims = self._cache.get(digest)
+        if claims is not None:
+            if claims.get("exp", 0) + self.leeway > self._now():
+                self._cache.move_to_end(digest)
+                metrics.inc("loans_jwt_verify_total", result="cache_hit")
+                return claims
+            del self._cache[digest]
+
+        claims = await self._decode(token)
+        self._cache[digest] = claims
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        metrics.inc("loans_jwt_verify_total", result="verified")
+        return claims
+
+    async def _decode(self, token: str) -> Dict:
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.PyJWTError as e:
+            metrics.inc("loans_jwt_verify_total", result="invalid")
+            raise InvalidToken(str(e)) from e
+
+        last_error: Optional[Exception] = None
+        for key in await self.keys.candidates(header.get("kid")):
+            try:
+                claims = jwt.decode(token, key, algorithms=self.algorithms, leeway=self.leeway,
+                                    options={"require": ["exp"]})
+            except jwt.InvalidSignatureError as e:
+                last_error = e
+                continue
+            except jwt.PyJWTError as e:
+                metrics.inc("loans_jwt_verify_total", result="invalid")
+                raise InvalidToken(str(e)) from e
+            if claims.get("token_type", self.token_type) != self.token_type:
+                metrics.inc("loans_jwt_verify_total", result="invalid")
+                raise InvalidToken("Token has wrong type")
+            return claims
+
+        metrics.inc("loans_jwt_verify_total", result="invalid")
+        raise InvalidToken(str(last_error) if last_error else "No key to verify token")
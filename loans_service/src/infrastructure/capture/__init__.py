@@ -0,0 +1 @@
+# Traffic capture package
\ No newline at end of file
@@ -0,0 +1,80 @@
+import asyncio
+import json
+from collections import deque
+from typing import Deque, Dict, Iterator, Optional
+
+from ..logging.json_logger import logger
+from ..metrics.registry import metrics
+
+
+class JSONLCaptureWriter:
+    """
+    Appends captured request/response records to a JSON Lines file.
+
+    Records are buffered in memory and written in batches by a background task
+    (the file write runs in a thread), so the request path never waits on disk.
+    When the buffer is full new records are dropped and counted.
+    """
+
+    def __init__(self, path: str, max_pending: int = 10000, flush_interval: float = 1.0):
+        self.path = path
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self._pending: Deque[str] = deque()
+        self._task: Optional[asyncio.Task] = None
+
+    def write(self, record: Dict) -> None:
+        if len(self._pending) >= self.max_pending:
+            metrics.inc("loans_capture_dropped_total")
+            return
+        self._pending.append(json.dumps(record, separators=(",", ":")) + "\n")
+        metrics.inc("loans_capture_records_total")
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+        lines = []
+        while self._pending:
+            lines.append(self._pending.popleft())
+        await asyncio.to_thread(self._append, lines)
+
+    def _append(self, lines) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(lines)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except OSError as e:
+                logger.error("Traffic capture write failed", extra={"error": str(e)})
+
+
+def read_records(path: str) -> Iterator[Dict]:
+    """Records from a capture file; blank and malformed lines are skipped"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and "method" in record and "path" in record:
+                yield record
@@ -0,0 +1,89 @@
+import asyncio
+from typing import Awaitable, Callable, List, Optional
+
+from ..logging.json_logger import logger
+from ..metrics.registry import metrics
+
+BatchSink = Callable[[List[object]], Awaitable[None]]
+
+
+class BatchingPublisher:
+    """
+    Buffers published events and hands them to `sink` in batches.
+
+    A batch is flushed when it reaches `max_batch` events or `linger` seconds after
+    its first event. The buffer is bounded: once `max_pending` events are waiting,
+    `publish` blocks until the flusher catches up (back-pressure on producers).
+    """
+
+    def __init__(self, sink: BatchSink, max_batch: int = 100, linger: float = 0.01,
+                 max_pending: int = 10000, name: str = "events"):
+        self.sink = sink
+        self.max_batch = max_batch
+        self.linger = linger
+        self.name = name
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    async def publish(self, event: object) -> None:
+        await self._queue.put(event)
+        metrics.set_gauge("loans_events_pending", self._queue.qsize(), bus=self.name)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flusher after draining everything already published"""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.linger
+            while len(batch) < self.max_batch:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[object]) -> None:
+        try:
+            for attempt in range(3):
+                try:
+                    await self.sink(batch)
+                    metrics.inc("loans_events_published_total", len(batch), bus=self.name)
+                    metrics.observe("loans_events_batch_size", len(batch),
+                                    buckets=(1, 5, 10, 50, 100, 500, 1000), bus=self.name)
+                    return
+                except Exception as e:
+                    logger.warning("Event batch publish failed", extra={"attempt": attempt + 1, "error": str(e)})
+                    if attempt >= 2:
+                        metrics.inc("loans_events_dropped_total", len(batch), bus=self.name)
+                        logger.error("Event batch dropped after all retries", extra={"error": str(e)})
+                        return
+                    await asyncio.sleep(0.2)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+            metrics.set_gauge("loans_events_pending", self._queue.qsize(), bus=self.name)
@@ -0,0 +1,107 @@
+import asyncio
+from typing import Dict, List, Optional
+
+from ...domain.ports.event_bus import EventBus, EventHandler
+from ..logging.json_logger import logger
+from ..metrics.registry import metrics
+from .batching import BatchingPublisher
+
+
+class InProcessEventBus(EventBus):
+    """
+    Event bus backed by an in-memory append-only log.
+
+    Every consumer has its own offset into the log and receives events in batches of
+    up to `consumer_batch`. The log is trimmed up to the slowest consumer (events
+    published with no consumer subscribed are dropped right away); when more
+    than `max_retained` events are waiting for a lagging consumer, the flusher stops
+    appending, so the bounded publish buffer fills up and producers block.
+    """
+
+    def __init__(self, max_batch: int = 100, linger: float = 0.01, max_pending: int = 10000,
+                 max_retained: int = 100000, consumer_batch: int = 100):
+        self.publisher = BatchingPublisher(self._append, max_batch=max_batch, linger=linger,
+                                           max_pending=max_pending, name="memory")
+        self.max_retained = max_retained
+        self.consumer_batch = consumer_batch
+        self._log: List[object] = []
+        self._base = 0  # absolute offset of self._log[0]
+        self._offsets: Dict[str, int] = {}
+        self._handlers: Dict[str, EventHandler] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._changed: Optional[asyncio.Condition] = None
+
+    @property
+    def end_offset(self) -> int:
+        return self._base + len(self._log)
+
+    def offset(self, consumer: str) -> int:
+        return self._offsets[consumer]
+
+    async def publish(self, event: object) -> None:
+        await self.publisher.publish(event)
+
+    def subscribe(self, consumer: str, handler: EventHandler, broadcast: bool = False) -> None:
+        # New consumers only see events published after they subscribe. The log is per
+        # process, so a broadcast subscription is just a regular one.
+        self._offsets.setdefault(consumer, self.end_offset)
+        self._handlers[consumer] = handler
+        if self._changed is not None and consumer not in self._tasks:
+            self._tasks[consumer] = asyncio.create_task(self._consume(consumer))
+
+    async def start(self) -> None:
+        self._changed = asyncio.Condition()
+        self.publisher.start()
+        for consumer in self._handlers:
+            if consumer not in self._tasks:
+                self._tasks[consumer] = asyncio.create_task(self._consume(consumer))
+
+    async def stop(self) -> None:
+        await self.publisher.stop()
+        for task in self._tasks.values():
+            task.cancel()
+        for task in self._tasks.values():
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks.clear()
+
+    async def _append(self, batch: List[object]) -> None:
+        async with self._changed:
+            await self._changed.wait_for(lambda: self._lag() + len(batch) <= self.max_retained)
+            self._log.extend(batch)
+            # Without consumers nothing would ever advance an offset and trim the log
+            self._trim()
+            self._changed.notify_all()
+
+    def _lag(self) -> int:
+        if not self._offsets:
+            return 0
+        return self.end_offset - min(self._offsets.values())
+
+    def _trim(self) -> None:
+        low = min(self._offsets.values()) if self._offsets else self.end_offset
+        if low > self._base:
+            del self._log[:low - self._base]
+            self._base = low
+
+    async def _consume(self, consumer: str) -> None:
+        handler = self._handlers[consumer]
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: self._offsets[consumer] < self.end_offset)
+                start = self._offsets[consumer] - self._base
+                batch = self._log[start:start + self.consumer_batch]
+            try:
+                await handler(batch)
+            except Exception as e:
+                # At-least-once: the offset isn't advanced, the batch is retried
+                logger.error("Event consumer failed", extra={"error": str(e)})
+                await asyncio.sleep(0.2)
+                continue
+            async with self._changed:
+                self._offsets[consumer] += len(batch)
+                self._trim()
+                self._changed.notify_all()
+            metrics.set_gauge("loans_events_consumer_lag", self.end_offset - self._offsets[consumer], consumer=consumer)
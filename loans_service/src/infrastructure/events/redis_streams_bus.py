@@ -0,0 +1,182 @@
+import asyncio
+import json
+import os
+import socket
+from typing import Dict, List, Optional, Set
+
+from ...domain.events.loan_events import event_from_dict, event_to_dict
+from ...domain.ports.event_bus import EventBus, EventHandler
+from ..logging.json_logger import logger
+from ..metrics.registry import metrics
+from .batching import BatchingPublisher
+
+
+class RedisStreamsEventBus(EventBus):
+    """
+    Event bus on a Redis Stream.
+
+    Batches are written with one pipelined round trip of XADDs. Each consumer name is
+    a Redis consumer group, so offsets are tracked (and survive restarts) in Redis;
+    events are acknowledged with XACK after the handler succeeds.
+
+    Broadcast subscriptions (per-process caches and indexes) read with plain XREAD
+    from the end of the stream: no group is created, so nothing is left behind in
+    Redis when the process exits, and every process sees every event.
+    """
+
+    def __init__(self, url: str, stream: str = "loans.events", maxlen: int = 100000,
+                 max_batch: int = 100, linger: float = 0.01, max_pending: int = 10000,
+                 consumer_batch: int = 100, block_ms: int = 1000):
+        try:
+            import redis.asyncio as aioredis
+        except ImportError as exc:
+            raise ImportError("RedisStreamsEventBus requires the 'redis' package") from exc
+
+        self.redis = aioredis.from_url(url)
+        self.stream = stream
+        self.maxlen = maxlen
+        self.consumer_batch = consumer_batch
+        self.block_ms = block_ms
+        self.instance = f"{socket.gethostname()}-{os.getpid()}"
+        self.publisher = BatchingPublisher(self._xadd_batch, max_batch=max_batch, linger=linger,
+                                           max_pending=max_pending, name="redis")
+        self._handlers: Dict[str, EventHandler] = {}
+        self._broadcast: Set[str] = set()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._started = False
+
+    async def publish(self, event: object) -> None:
+        await self.publisher.publish(event)
+
+    def subscribe(self, consumer: str, handler: EventHandler, broadcast: bool = False) -> None:
+        self._handlers[consumer] = handler
+        if broadcast:
+            self._broadcast.add(consumer)
+        if self._started and consumer not in self._tasks:
+            self._tasks[consumer] = asyncio.create_task(self._consume(consumer))
+
+    async def start(self) -> None:
+        self._started = True
+        self.publisher.start()
+        for consumer in self._handlers:
+            if consumer not in self._tasks:
+                self._tasks[consumer] = asyncio.create_task(self._consume(consumer))
+
+    async def stop(self) -> None:
+        await self.publisher.stop()
+        for task in self._tasks.values():
+            task.cancel()
+        for task in self._tasks.values():
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks.clear()
+        self._started = False
+        await self.redis.aclose()
+
+    async def _xadd_batch(self, batch: List[object]) -> None:
+        pipe = self.redis.pipeline(transaction=False)
+        for event in batch:
+            pipe.xadd(self.stream, {"data": json.dumps(event_to_dict(event))},
+                      maxlen=self.maxlen, approximate=True)
+        await pipe.execute()
+
+    async def _ensure_group(self, consumer: str) -> None:
+        try:
+            await self.redis.xgroup_create(self.stream, consumer, id="$", mkstream=True)
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    @staticmethod
+    def _decode(entries, consumer: str) -> List[object]:
+        """
+        Events in `entries`. Entries that can't be decoded (trimmed by MAXLEN while pending,
+        which come back with no fields, or a malformed payload) are logged and skipped:
+        they are still acknowledged, so they can't block the consumer.
+        """
+        events = []
+        for entry_id, fields in entries:
+            try:
+                event = event_from_dict(json.loads(fields[b"data"]))
+            except Exception as e:
+                logger.error("Undecodable event skipped", extra={
+                    "consumer": consumer, "entry_id": entry_id, "error": repr(e)})
+                metrics.inc("loans_events_undecodable_total", consumer=consumer)
+                continue
+            if event is not None:
+                events.append(event)
+        return events
+
+    async def _consume(self, consumer: str) -> None:
+        if consumer in self._broadcast:
+            await self._consume_broadcast(consumer)
+            return
+        handler = self._handlers[consumer]
+        await self._ensure_group(consumer)
+        # Start with our own pending (delivered but unacknowledged) entries, then new ones
+        last_id: Optional[str] = "0"
+        while True:
+            try:
+                response = await self.redis.xreadgroup(
+                    consumer, self.instance, {self.stream: last_id or ">"},
+                    count=self.consumer_batch, block=self.block_ms,
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Event stream read failed", extra={"error": str(e)})
+                await asyncio.sleep(1)
+                continue
+
+            entries = response[0][1] if response else []
+            if not entries:
+                last_id = None
+                continue
+
+            ids = [entry_id for entry_id, _ in entries]
+            events = self._decode(entries, consumer)
+            try:
+                await handler(events)
+            except Exception as e:
+                logger.error("Event consumer failed", extra={"error": str(e)})
+                last_id = "0"  # redeliver our pending entries
+                await asyncio.sleep(0.2)
+                continue
+
+            await self.redis.xack(self.stream, consumer, *ids)
+            metrics.inc("loans_events_consumed_total", len(ids), consumer=consumer)
+
+    async def _consume_broadcast(self, consumer: str) -> None:
+        handler = self._handlers[consumer]
+        # Only events published from now on; the position lives in this process
+        last_id: Optional[str] = None
+        while True:
+            try:
+                if last_id is None:
+                    newest = await self.redis.xrevrange(self.stream, count=1)
+                    last_id = newest[0][0] if newest else "0-0"
+                response = await self.redis.xread({self.stream: last_id}, count=self.consumer_batch,
+                                                  block=self.block_ms)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Event stream read failed", extra={"error": str(e)})
+                await asyncio.sleep(1)
+                continue
+
+            entries = response[0][1] if response else []
+            if not entries:
+                continue
+
+            events = self._decode(entries, consumer)
+            try:
+                await handler(events)
+            except Exception as e:
+                logger.error("Event consumer failed", extra={"error": str(e)})
+                await asyncio.sleep(0.2)  # same position: the batch is read again
+                continue
+
+            last_id = entries[-1][0]
+            metrics.inc("loans_events_consumed_total", len(entries), consumer=consumer)
@@ -1,14 +1,19 @@
 import httpx
 import asyncio
 import time
+from typing import Optional
 from ...domain.ports.books_repo import BooksPort
 from ..logging.json_logger import logger
+from ..services import deadline
 
 
 class BooksHTTP(BooksPort):
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, bulk_concurrency: int = 20,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
         self.base_url = base_url.rstrip("/")
-        self.client = httpx.AsyncClient(timeout=3.0)
+        self.bulk_concurrency = bulk_concurrency
+        self.timeout = 3.0
+        self.client = httpx.AsyncClient(timeout=self.timeout, transport=transport)
 
     async def _get(self, path: str):
         url = f"{self.base_url}{path}"
@@ -21,7 +26,12 @@ class BooksHTTP(BooksPort):
                     "attempt": attempt + 1
                 })
                 
-                r = await self.client.get(url)
+                # httpx timeouts are per phase; wait_for bounds the whole call
+                timeout = deadline.timeout_for(self.timeout)
+                r = await asyncio.wait_for(
+                    self.client.get(url, timeout=timeout, headers=deadline.outgoing_headers()),
+                    timeout,
+                )
                 duration_ms = int((time.time() - start_time) * 1000)
                 
                 r.raise_for_status()
@@ -35,8 +45,16 @@ class BooksHTTP(BooksPort):
                 })
                 
                 return r.json()
-            except (httpx.RequestError, httpx.HTTPStatusError) as e:
+            except (httpx.RequestError, httpx.HTTPStatusError, asyncio.TimeoutError) as e:
                 duration_ms = int((time.time() - start_time) * 1000)
+                if deadline.expired():
+                    logger.warning("HTTP request abandoned: deadline exceeded", extra={
+                        "http_method": "GET",
+                        "url": url,
+                        "duration_ms": duration_ms,
+                        "attempt": attempt + 1
+                    })
+                    raise deadline.DeadlineExceeded("Deadline exceeded") from e
                 
                 logger.warning("HTTP request failed", extra={
                     "http_method": "GET",
@@ -47,27 +65,72 @@ class BooksHTTP(BooksPort):
                     "error": str(e)
                 })
                 
-                if attempt >= 2:
+                if attempt >= 2 or not deadline.can_retry(0.2):
                     logger.error("HTTP request failed after all retries", extra={
                         "http_method": "GET",
                         "url": url,
-                        "total_attempts": 3,
+                        "total_attempts": attempt + 1,
                         "error": str(e)
                     })
                     raise
                 await asyncio.sleep(0.2)
 
     async def _post_no_content(self, path: str):
+        url = f"{self.base_url}{path}"
         for attempt in range(3):
+            start_time = time.time()
             try:
-                r = await self.client.post(f"{self.base_url}{path}")
+                logger.info("HTTP request started", extra={
+                    "http_method": "POST",
+                    "url": url,
+                    "attempt": attempt + 1
+                })
+
+                timeout = deadline.timeout_for(self.timeout)
+                r = await asyncio.wait_for(
+                    self.client.post(url, timeout=timeout, headers=deadline.outgoing_headers()),
+                    timeout,
+                )
+                duration_ms = int((time.time() - start_time) * 1000)
                 r.raise_for_status()
                 if r.status_code != 204:
                     raise httpx.HTTPStatusError("Expected 204", request=r.request, response=r)
+
+                logger.info("HTTP request successful", extra={
+                    "http_method": "POST",
+                    "url": url,
+                    "http_status": r.status_code,
+                    "duration_ms": duration_ms,
+                    "attempt": attempt + 1
+                })
                 return
-            except (httpx.RequestError, httpx.HTTPStatusError) as e:
-                logger.warning("books_http error attempt=%s %s", attempt, str(e))
-                if attempt >= 2:
+            except (httpx.RequestError, httpx.HTTPStatusError, asyncio.TimeoutError) as e:
+                duration_ms = int((time.time() - start_time) * 1000)
+                if deadline.expired():
+                    logger.warning("HTTP request abandoned: deadline exceeded", extra={
+                        "http_method": "POST",
+                        "url": url,
+                        "duration_ms": duration_ms,
+                        "attempt": attempt + 1
+                    })
+                    raise deadline.DeadlineExceeded("Deadline exceeded") from e
+
+                logger.warning("HTTP request failed", extra={
+                    "http_method": "POST",
+                    "url": url,
+                    "http_status": getattr(e.response, 'status_code', None) if hasattr(e, 'response') else None,
+                    "duration_ms": duration_ms,
+                    "attempt": attempt + 1,
+                    "error": str(e)
+                })
+
+                if attempt >= 2 or not deadline.can_retry(0.2):
+                    logger.error("HTTP request failed after all retries", extra={
+                        "http_method": "POST",
+                        "url": url,
+                        "total_attempts": attempt + 1,
+                        "error": str(e)
+                    })
                     raise
                 await asyncio.sleep(0.2)
 
@@ -81,4 +144,24 @@ class BooksHTTP(BooksPort):
         await self._post_no_content(f"/api/books/{book_id}/loaned")
 
     async def mark_returned(self, book_id: str) -> None:
-        await self._post_no_content(f"/api/books/{book_id}/returned")
\ No newline at end of file
+        await self._post_no_content(f"/api/books/{book_id}/returned")
+
+    async def mark_returned_many(self, book_ids):
+        # El servicio de libros no tiene endpoint masivo: se envían en paralelo con concurrencia acotada
+        semaphore = asyncio.Semaphore(self.bulk_concurrency)
+        failed = set()
+
+        async def notify(book_id):
+            async with semaphore:
+                try:
+                    await self.mark_returned(book_id)
+                except Exception as e:
+                    failed.add(book_id)
+                    logger.error("Bulk book return notification failed", extra={"book_id": book_id, "error": str(e)})
+
+        await asyncio.gather(*(notify(book_id) for book_id in dict.fromkeys(book_ids)))
+        logger.info("Bulk book return notifications sent", extra={
+            "books_count": len(book_ids),
+            "failed_count": len(failed)
+        })
+        return failed
@@ -1,14 +1,21 @@
 import httpx
 import asyncio
 import time
+from typing import Optional
 from ...domain.ports.users_repo import UsersPort
 from ..logging.json_logger import logger
+from ..services import deadline
 
 
 class UsersHTTP(UsersPort):
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, internal_token: Optional[str] = None,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
         self.base_url = base_url.rstrip("/")
-        self.client = httpx.AsyncClient(timeout=3.0)
+        self.timeout = 3.0
+        # auth-service solo expone /api/users/{id} a otros servicios con este token
+        headers = {"X-Internal-Token": internal_token} if internal_token else {}
+        # transport: p. ej. FakeUpstream.transport() para tests y benchmarks sin red
+        self.client = httpx.AsyncClient(timeout=self.timeout, headers=headers, transport=transport)
 
     async def _get(self, path: str):
         url = f"{self.base_url}{path}"
@@ -21,7 +28,12 @@ class UsersHTTP(UsersPort):
                     "attempt": attempt + 1
                 })
                 
-                r = await self.client.get(url)
+                # httpx timeouts are per phase; wait_for bounds the whole call
+                timeout = deadline.timeout_for(self.timeout)
+                r = await asyncio.wait_for(
+                    self.client.get(url, timeout=timeout, headers=deadline.outgoing_headers()),
+                    timeout,
+                )
                 duration_ms = int((time.time() - start_time) * 1000)
                 
                 r.raise_for_status()
@@ -35,8 +47,16 @@ class UsersHTTP(UsersPort):
                 })
                 
                 return r.json()
-            except (httpx.RequestError, httpx.HTTPStatusError) as e:
+            except (httpx.RequestError, httpx.HTTPStatusError, asyncio.TimeoutError) as e:
                 duration_ms = int((time.time() - start_time) * 1000)
+                if deadline.expired():
+                    logger.warning("HTTP request abandoned: deadline exceeded", extra={
+                        "http_method": "GET",
+                        "url": url,
+                        "duration_ms": duration_ms,
+                        "attempt": attempt + 1
+                    })
+                    raise deadline.DeadlineExceeded("Deadline exceeded") from e
                 
                 logger.warning("HTTP request failed", extra={
                     "http_method": "GET",
@@ -47,11 +67,11 @@ class UsersHTTP(UsersPort):
                     "error": str(e)
                 })
                 
-                if attempt >= 2:
+                if attempt >= 2 or not deadline.can_retry(0.2):
                     logger.error("HTTP request failed after all retries", extra={
                         "http_method": "GET",
                         "url": url,
-                        "total_attempts": 3,
+                        "total_attempts": attempt + 1,
                         "error": str(e)
                     })
                     raise
@@ -1,8 +1,29 @@
 import logging
 import sys
 import json
+from contextvars import ContextVar
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, Optional
+
+# Id of the HTTP request being served; set by RequestContextMiddleware, added to every record
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+# Attributes every LogRecord has; anything else on a record came from `extra`
+_RECORD_ATTRS = frozenset(logging.LogRecord("", 0, "", 0, "", None, None).__dict__) | {"message", "asctime", "request_id"}
+
+
+def set_request_id(request_id: str):
+    """Tag log records of the current context; returns a token for `reset_request_id`"""
+    return _request_id.set(request_id)
+
+
+def reset_request_id(token) -> None:
+    _request_id.reset(token)
+
+
+def get_request_id() -> Optional[str]:
+    return _request_id.get()
 
 
 class JSONFormatter(logging.Formatter):
@@ -19,29 +40,21 @@ class JSONFormatter(logging.Formatter):
             "line": record.lineno,
         }
         
-        # Add extra fields if present
-        if hasattr(record, 'user_id'):
-            data["user_id"] = record.user_id
-        if hasattr(record, 'book_id'):
-            data["book_id"] = record.book_id
-        if hasattr(record, 'loan_id'):
-            data["loan_id"] = record.loan_id
-        if hasattr(record, 'duration_ms'):
-            data["duration_ms"] = record.duration_ms
-        if hasattr(record, 'http_status'):
-            data["http_status"] = record.http_status
-        if hasattr(record, 'http_method'):
-            data["http_method"] = record.http_method
-        if hasattr(record, 'url'):
-            data["url"] = record.url
-        if hasattr(record, 'attempt'):
-            data["attempt"] = record.attempt
-            
+        # Records logged outside the request's context (e.g. from a thread) pass it explicitly
+        request_id = getattr(record, 'request_id', None) or _request_id.get()
+        if request_id is not None:
+            data["request_id"] = request_id
+
+        # Add extra fields (logger.info(..., extra={...})) if present
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and key not in data:
+                data[key] = value
+
         # Add exception info if present
         if record.exc_info:
             data["exception"] = self.formatException(record.exc_info)
             
-        return json.dumps(data, ensure_ascii=False)
+        return json.dumps(data, ensure_ascii=False, default=str)
 
 
 def setup_json_logging(logger_name: str = "loans", level: int = logging.INFO) -> logging.Logger:
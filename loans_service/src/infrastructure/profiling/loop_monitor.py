@@ -0,0 +1,120 @@
+import asyncio
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+from ..logging.json_logger import logger
+from ..metrics.registry import metrics
+from .profiler import thread_stack
+
+LAG_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+# Request id of each task serving a request. The watchdog thread can't read the
+# loop's contextvars, so RequestContextMiddleware also registers it here.
+_task_requests: Dict[asyncio.Task, str] = {}
+
+
+def bind_request(request_id: str) -> Optional[asyncio.Task]:
+    """Attribute loop blocks in the current task to `request_id`; pass the result to `unbind_request`"""
+    task = asyncio.current_task()
+    if task is not None:
+        _task_requests[task] = request_id
+    return task
+
+
+def unbind_request(task: Optional[asyncio.Task]) -> None:
+    if task is not None:
+        _task_requests.pop(task, None)
+
+
+class LoopLagMonitor:
+    """
+    Measures event loop scheduling lag and reports callbacks that block the loop.
+
+    A ticker task sleeps `interval` seconds and records how late it wakes up
+    (loans_event_loop_lag_ms). A watchdog thread checks the ticker's heartbeat:
+    when the loop hasn't run it for `threshold` seconds past its deadline, the
+    watchdog captures the loop thread's stack and the request of the running task
+    while the blocking code is still on the stack. When the loop recovers, the
+    ticker logs one "Event loop blocked" record with the total lag, that stack and
+    request id, and counts loans_event_loop_blocked_total.
+    """
+
+    def __init__(self, interval: float = 0.1, threshold: float = 0.1):
+        self.interval = interval
+        self.threshold = threshold
+        self.max_lag = 0.0
+        self._heartbeat = time.monotonic()
+        self._blocked: Optional[Dict] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = self._loop.create_task(self._tick())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stop.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._watchdog.join()
+        self._watchdog = None
+
+    async def _tick(self) -> None:
+        while True:
+            started = time.monotonic()
+            self._heartbeat = started
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - started - self.interval)
+            self.max_lag = max(self.max_lag, lag)
+            metrics.observe("loans_event_loop_lag_ms", lag * 1000, buckets=LAG_BUCKETS_MS)
+            metrics.set_gauge("loans_event_loop_lag_max_ms", round(self.max_lag * 1000, 3))
+            blocked, self._blocked = self._blocked, None
+            if lag >= self.threshold:
+                self._report(lag, blocked)
+
+    def _report(self, lag: float, blocked: Optional[Dict]) -> None:
+        metrics.inc("loans_event_loop_blocked_total")
+        extra = {"duration_ms": round(lag * 1000, 3), "stage": "loop_block"}
+        if blocked is not None:
+            extra["stack"] = blocked["stack"]
+            if blocked["request_id"] is not None:
+                extra["request_id"] = blocked["request_id"]
+        logger.warning("Event loop blocked", extra=extra)
+
+    def _watch(self) -> None:
+        # Check a few times per threshold so the stack is caught early in the block
+        check_every = max(0.005, self.threshold / 4)
+        while not self._stop.wait(check_every):
+            beat = self._heartbeat
+            overdue = time.monotonic() - beat - self.interval
+            if overdue < self.threshold or (self._blocked is not None and self._blocked["since"] == beat):
+                continue
+            self._blocked = self.capture(beat)
+
+    def capture(self, since: float) -> Dict:
+        """Stack of the loop thread and request of the running task, read from outside the loop"""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        task = asyncio.current_task(self._loop)
+        return {
+            "since": since,
+            "stack": thread_stack(frame) if frame is not None else None,
+            "request_id": _task_requests.get(task) if task is not None else None,
+        }
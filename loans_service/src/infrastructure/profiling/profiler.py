@@ -0,0 +1,189 @@
+import asyncio
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional, Set
+
+from ..logging.json_logger import logger
+from ..metrics.registry import metrics
+
+MODES = ("cpu", "wall")
+
+
+class ProfilerBusy(Exception):
+    """Only one profiling session runs at a time"""
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def thread_stack(frame) -> str:
+    """Collapsed stack of `frame` and its callers, outermost first ("a;b;c")"""
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def _task_stack(task: asyncio.Task) -> Optional[str]:
+    """The await chain of a suspended task, outermost coroutine first"""
+    names = []
+    coro = task.get_coro()
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        names.append(_frame_name(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return ";".join(names) if names else None
+
+
+class StackSampler:
+    """
+    Samples the event loop from a background thread every `interval` seconds.
+
+    - mode "cpu": the loop thread's Python stack, i.e. where the loop is busy
+      (idle time shows up as the selector wait).
+    - mode "wall": the await chain of every pending task, i.e. where requests
+      spend their time, including while they wait on I/O.
+
+    Stacks are counted in collapsed format ("a;b;c count"), which flamegraph.pl,
+    speedscope and inferno read directly.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, loop_thread_id: int, mode: str = "cpu",
+                 interval: float = 0.005, exclude: Optional[Set[asyncio.Task]] = None):
+        self.loop = loop
+        self.loop_thread_id = loop_thread_id
+        self.mode = mode
+        self.interval = interval
+        self.exclude = exclude or set()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            if self.mode == "cpu":
+                frame = sys._current_frames().get(self.loop_thread_id)
+                if frame is not None:
+                    self.stacks[thread_stack(frame)] += 1
+                continue
+            try:
+                tasks = asyncio.all_tasks(self.loop)
+            except RuntimeError:
+                continue
+            for task in tasks:
+                if task in self.exclude:
+                    continue
+                stack = _task_stack(task)
+                if stack is not None:
+                    self.stacks[stack] += 1
+
+
+def render_collapsed(stacks: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def render_pstats(profile: cProfile.Profile, fmt: str = "text", limit: int = 60) -> bytes:
+    """`text`: top functions by cumulative time; `pstats`: binary dump for snakeviz / pstats.Stats"""
+    if fmt == "pstats":
+        profile.create_stats()
+        import marshal
+        return marshal.dumps(profile.stats)
+    out = io.StringIO()
+    pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(limit)
+    return out.getvalue().encode()
+
+
+class Profiler:
+    """
+    On-demand profiling of the running service. Idle cost is one attribute check per
+    request (`request_finished`); nothing is sampled or traced outside a session.
+    """
+
+    def __init__(self, max_seconds: float = 60.0):
+        self.max_seconds = max_seconds
+        self._busy = False
+        self._requests_left = 0
+        self._requests_done: Optional[asyncio.Event] = None
+
+    @property
+    def active(self) -> bool:
+        return self._busy
+
+    def _begin(self, kind: str) -> None:
+        if self._busy:
+            raise ProfilerBusy("A profiling session is already running")
+        self._busy = True
+        metrics.inc("loans_profile_sessions_total", kind=kind)
+
+    async def sample(self, seconds: float, mode: str = "cpu", interval: float = 0.005) -> Counter:
+        """Sample the event loop for `seconds`; returns collapsed stack counts"""
+        self._begin(f"sample_{mode}")
+        seconds = min(seconds, self.max_seconds)
+        try:
+            sampler = StackSampler(asyncio.get_running_loop(), threading.get_ident(), mode=mode,
+                                   interval=interval, exclude={asyncio.current_task()})
+            sampler.start()
+            started = time.monotonic()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                stacks = sampler.stop()
+            logger.info("Profile sampled", extra={"duration_ms": int((time.monotonic() - started) * 1000)})
+            return stacks
+        finally:
+            self._busy = False
+
+    async def trace(self, seconds: float = 0, requests: int = 0) -> cProfile.Profile:
+        """
+        Deterministic profile (cProfile) of the loop thread for `seconds`, or until
+        `requests` more requests have finished (capped at max_seconds).
+        """
+        self._begin("trace")
+        profile = cProfile.Profile()
+        try:
+            self._requests_left = requests
+            self._requests_done = asyncio.Event()
+            profile.enable()
+            try:
+                if requests > 0:
+                    try:
+                        await asyncio.wait_for(self._requests_done.wait(), seconds or self.max_seconds)
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    await asyncio.sleep(min(seconds, self.max_seconds))
+            finally:
+                profile.disable()
+            return profile
+        finally:
+            self._requests_left = 0
+            self._requests_done = None
+            self._busy = False
+
+    def request_finished(self) -> None:
+        if self._requests_left <= 0:
+            return
+        self._requests_left -= 1
+        if self._requests_left == 0 and self._requests_done is not None:
+            self._requests_done.set()
@@ -0,0 +1,199 @@
+import asyncio
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ...domain.ports.loans_repo import LoansPort
+from ...domain.ports.users_repo import UsersPort
+from ..logging.json_logger import logger
+from ..metrics.registry import metrics
+
+
+class ActiveLoanIndex:
+    """
+    Locally materialized active-loan counts per user.
+
+    Keyed by loan_id so every operation is idempotent: activating an already active
+    loan or returning an unknown one leaves the counts untouched.
+    """
+
+    def __init__(self):
+        self._user_by_loan: Dict[str, str] = {}
+        self._counts: Dict[str, int] = {}
+        self._journal: Optional[List[Tuple[str, str, Optional[str]]]] = None
+
+    def count(self, user_id: str) -> int:
+        return self._counts.get(user_id, 0)
+
+    def activate(self, loan_id: str, user_id: str) -> None:
+        if self._journal is not None:
+            self._journal.append(("activate", loan_id, user_id))
+        self._activate(loan_id, user_id)
+
+    def deactivate(self, loan_id: str) -> None:
+        if self._journal is not None:
+            self._journal.append(("deactivate", loan_id, None))
+        self._deactivate(loan_id)
+
+    def begin_rebuild(self) -> None:
+        """Start journaling writes so a rebuild from a repo snapshot doesn't lose them"""
+        self._journal = []
+
+    def abort_rebuild(self) -> None:
+        self._journal = None
+
+    def finish_rebuild(self, active: Iterable[Tuple[str, str]]) -> int:
+        """
+        Replace the index with `active` (loan_id, user_id) pairs, replay writes made
+        since `begin_rebuild` and return how many users had a drifted count.
+        """
+        journal, self._journal = self._journal or [], None
+        old_counts = self._counts
+
+        self._user_by_loan, self._counts = {}, {}
+        for loan_id, user_id in active:
+            self._activate(loan_id, user_id)
+        for op, loan_id, user_id in journal:
+            if op == "activate":
+                self._activate(loan_id, user_id)
+            else:
+                self._deactivate(loan_id)
+
+        users = set(old_counts) | set(self._counts)
+        return sum(1 for u in users if old_counts.get(u, 0) != self._counts.get(u, 0))
+
+    def _activate(self, loan_id: str, user_id: str) -> None:
+        if loan_id in self._user_by_loan:
+            return
+        self._user_by_loan[loan_id] = user_id
+        self._counts[user_id] = self._counts.get(user_id, 0) + 1
+
+    def _deactivate(self, loan_id: str) -> None:
+        user_id = self._user_by_loan.pop(loan_id, None)
+        if user_id is None:
+            return
+        remaining = self._counts[user_id] - 1
+        if remaining:
+            self._counts[user_id] = remaining
+        else:
+            del self._counts[user_id]
+
+
+class CountingLoansRepo(LoansPort):
+    """LoansPort decorator that keeps an ActiveLoanIndex in step with every write"""
+
+    def __init__(self, inner: LoansPort, index: ActiveLoanIndex):
+        self.inner = inner
+        self.index = index
+
+    async def save(self, loan: dict) -> None:
+        await self.inner.save(loan)
+        if loan['status'] == 'active':
+            self.index.activate(loan['loan_id'], loan['user_id'])
+        else:
+            self.index.deactivate(loan['loan_id'])
+
+    async def get(self, loan_id: str):
+        return await self.inner.get(loan_id)
+
+    async def mark_returned(self, loan_id: str) -> None:
+        await self.inner.mark_returned(loan_id)
+        self.index.deactivate(loan_id)
+
+    async def list_active(self):
+        return await self.inner.list_active()
+
+    async def list_ids(self):
+        return await self.inner.list_ids()
+
+    async def get_many(self, loan_ids):
+        return await self.inner.get_many(loan_ids)
+
+    async def save_many(self, loans) -> None:
+        await self.inner.save_many(loans)
+        for loan in loans:
+            if loan['status'] == 'active':
+                self.index.activate(loan['loan_id'], loan['user_id'])
+            else:
+                self.index.deactivate(loan['loan_id'])
+
+
+class UsersWithLocalLoanCounts(UsersPort):
+    """
+    UsersPort decorator: user lookups still go upstream, but the active-loan count
+    is answered from the local index. The loans service is the authoritative
+    source of loans, so no network call is needed for it.
+    """
+
+    def __init__(self, inner: UsersPort, index: ActiveLoanIndex):
+        self.inner = inner
+        self.index = index
+
+    async def get_user(self, user_id: str):
+        return await self.inner.get_user(user_id)
+
+    async def get_user_active_loans_count(self, user_id: str) -> int:
+        return self.index.count(user_id)
+
+
+class UsersWithRepoLoanCounts(UsersPort):
+    """
+    UsersPort decorator for a repository shared by several processes (LOANS_REPO=django):
+    the active-loan count is an indexed COUNT in the database, so writes made by
+    other workers or replicas are seen immediately. A per-process ActiveLoanIndex
+    would only learn about them at the next reconcile.
+    """
+
+    def __init__(self, inner: UsersPort, repo):
+        self.inner = inner
+        self.repo = repo
+
+    async def get_user(self, user_id: str):
+        return await self.inner.get_user(user_id)
+
+    async def get_user_active_loans_count(self, user_id: str) -> int:
+        return await self.repo.count_active(user_id)
+
+
+class ActiveLoansReconciler:
+    """Background job that periodically rebuilds the index from the repository"""
+
+    def __init__(self, repo: LoansPort, index: ActiveLoanIndex, interval: float = 60.0):
+        self.repo = repo
+        self.index = index
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def reconcile(self) -> int:
+        self.index.begin_rebuild()
+        try:
+            active = await self.repo.list_active()
+        except Exception:
+            self.index.abort_rebuild()
+            raise
+        drifted = self.index.finish_rebuild((l['loan_id'], l['user_id']) for l in active)
+
+        metrics.inc("loans_active_counts_reconciled_total")
+        metrics.set_gauge("loans_active_counts_drifted_users", drifted)
+        if drifted:
+            logger.warning("Active loan counts drift repaired", extra={"drifted_users": drifted})
+        return drifted
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.error("Active loan counts reconciliation failed", extra={"error": str(e)})
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,2 @@
+# App Django con el modelo de préstamos (LoanModel) y sus migraciones.
+# Solo se carga con LOANS_REPO=django; el resto del servicio no depende de Django.
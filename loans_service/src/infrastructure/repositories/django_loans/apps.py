@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class LoansConfig(AppConfig):
+    name = "src.infrastructure.repositories.django_loans"
+    label = "loans"
+    default_auto_field = "django.db.models.BigAutoField"
@@ -0,0 +1,29 @@
+# Generated by Django 5.0 on 2026-10-19 16:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoanModel',
+            fields=[
+                ('loan_id', models.CharField(max_length=36, primary_key=True, serialize=False)),
+                ('user_id', models.CharField(max_length=64)),
+                ('book_id', models.CharField(max_length=64)),
+                ('start_date', models.DateField()),
+                ('due_date', models.DateField()),
+                ('status', models.CharField(choices=[('active', 'active'), ('returned', 'returned')], default='active', max_length=10)),
+            ],
+            options={
+                'db_table': 'loans',
+                'indexes': [models.Index(condition=models.Q(('status', 'active')), fields=['user_id'], name='loans_active_user_idx'), models.Index(fields=['book_id', 'status'], name='loans_book_status_idx'), models.Index(fields=['due_date'], name='loans_due_date_idx')],
+            },
+        ),
+    ]
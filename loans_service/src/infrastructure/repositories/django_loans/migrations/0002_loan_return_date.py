@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-19 16:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loanmodel',
+            name='return_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import models
+from django.db.models import Q
+
+
+class LoanModel(models.Model):
+    STATUS_CHOICES = (("active", "active"), ("returned", "returned"))
+
+    # Los ids los genera el servicio (uuid4), así que loan_id es directamente la clave primaria
+    loan_id = models.CharField(max_length=36, primary_key=True)
+    user_id = models.CharField(max_length=64)
+    book_id = models.CharField(max_length=64)
+    start_date = models.DateField()
+    due_date = models.DateField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="active")
+    # Solo en los préstamos devueltos
+    return_date = models.DateField(null=True, blank=True)
+
+    class Meta:
+        db_table = "loans"
+        indexes = [
+            # Conteo de préstamos activos por usuario: solo indexa las filas activas
+            models.Index(fields=["user_id"], name="loans_active_user_idx", condition=Q(status="active")),
+            models.Index(fields=["book_id", "status"], name="loans_book_status_idx"),
+            models.Index(fields=["due_date"], name="loans_due_date_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.loan_id} ({self.status})"
@@ -0,0 +1,32 @@
+import os
+from typing import Dict, Optional
+
+import django
+from django.conf import settings
+
+# Base de datos de préstamos (servicio loans_db en docker-compose)
+DATABASES = {
+    "default": {
+        "ENGINE": os.getenv("LOANS_DB_ENGINE", "django.db.backends.postgresql"),
+        "NAME": os.getenv("LOANS_DB_NAME", "loans_db"),
+        "USER": os.getenv("LOANS_DB_USER", "loan"),
+        "PASSWORD": os.getenv("LOANS_DB_PASSWORD", "loanpass"),
+        "HOST": os.getenv("LOANS_DB_HOST", "loans_db"),
+        "PORT": os.getenv("LOANS_DB_PORT", "5432"),
+        # No hay ciclo request/response de Django que cierre conexiones: se mantienen abiertas
+        "CONN_MAX_AGE": None,
+    }
+}
+
+
+def configure(databases: Optional[Dict] = None) -> None:
+    """Configure Django for the ORM only (no views, no middleware); safe to call twice"""
+    if settings.configured:
+        return
+    settings.configure(
+        DATABASES=databases or DATABASES,
+        INSTALLED_APPS=["src.infrastructure.repositories.django_loans.apps.LoansConfig"],
+        USE_TZ=True,
+        TIME_ZONE="UTC",
+    )
+    django.setup()
@@ -0,0 +1,129 @@
+import asyncio
+import contextvars
+import time
+from typing import Dict, List, Optional, Tuple
+
+from ...domain.ports.loans_repo import LoansPort
+from ..logging.json_logger import logger
+from ..metrics.registry import metrics
+
+BATCH_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500)
+
+
+class GroupCommitLoansRepo(LoansPort):
+    """
+    LoansPort decorator that coalesces concurrent `save` calls (group commit).
+
+    Saves wait up to `linger` seconds, or until `max_batch` are pending, and are then
+    written with a single `inner.save_many` (one multi-row upsert, one transaction).
+    Each caller returns once the batch holding its loan is committed. One batch is
+    written at a time; saves arriving meanwhile form the next one. When a batch fails
+    its rows are retried one by one so a bad row only fails its own caller.
+
+    The flusher runs in an empty context: it serves many requests, so it must not carry
+    the request id or the deadline of the caller that happened to start it.
+    """
+
+    def __init__(self, inner: LoansPort, max_batch: int = 100, linger: float = 0.002, name: str = "loans"):
+        self.inner = inner
+        self.max_batch = max_batch
+        self.linger = linger
+        self.name = name
+        self._pending: List[Tuple[dict, asyncio.Future]] = []
+        self._full: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+
+    async def save(self, loan: dict) -> None:
+        fut = asyncio.get_running_loop().create_future()
+        self._pending.append((loan, fut))
+        if self._flusher is None:
+            self._full = asyncio.Event()
+            self._flusher = asyncio.create_task(self._run(), context=contextvars.Context())
+        if len(self._pending) >= self.max_batch:
+            self._full.set()
+        # shield: a cancelled caller must not cancel the write other callers share
+        await asyncio.shield(fut)
+
+    async def flush(self) -> None:
+        """Wait until everything saved so far is committed"""
+        if self._flusher is not None:
+            self._full.set()
+            await asyncio.shield(self._flusher)
+
+    async def _run(self) -> None:
+        try:
+            while self._pending:
+                if len(self._pending) < self.max_batch:
+                    try:
+                        await asyncio.wait_for(self._full.wait(), self.linger)
+                    except asyncio.TimeoutError:
+                        pass
+                self._full.clear()
+                batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+                await self._commit(batch)
+        finally:
+            self._flusher = None
+            # Only left over when the flusher was cancelled or crashed: nobody else would resolve them
+            pending, self._pending = self._pending, []
+            self._fail(pending)
+
+    async def _commit(self, batch: List[Tuple[dict, asyncio.Future]]) -> None:
+        # The same loan twice in one upsert is rejected by Postgres: the last write wins
+        latest: Dict[str, dict] = {}
+        for loan, _ in batch:
+            latest[loan['loan_id']] = loan
+
+        start = time.perf_counter()
+        try:
+            try:
+                await self.inner.save_many(list(latest.values()))
+            except Exception as e:
+                metrics.inc("loans_repo_group_commit_failures_total", repo=self.name)
+                logger.warning("Group commit failed, retrying rows one by one", extra={"error": str(e)})
+                await self._commit_one_by_one(batch)
+                return
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            metrics.observe("loans_repo_commit_batch_size", len(latest), buckets=BATCH_BUCKETS, repo=self.name)
+            metrics.observe("loans_repo_commit_ms", elapsed_ms, repo=self.name)
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_result(None)
+        finally:
+            # Cancelled mid-commit: the callers must not wait forever
+            self._fail(batch)
+
+    @staticmethod
+    def _fail(batch: List[Tuple[dict, asyncio.Future]]) -> None:
+        for _, fut in batch:
+            if not fut.done():
+                fut.set_exception(RuntimeError("Group commit interrupted before the loan was written"))
+
+    async def _commit_one_by_one(self, batch: List[Tuple[dict, asyncio.Future]]) -> None:
+        for loan, fut in batch:
+            try:
+                await self.inner.save(loan)
+            except Exception as e:
+                if not fut.done():
+                    fut.set_exception(e)
+            else:
+                if not fut.done():
+                    fut.set_result(None)
+
+    async def get(self, loan_id: str):
+        return await self.inner.get(loan_id)
+
+    async def mark_returned(self, loan_id: str) -> None:
+        await self.inner.mark_returned(loan_id)
+
+    async def list_active(self):
+        return await self.inner.list_active()
+
+    async def list_ids(self):
+        return await self.inner.list_ids()
+
+    async def get_many(self, loan_ids):
+        return await self.inner.get_many(loan_ids)
+
+    async def save_many(self, loans) -> None:
+        # Already one statement: no need to go through the queue
+        await self.inner.save_many(loans)
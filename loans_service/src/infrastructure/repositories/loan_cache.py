@@ -0,0 +1,154 @@
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+
+from ...domain.ports.loans_repo import LoansPort
+from ..metrics.registry import metrics
+
+# Status a loan has right after each domain event
+EVENT_STATUS = {"LoanCreated": "active", "LoanReturned": "returned"}
+
+
+class CachedLoansRepo(LoansPort):
+    """
+    LoansPort decorator with a bounded LRU of loans by id (read-through, write-through).
+
+    `get`/`get_many` fill the cache from `inner`; `save`, `save_many` and
+    `mark_returned` update it once the write has succeeded, so this process never
+    reads an older status after its own write. A read that was in flight while a
+    write to the same loan happened does not populate the cache. Callers get copies
+    (LoanDomainService mutates the loan it reads before saving it).
+
+    Writes made by other workers are only seen after `invalidate` (see
+    `invalidation_handler`, fed from the event bus) or once the entry is evicted.
+    Not-found results are not cached.
+    """
+
+    def __init__(self, inner: LoansPort, max_entries: int = 10000, name: str = "loans"):
+        self.inner = inner
+        self.max_entries = max_entries
+        self.name = name
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        # loan_id -> token of the read filling it; a write drops the token
+        self._loading: Dict[str, object] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def invalidate(self, loan_ids: Iterable[str]) -> None:
+        for loan_id in loan_ids:
+            self._entries.pop(loan_id, None)
+            self._loading.pop(loan_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._loading.clear()
+
+    async def invalidation_handler(self, events: List[object]) -> None:
+        """
+        EventBus handler: drop loans whose cached status disagrees with a LoanCreated /
+        LoanReturned from any worker. This worker's own events match its cache and keep it.
+        """
+        for event in events:
+            status = EVENT_STATUS.get(getattr(event, "type", None))
+            cached = self._entries.get(getattr(event, "loan_id", None))
+            if status is not None and cached is not None and cached['status'] != status:
+                self.invalidate([event.loan_id])
+
+    def _lookup(self, loan_id: str) -> Optional[dict]:
+        loan = self._entries.get(loan_id)
+        if loan is None:
+            metrics.inc("loans_repo_cache_requests_total", cache=self.name, result="miss")
+            return None
+        self._entries.move_to_end(loan_id)
+        metrics.inc("loans_repo_cache_requests_total", cache=self.name, result="hit")
+        return dict(loan)
+
+    def _store(self, loan: dict) -> None:
+        self._entries[loan['loan_id']] = dict(loan)
+        self._entries.move_to_end(loan['loan_id'])
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        metrics.set_gauge("loans_repo_cache_entries", len(self._entries), cache=self.name)
+
+    def _fill(self, loan_id: str, token: object, loan: Optional[dict]) -> None:
+        if self._loading.get(loan_id) is not token:
+            return
+        del self._loading[loan_id]
+        if loan is not None:
+            self._store(loan)
+
+    async def get(self, loan_id: str):
+        cached = self._lookup(loan_id)
+        if cached is not None:
+            return cached
+        token = self._loading[loan_id] = object()
+        try:
+            loan = await self.inner.get(loan_id)
+        except BaseException:
+            if self._loading.get(loan_id) is token:
+                del self._loading[loan_id]
+            raise
+        self._fill(loan_id, token, loan)
+        return dict(loan) if loan is not None else None
+
+    async def get_many(self, loan_ids: List[str]) -> Dict[str, dict]:
+        found: Dict[str, dict] = {}
+        missing = []
+        for loan_id in loan_ids:
+            cached = self._lookup(loan_id)
+            if cached is not None:
+                found[loan_id] = cached
+            else:
+                missing.append(loan_id)
+        if not missing:
+            return found
+
+        tokens = {loan_id: object() for loan_id in missing}
+        self._loading.update(tokens)
+        try:
+            loaded = await self.inner.get_many(missing)
+        except BaseException:
+            for loan_id, token in tokens.items():
+                if self._loading.get(loan_id) is token:
+                    del self._loading[loan_id]
+            raise
+        for loan_id, token in tokens.items():
+            self._fill(loan_id, token, loaded.get(loan_id))
+        found.update({loan_id: dict(loan) for loan_id, loan in loaded.items()})
+        return found
+
+    async def save(self, loan: dict) -> None:
+        await self._write_through(lambda: self.inner.save(loan), [loan])
+
+    async def save_many(self, loans: List[dict]) -> None:
+        await self._write_through(lambda: self.inner.save_many(loans), loans)
+
+    async def _write_through(self, write, loans: List[dict]) -> None:
+        ids = [loan['loan_id'] for loan in loans]
+        self.invalidate(ids)
+        try:
+            await write()
+        except BaseException:
+            # The write may or may not have happened: don't trust anything cached meanwhile
+            self.invalidate(ids)
+            raise
+        # Reads that raced with the write may have cached the old row
+        self.invalidate(ids)
+        for loan in loans:
+            self._store(loan)
+
+    async def mark_returned(self, loan_id: str) -> None:
+        cached = self._entries.get(loan_id)
+        if cached is None:
+            await self.inner.mark_returned(loan_id)
+            self.invalidate([loan_id])
+            return
+        returned = {**cached, 'status': 'returned', 'return_date': date.today()}
+        await self._write_through(lambda: self.inner.mark_returned(loan_id), [returned])
+
+    async def list_active(self):
+        return await self.inner.list_active()
+
+    async def list_ids(self):
+        return await self.inner.list_ids()
@@ -1,4 +1,5 @@
-from typing import Optional
+from datetime import date
+from typing import Dict, List, Optional
 from ...domain.ports.loans_repo import LoansPort
 from .memory_store import LOANS
 
@@ -12,42 +13,113 @@ class LoansRepoMemory(LoansPort):
 
     async def mark_returned(self, loan_id: str) -> None:
         if loan_id in LOANS:
-            LOANS[loan_id]['status'] = 'returned'
+            LOANS[loan_id].update(status='returned', return_date=date.today())
+
+    async def list_active(self) -> List[dict]:
+        return [l for l in LOANS.values() if l['status'] == 'active']
+
+    async def list_ids(self) -> List[str]:
+        return list(LOANS.keys())
+
+    async def get_many(self, loan_ids: List[str]) -> Dict[str, dict]:
+        return {loan_id: LOANS[loan_id] for loan_id in loan_ids if loan_id in LOANS}
+
+    async def save_many(self, loans: List[dict]) -> None:
+        for loan in loans:
+            LOANS[loan['loan_id']] = loan
+
+
+LOAN_FIELDS = ('loan_id', 'user_id', 'book_id', 'start_date', 'due_date', 'status', 'return_date')
 
 
 class LoansDjangoRepo(LoansPort):
     """
-    Ejemplo mínimo de repositorio usando Django ORM.
-    Requiere pasar un LoanModel (Django) con campos: loan_id, user_id, book_id, start_date, due_date, status.
+    Repositorio de préstamos sobre Django ORM (LoanModel de django_loans).
+
+    El ORM es síncrono: cada operación corre en el hilo de base de datos con sync_to_async.
+    Las lecturas usan values_list (sin instanciar modelos) y toda escritura es un único
+    INSERT ... ON CONFLICT (loan_id) DO UPDATE, así que guardar un préstamo existente lo actualiza.
     """
 
-    def __init__(self, LoanModel):
+    def __init__(self, LoanModel=None):
+        if LoanModel is None:
+            from .django_loans.models import LoanModel
         self.LoanModel = LoanModel
 
-    async def save(self, loan: dict):
-        obj = self.LoanModel.objects.create(
-            loan_id=loan['loan_id'],
-            user_id=loan['user_id'],
-            book_id=loan['book_id'],
-            start_date=loan['start_date'],
-            due_date=loan['due_date'],
-            status=loan['status'],
+    async def _run(self, fn, *args):
+        from asgiref.sync import sync_to_async
+        from django.db import DatabaseError, connection
+
+        def call():
+            try:
+                return fn(*args)
+            except DatabaseError:
+                # Con CONN_MAX_AGE=None una conexión caída no se recicla sola
+                if connection.connection is not None and not connection.is_usable():
+                    connection.close()
+                raise
+
+        return await sync_to_async(call)()
+
+    def _upsert(self, loans: List[dict]) -> None:
+        self.LoanModel.objects.bulk_create(
+            # return_date solo viene en los préstamos devueltos
+            [self.LoanModel(**{f: loan[f] for f in LOAN_FIELDS if f in loan}) for loan in loans],
+            update_conflicts=True,
+            unique_fields=['loan_id'],
+            update_fields=['status', 'due_date', 'return_date'],
         )
-        return obj
-
-    async def get(self, loan_id: str):
-        try:
-            o = self.LoanModel.objects.get(loan_id=loan_id)
-            return {
-                'loan_id': o.loan_id,
-                'user_id': o.user_id,
-                'book_id': o.book_id,
-                'start_date': o.start_date,
-                'due_date': o.due_date,
-                'status': o.status,
-            }
-        except self.LoanModel.DoesNotExist:
-            return None
-
-    async def mark_returned(self, loan_id: str):
-        self.LoanModel.objects.filter(loan_id=loan_id).update(status='returned')
\ No newline at end of file
+
+    def _save_many(self, loans: List[dict]) -> None:
+        from django.db import transaction
+
+        # bulk_create parte el lote en varias sentencias si supera el límite de parámetros del backend
+        with transaction.atomic():
+            self._upsert(loans)
+
+    def _get(self, loan_id: str) -> Optional[dict]:
+        row = self.LoanModel.objects.filter(loan_id=loan_id).values_list(*LOAN_FIELDS).first()
+        return dict(zip(LOAN_FIELDS, row)) if row is not None else None
+
+    def _mark_returned(self, loan_id: str) -> None:
+        self.LoanModel.objects.filter(loan_id=loan_id).update(status='returned', return_date=date.today())
+
+    def _list_active(self) -> List[dict]:
+        rows = self.LoanModel.objects.filter(status='active').values_list(*LOAN_FIELDS)
+        return [dict(zip(LOAN_FIELDS, row)) for row in rows.iterator(chunk_size=2000)]
+
+    def _list_ids(self) -> List[str]:
+        return list(self.LoanModel.objects.values_list('loan_id', flat=True))
+
+    def _get_many(self, loan_ids: List[str]) -> Dict[str, dict]:
+        rows = self.LoanModel.objects.filter(loan_id__in=loan_ids).values_list(*LOAN_FIELDS)
+        return {row[0]: dict(zip(LOAN_FIELDS, row)) for row in rows}
+
+    def _count_active(self, user_id: str) -> int:
+        # Resuelto con el índice parcial loans_active_user_idx
+        return self.LoanModel.objects.filter(user_id=user_id, status='active').count()
+
+    async def save(self, loan: dict) -> None:
+        await self._run(self._upsert, [loan])
+
+    async def get(self, loan_id: str) -> Optional[dict]:
+        return await self._run(self._get, loan_id)
+
+    async def mark_returned(self, loan_id: str) -> None:
+        await self._run(self._mark_returned, loan_id)
+
+    async def list_active(self) -> List[dict]:
+        return await self._run(self._list_active)
+
+    async def list_ids(self) -> List[str]:
+        return await self._run(self._list_ids)
+
+    async def get_many(self, loan_ids: List[str]) -> Dict[str, dict]:
+        return await self._run(self._get_many, loan_ids)
+
+    async def count_active(self, user_id: str) -> int:
+        return await self._run(self._count_active, user_id)
+
+    async def save_many(self, loans: List[dict]) -> None:
+        # Una sola sentencia INSERT ... ON CONFLICT (loan_id) DO UPDATE para todo el lote, en una transacción
+        await self._run(self._save_many, loans)
@@ -0,0 +1,77 @@
+from typing import Dict, List, Optional, Set
+
+from ...domain.ports.books_repo import BooksPort
+from ..metrics.registry import metrics
+from .ttl_cache import TTLCache
+
+
+class BookAvailabilityIndex:
+    """
+    Local index of books known to be unavailable.
+
+    Two sources feed it: loans created through this service (kept for `loaned_ttl`,
+    and dropped as soon as the book is returned) and upstream answers that said the
+    book is not available (negative cache, kept only for `negative_ttl`). Only
+    unavailability is cached: an "available" answer is never trusted locally.
+
+    Loans created and returned by other workers arrive through `event_handler`.
+    """
+
+    def __init__(self, negative_ttl: float = 5.0, loaned_ttl: float = 300.0, max_entries: int = 100000):
+        self.negative_ttl = negative_ttl
+        self.loaned_ttl = loaned_ttl
+        self._unavailable = TTLCache(negative_ttl, max_entries=max_entries)
+
+    def status(self, book_id: str) -> Optional[str]:
+        status = self._unavailable.get(book_id)
+        metrics.inc("loans_book_index_lookups_total", result="hit" if status else "miss")
+        return status
+
+    def mark_loaned(self, book_id: str) -> None:
+        self._unavailable.set(book_id, "loaned", ttl=self.loaned_ttl)
+
+    def mark_available(self, book_id: str) -> None:
+        self._unavailable.delete(book_id)
+
+    async def event_handler(self, events: List[object]) -> None:
+        """EventBus handler: apply LoanCreated / LoanReturned from any worker"""
+        for event in events:
+            kind = getattr(event, "type", None)
+            if kind == "LoanReturned":
+                self.mark_available(event.book_id)
+            elif kind == "LoanCreated":
+                self.mark_loaned(event.book_id)
+
+    def record_upstream(self, book: Dict) -> None:
+        book_id = str(book.get("id"))
+        if book.get("status") == "available":
+            self._unavailable.delete(book_id)
+        else:
+            self._unavailable.set(book_id, book.get("status"), ttl=self.negative_ttl)
+
+
+class BooksWithAvailabilityIndex(BooksPort):
+    """BooksPort decorator that keeps a BookAvailabilityIndex up to date"""
+
+    def __init__(self, inner: BooksPort, index: BookAvailabilityIndex):
+        self.inner = inner
+        self.index = index
+
+    async def get_book(self, book_id: str):
+        book = await self.inner.get_book(book_id)
+        self.index.record_upstream({**book, "id": book_id})
+        return book
+
+    async def mark_loaned(self, book_id: str) -> None:
+        await self.inner.mark_loaned(book_id)
+        self.index.mark_loaned(book_id)
+
+    async def mark_returned(self, book_id: str) -> None:
+        # Invalidate first: even if the upstream call fails the book is physically back
+        self.index.mark_available(book_id)
+        await self.inner.mark_returned(book_id)
+
+    async def mark_returned_many(self, book_ids: List[str]) -> Set[str]:
+        for book_id in book_ids:
+            self.index.mark_available(book_id)
+        return await self.inner.mark_returned_many(book_ids)
@@ -0,0 +1,77 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+# Relative budget in milliseconds; relative so it survives clock skew between services
+DEADLINE_HEADER = "X-Request-Timeout-Ms"
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The caller's time budget for this request is spent"""
+
+
+def set_deadline(budget_seconds: float):
+    """Start a budget for the current context; returns a token for `reset_deadline`"""
+    return _deadline.set(time.monotonic() + budget_seconds)
+
+
+def reset_deadline(token) -> None:
+    _deadline.reset(token)
+
+
+@contextmanager
+def detached():
+    """
+    Run without a deadline. Used after the point of no return (the loan is persisted):
+    finishing side effects is better than abandoning them half way.
+    """
+    token = _deadline.set(None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current budget, or None when no deadline is set"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def check(stage: str = "") -> None:
+    if expired():
+        raise DeadlineExceeded(f"Deadline exceeded{' before ' + stage if stage else ''}")
+
+
+def timeout_for(default: float) -> float:
+    """`default` shrunk to the remaining budget; raises if nothing is left"""
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded("Deadline exceeded")
+    return min(default, left)
+
+
+def can_retry(backoff: float) -> bool:
+    """Whether sleeping `backoff` still leaves budget for another attempt"""
+    left = remaining()
+    return left is None or left > backoff
+
+
+def outgoing_headers() -> dict:
+    """Headers that forward the remaining budget upstream"""
+    left = remaining()
+    if left is None:
+        return {}
+    return {DEADLINE_HEADER: str(max(0, int(left * 1000)))}
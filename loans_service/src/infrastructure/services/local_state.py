@@ -0,0 +1,47 @@
+from typing import Dict, Optional
+
+from ...domain.ports.local_state import LocalStatePort
+from ...domain.ports.users_repo import UsersPort
+from ..repositories.active_loans import ActiveLoanIndex
+from .book_availability import BookAvailabilityIndex
+from .ttl_cache import TTLCache
+
+
+class LocalLoanState(LocalStatePort):
+    """
+    Local knowledge available to the validation pipeline: recently fetched users
+    (short TTL), the authoritative active-loan counts and books known to be unavailable.
+    Without `active_loans` (shared repository) counts are not known locally.
+    """
+
+    def __init__(self, active_loans: Optional[ActiveLoanIndex], user_ttl: float = 30.0,
+                 books: Optional[BookAvailabilityIndex] = None):
+        self.active_loans = active_loans
+        self.users = TTLCache(user_ttl)
+        self.books = books
+
+    def get_user(self, user_id: str) -> Optional[Dict]:
+        return self.users.get(user_id)
+
+    def get_user_active_loans_count(self, user_id: str) -> Optional[int]:
+        return self.active_loans.count(user_id) if self.active_loans is not None else None
+
+    def get_book(self, book_id: str) -> Optional[Dict]:
+        status = self.books.status(book_id) if self.books is not None else None
+        return {"id": book_id, "status": status} if status else None
+
+
+class UsersWithLocalState(UsersPort):
+    """UsersPort decorator that records every fetched user in LocalLoanState"""
+
+    def __init__(self, inner: UsersPort, state: LocalLoanState):
+        self.inner = inner
+        self.state = state
+
+    async def get_user(self, user_id: str):
+        user = await self.inner.get_user(user_id)
+        self.state.users.set(user_id, user)
+        return user
+
+    async def get_user_active_loans_count(self, user_id: str) -> int:
+        return await self.inner.get_user_active_loans_count(user_id)
@@ -11,4 +11,9 @@ class BooksStub(BooksPort):
         BOOK_STATUS[book_id] = 'loaned'
 
     async def mark_returned(self, book_id: str) -> None:
-        BOOK_STATUS[book_id] = 'available'
\ No newline at end of file
+        BOOK_STATUS[book_id] = 'available'
+
+    async def mark_returned_many(self, book_ids):
+        for book_id in book_ids:
+            BOOK_STATUS[book_id] = 'available'
+        return set()
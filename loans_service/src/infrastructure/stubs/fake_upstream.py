@@ -0,0 +1,159 @@
+import asyncio
+import json
+import math
+import random
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import httpx
+
+# Routes the HTTP adapters call (UsersHTTP / BooksHTTP)
+ROUTES = (
+    ("GET", re.compile(r"^/api/users/(?P<id>[^/]+)/loans/count/?$"), "loans_count"),
+    ("GET", re.compile(r"^/api/users/(?P<id>[^/]+)/?$"), "get_user"),
+    ("GET", re.compile(r"^/api/books/(?P<id>[^/]+)/?$"), "get_book"),
+    ("POST", re.compile(r"^/api/books/(?P<id>[^/]+)/(?P<action>loaned|returned)/?$"), "mark_book"),
+)
+
+
+class ConnectionReset(Exception):
+    """Raised by FakeUpstream mid-response to drop the connection"""
+
+
+@dataclass
+class FaultProfile:
+    """
+    How a fake upstream misbehaves. Latency is log-normal with median `latency_ms`
+    and 99th percentile `latency_p99_ms` (fixed when the p99 is not above the median).
+    The rates are independent per-request probabilities.
+    """
+    latency_ms: float = 0.0
+    latency_p99_ms: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    reset_rate: float = 0.0
+    slow_body_rate: float = 0.0
+    slow_body_ms: float = 1000.0
+
+    def sample_latency(self, rng: random.Random) -> float:
+        if self.latency_ms <= 0:
+            return 0.0
+        if self.latency_p99_ms <= self.latency_ms:
+            return self.latency_ms
+        sigma = math.log(self.latency_p99_ms / self.latency_ms) / 2.326
+        return rng.lognormvariate(math.log(self.latency_ms), sigma)
+
+
+class FakeUpstream:
+    """
+    ASGI app that plays the users and books services for the HTTP adapters.
+
+    Users are active unless listed in `inactive_users`; book status is kept in
+    memory and changed by the loaned/returned endpoints. Each request is delayed
+    and may fail, reset or trickle its body according to the FaultProfile of its
+    route (`profiles`, keyed by route name) or `default`.
+
+    Run in-process with `transport()` or on a port with
+    `python -m src.interfaces.cli.fake_upstream`.
+    """
+
+    def __init__(self, default: Optional[FaultProfile] = None, profiles: Optional[Dict[str, FaultProfile]] = None,
+                 inactive_users=(), seed: Optional[int] = None):
+        self.default = default or FaultProfile()
+        self.profiles = dict(profiles or {})
+        self.inactive_users = set(inactive_users)
+        self.book_status: Dict[str, str] = {}
+        self.loans_count: Dict[str, int] = defaultdict(int)
+        # route -> outcome -> count
+        self.stats: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._rng = random.Random(seed)
+
+    def transport(self) -> httpx.AsyncBaseTransport:
+        """httpx transport serving this app in-process, with resets surfacing as transport errors"""
+        return _ResettingASGITransport(self)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        if scope["path"] == "/_fake/stats":
+            await self._respond(send, 200, {k: dict(v) for k, v in self.stats.items()})
+            return
+
+        for method, pattern, route in ROUTES:
+            match = pattern.match(scope["path"])
+            if match and scope["method"] == method:
+                break
+        else:
+            await self._respond(send, 404, {"detail": "Not found"})
+            return
+
+        profile = self.profiles.get(route, self.default)
+        delay = profile.sample_latency(self._rng)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+
+        roll = self._rng.random()
+        if roll < profile.error_rate:
+            self.stats[route]["error"] += 1
+            await self._respond(send, profile.error_status, {"detail": "Injected failure"})
+            return
+        roll -= profile.error_rate
+        if roll < profile.reset_rate:
+            self.stats[route]["reset"] += 1
+            await send({"type": "http.response.start", "status": 200,
+                        "headers": [(b"content-type", b"application/json"), (b"content-length", b"64")]})
+            raise ConnectionReset(scope["path"])
+        roll -= profile.reset_rate
+        slow = roll < profile.slow_body_rate
+
+        status, body = self._handle(route, match)
+        self.stats[route]["slow_body" if slow else "ok"] += 1
+        await self._respond(send, status, body, trickle_ms=profile.slow_body_ms if slow else 0)
+
+    def _handle(self, route: str, match):
+        key = match.group("id")
+        if route == "get_user":
+            return 200, {"id": key, "status": "inactive" if key in self.inactive_users else "active"}
+        if route == "loans_count":
+            return 200, {"count": self.loans_count[key]}
+        if route == "get_book":
+            return 200, {"id": key, "status": self.book_status.get(key, "available")}
+        self.book_status[key] = "loaned" if match.group("action") == "loaned" else "available"
+        return 204, None
+
+    @staticmethod
+    async def _respond(send, status: int, body, trickle_ms: float = 0):
+        payload = b"" if body is None else json.dumps(body).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())],
+        })
+        if trickle_ms and payload:
+            # Headers arrive on time, the body byte by byte over `trickle_ms`
+            pause = trickle_ms / 1000 / len(payload)
+            for i in range(len(payload)):
+                await send({"type": "http.response.body", "body": payload[i:i + 1], "more_body": True})
+                await asyncio.sleep(pause)
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send({"type": "http.response.body", "body": payload})
+
+
+class _ResettingASGITransport(httpx.ASGITransport):
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        try:
+            return await super().handle_async_request(request)
+        except ConnectionReset as e:
+            raise httpx.RemoteProtocolError("Connection reset by fake upstream", request=request) from e
@@ -0,0 +1,81 @@
+import json
+from typing import Iterable
+
+from ...infrastructure.auth.jwt_verifier import InvalidToken, JWTVerifier, KeysUnavailable
+from ...infrastructure.logging.json_logger import logger
+from .paths import is_exempt
+
+EXEMPT_PATHS = ("/health", "/metrics", "/openapi.json", "/docs")
+
+
+class JWTAuthMiddleware:
+    """
+    ASGI middleware that authenticates requests with auth-service access tokens.
+
+    Tokens are verified locally by JWTVerifier; the verified claims are stored in
+    scope["state"]["auth"] (request.state.auth in handlers).
+    """
+
+    def __init__(self, app, verifier: JWTVerifier, exempt_paths: Iterable[str] = EXEMPT_PATHS):
+        self.app = app
+        self.verifier = verifier
+        self.exempt_paths = tuple(exempt_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or is_exempt(scope["path"], self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        token = None
+        for name, value in scope.get("headers", ()):
+            if name == b"authorization":
+                scheme, _, credentials = value.decode("latin-1").partition(" ")
+                if scheme.lower() == "bearer" and credentials:
+                    token = credentials.strip()
+                break
+
+        if token is None:
+            await self._unauthorized(send, "Authentication credentials were not provided")
+            return
+        try:
+            claims = await self.verifier.verify(token)
+        except InvalidToken as e:
+            logger.warning("Invalid access token", extra={"url": scope["path"], "error": str(e)})
+            await self._unauthorized(send, "Invalid or expired token")
+            return
+        except KeysUnavailable as e:
+            # Our problem, not the caller's: a 401 would make clients drop a valid token
+            logger.error("Token verification unavailable", extra={"url": scope["path"], "error": str(e)})
+            await self._unavailable(send)
+            return
+
+        scope.setdefault("state", {})["auth"] = claims
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _unavailable(send):
+        body = json.dumps({"detail": "Authentication temporarily unavailable"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", b"5"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    async def _unauthorized(send, detail: str):
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 401,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"www-authenticate", b'Bearer realm="api"'),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
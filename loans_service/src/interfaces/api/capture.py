@@ -0,0 +1,74 @@
+import random
+import time
+from typing import Callable, Iterable
+
+from ...infrastructure.capture.jsonl import JSONLCaptureWriter
+from .paths import is_exempt
+
+EXEMPT_PATHS = ("/health", "/metrics", "/openapi.json", "/docs")
+# Never Authorization or cookies: capture files leave production
+CAPTURED_HEADERS = (b"content-type", b"x-user-id", b"x-request-timeout-ms")
+
+
+class TrafficCaptureMiddleware:
+    """
+    ASGI middleware that records a sample of requests (method, path, body, status,
+    response body, timing) for the replay tool (src.interfaces.cli.replay).
+
+    Bodies are truncated to `max_body` bytes. Sampling is decided per request
+    before anything is buffered, so unsampled requests pay nothing.
+    """
+
+    def __init__(self, app, writer: JSONLCaptureWriter, sample_rate: float = 0.01, max_body: int = 65536,
+                 exempt_paths: Iterable[str] = EXEMPT_PATHS, rand: Callable[[], float] = random.random):
+        self.app = app
+        self.writer = writer
+        self.sample_rate = sample_rate
+        self.max_body = max_body
+        self.exempt_paths = tuple(exempt_paths)
+        self._rand = rand
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or is_exempt(scope["path"], self.exempt_paths)
+                or self._rand() >= self.sample_rate):
+            await self.app(scope, receive, send)
+            return
+
+        request_body = bytearray()
+        response_body = bytearray()
+        status = None
+
+        async def capture_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                request_body.extend(message.get("body", b"")[: self.max_body - len(request_body)])
+            return message
+
+        async def capture_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_body.extend(message.get("body", b"")[: self.max_body - len(response_body)])
+            await send(message)
+
+        ts = time.time()
+        started = time.monotonic()
+        try:
+            await self.app(scope, capture_receive, capture_send)
+        finally:
+            self.writer.write({
+                "ts": ts,
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "headers": {
+                    name.decode("latin-1"): value.decode("latin-1")
+                    for name, value in scope.get("headers", ())
+                    if name in CAPTURED_HEADERS
+                },
+                "body": request_body.decode("utf-8", errors="replace"),
+                "status": status,
+                "response_body": response_body.decode("utf-8", errors="replace"),
+                "duration_ms": round((time.monotonic() - started) * 1000, 2),
+            })
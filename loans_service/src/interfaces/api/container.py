@@ -1,32 +1,120 @@
 import os
 from ...domain.services.loan_service import LoanDomainService
-from ...infrastructure.repositories.loans_repo_django import LoansRepoMemory
+from ...domain.ports.loans_repo import LoansPort
+from ...infrastructure.repositories.loans_repo_django import LoansDjangoRepo, LoansRepoMemory
+from ...infrastructure.repositories.group_commit import GroupCommitLoansRepo
+from ...infrastructure.repositories.loan_cache import CachedLoansRepo
+from ...infrastructure.repositories.active_loans import (
+    ActiveLoanIndex,
+    ActiveLoansReconciler,
+    CountingLoansRepo,
+    UsersWithLocalLoanCounts,
+    UsersWithRepoLoanCounts,
+)
 from ...infrastructure.stubs.users_stub import UsersStub
 from ...infrastructure.stubs.books_stub import BooksStub
 from ...infrastructure.http_adapters.users_http import UsersHTTP
 from ...infrastructure.http_adapters.books_http import BooksHTTP
 from ...infrastructure.services.clock_system import SystemClock
 from ...infrastructure.services.uuid_native import NativeUuid
+from ...infrastructure.services.local_state import LocalLoanState, UsersWithLocalState
+from ...infrastructure.services.book_availability import BookAvailabilityIndex, BooksWithAvailabilityIndex
+from ...infrastructure.events.in_process_bus import InProcessEventBus
+from ...infrastructure.auth.jwt_verifier import JWKSKeyProvider, JWTVerifier, StaticKeyProvider
+from ...infrastructure.admission.limiter import AdmissionController, GradientLimit
+from ...infrastructure.admission.rate_limit import TokenBucketLimiter
+from ...infrastructure.capture.jsonl import JSONLCaptureWriter
+from ...infrastructure.profiling.loop_monitor import LoopLagMonitor
+from ...infrastructure.profiling.profiler import Profiler
 
 
 # Configuración mínima: por defecto usa stubs en memoria.
 # Si se define USERS_BASE_URL o BOOKS_BASE_URL se usarán los adaptadores HTTP reales.
 USERS_BASE_URL = os.getenv("USERS_BASE_URL")
+# Token para los endpoints internos de auth-service (header X-Internal-Token)
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN")
 BOOKS_BASE_URL = os.getenv("BOOKS_BASE_URL")
+# Cada cuántos segundos se reconcilian los contadores locales de préstamos activos contra el repositorio (solo LOANS_REPO=memory).
+LOAN_COUNTS_RECONCILE_SECONDS = float(os.getenv("LOAN_COUNTS_RECONCILE_SECONDS", "60"))
+# TTL (segundos) del estado de usuario cacheado localmente para validar sin red; 0 lo desactiva.
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+# Índice local de libros no disponibles: TTL de respuestas "no disponible" del upstream y de libros prestados por nosotros.
+BOOK_NEGATIVE_TTL_SECONDS = float(os.getenv("BOOK_NEGATIVE_TTL_SECONDS", "5"))
+BOOK_LOANED_TTL_SECONDS = float(os.getenv("BOOK_LOANED_TTL_SECONDS", "300"))
+# Bus de eventos de dominio: "memory" (en proceso) o "redis" (Redis Streams en EVENTS_REDIS_URL).
+EVENT_BUS = os.getenv("EVENT_BUS", "memory")
+EVENTS_REDIS_URL = os.getenv("EVENTS_REDIS_URL", "redis://redis:6379/2")
+EVENTS_MAX_BATCH = int(os.getenv("EVENTS_MAX_BATCH", "100"))
+EVENTS_LINGER_MS = float(os.getenv("EVENTS_LINGER_MS", "10"))
+# Repositorio de préstamos: "memory" (por proceso) o "django" (PostgreSQL, variables LOANS_DB_*).
+LOANS_REPO = os.getenv("LOANS_REPO", "memory")
+# Group commit de los save concurrentes (solo con LOANS_REPO=django); LOANS_COMMIT_MAX_BATCH=1 lo desactiva.
+LOANS_COMMIT_MAX_BATCH = int(os.getenv("LOANS_COMMIT_MAX_BATCH", "100"))
+LOANS_COMMIT_LINGER_MS = float(os.getenv("LOANS_COMMIT_LINGER_MS", "2"))
+# Caché LRU de préstamos por id delante del repositorio PostgreSQL; 0 la desactiva.
+LOANS_CACHE_SIZE = int(os.getenv("LOANS_CACHE_SIZE", "10000"))
 
 _clock = SystemClock()
 _uuid = NativeUuid()
-_repo = LoansRepoMemory()
+if LOANS_REPO == "django":
+    from ...infrastructure.repositories.django_loans.settings import configure as configure_django
+    configure_django()
+    _loans_db = LoansDjangoRepo()
+    _loans_store = _loans_db
+    if LOANS_COMMIT_MAX_BATCH > 1:
+        _loans_store = GroupCommitLoansRepo(_loans_store, max_batch=LOANS_COMMIT_MAX_BATCH,
+                                            linger=LOANS_COMMIT_LINGER_MS / 1000)
+    if LOANS_CACHE_SIZE > 0:
+        _loans_store = CachedLoansRepo(_loans_store, max_entries=LOANS_CACHE_SIZE)
+    # PostgreSQL es compartido por todos los workers/réplicas: un índice por proceso no vería
+    # los préstamos creados por los demás, así que el conteo es un COUNT indexado.
+    _active_loans = None
+    _repo = _loans_store
+    _reconciler = None
+else:
+    _loans_store = LoansRepoMemory()
+    _active_loans = ActiveLoanIndex()
+    _repo = CountingLoansRepo(_loans_store, _active_loans)
+    _reconciler = ActiveLoansReconciler(_repo, _active_loans, interval=LOAN_COUNTS_RECONCILE_SECONDS)
 
 if USERS_BASE_URL:
-    _users = UsersHTTP(USERS_BASE_URL)
+    _users = UsersHTTP(USERS_BASE_URL, internal_token=INTERNAL_API_TOKEN)
 else:
     _users = UsersStub()
+# El conteo de préstamos activos se resuelve en este servicio, sin llamar al servicio de usuarios:
+# O(1) desde el índice local con el repositorio en memoria, COUNT en PostgreSQL con el compartido.
+if _active_loans is not None:
+    _users = UsersWithLocalLoanCounts(_users, _active_loans)
+else:
+    _users = UsersWithRepoLoanCounts(_users, _loans_db)
+# Con el repositorio compartido y sin bus entre procesos, una devolución hecha por otro worker no llegaría
+# a este índice: los libros prestados solo se recuerdan lo mismo que una respuesta negativa del upstream.
+_book_loaned_ttl = BOOK_LOANED_TTL_SECONDS
+if LOANS_REPO == "django" and EVENT_BUS != "redis":
+    _book_loaned_ttl = min(BOOK_LOANED_TTL_SECONDS, BOOK_NEGATIVE_TTL_SECONDS)
+_book_index = BookAvailabilityIndex(negative_ttl=BOOK_NEGATIVE_TTL_SECONDS, loaned_ttl=_book_loaned_ttl)
+_local_state = LocalLoanState(_active_loans, user_ttl=USER_CACHE_TTL_SECONDS, books=_book_index)
+_users = UsersWithLocalState(_users, _local_state)
 
 if BOOKS_BASE_URL:
     _books = BooksHTTP(BOOKS_BASE_URL)
 else:
     _books = BooksStub()
+_books = BooksWithAvailabilityIndex(_books, _book_index)
+
+if EVENT_BUS == "redis":
+    from ...infrastructure.events.redis_streams_bus import RedisStreamsEventBus
+    _events = RedisStreamsEventBus(EVENTS_REDIS_URL, max_batch=EVENTS_MAX_BATCH, linger=EVENTS_LINGER_MS / 1000)
+else:
+    _events = InProcessEventBus(max_batch=EVENTS_MAX_BATCH, linger=EVENTS_LINGER_MS / 1000)
+
+# Con varios workers, los cambios hechos por otros llegan como eventos: cada proceso invalida su caché
+# y actualiza su índice de libros prestados
+# (suscripción broadcast: cada proceso lee el stream entero con XREAD, sin consumer group que limpiar).
+if isinstance(_loans_store, CachedLoansRepo) and EVENT_BUS == "redis":
+    _events.subscribe("loan-cache", _loans_store.invalidation_handler, broadcast=True)
+if EVENT_BUS == "redis":
+    _events.subscribe("book-index", _book_index.event_handler, broadcast=True)
 
 _service = LoanDomainService(
     users=_users,
@@ -34,8 +122,126 @@ _service = LoanDomainService(
     loans=_repo,
     clock=_clock,
     uuidgen=_uuid,
+    events=_events,
+    local=_local_state,
 )
 
 
+# Presupuesto de tiempo por petición si el cliente no envía X-Request-Timeout-Ms.
+DEFAULT_DEADLINE_MS = int(os.getenv("DEFAULT_DEADLINE_MS", "10000"))
+MAX_DEADLINE_MS = int(os.getenv("MAX_DEADLINE_MS", "60000"))
+
+# Autenticación JWT local (tokens de auth-service). Se activa si hay clave compartida o URL JWKS.
+# JWT_SIGNING_KEY: clave HS256 actual; JWT_PREVIOUS_SIGNING_KEYS: claves anteriores aceptadas (rotación, separadas por coma).
+JWT_SIGNING_KEY = os.getenv("JWT_SIGNING_KEY")
+JWT_PREVIOUS_SIGNING_KEYS = os.getenv("JWT_PREVIOUS_SIGNING_KEYS", "")
+JWT_JWKS_URL = os.getenv("JWT_JWKS_URL")
+JWT_ALGORITHMS = os.getenv("JWT_ALGORITHMS", "RS256" if JWT_JWKS_URL else "HS256").split(",")
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+
+# Admission control: límite de concurrencia adaptativo + cola acotada + rate limit por usuario.
+ADMISSION_INITIAL_LIMIT = int(os.getenv("ADMISSION_INITIAL_LIMIT", "20"))
+ADMISSION_MIN_LIMIT = int(os.getenv("ADMISSION_MIN_LIMIT", "4"))
+ADMISSION_MAX_LIMIT = int(os.getenv("ADMISSION_MAX_LIMIT", "200"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "50"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "1.0"))
+USER_RATE_PER_SEC = float(os.getenv("USER_RATE_PER_SEC", "5"))
+USER_RATE_BURST = int(os.getenv("USER_RATE_BURST", "10"))
+
+_admission = AdmissionController(
+    GradientLimit(
+        initial=ADMISSION_INITIAL_LIMIT,
+        min_limit=ADMISSION_MIN_LIMIT,
+        max_limit=ADMISSION_MAX_LIMIT,
+    ),
+    max_queue=ADMISSION_MAX_QUEUE,
+    queue_timeout=ADMISSION_QUEUE_TIMEOUT,
+)
+_rate_limiter = TokenBucketLimiter(rate=USER_RATE_PER_SEC, burst=USER_RATE_BURST) if USER_RATE_PER_SEC > 0 else None
+
+
+if JWT_JWKS_URL:
+    _jwt_verifier = JWTVerifier(JWKSKeyProvider(JWT_JWKS_URL), JWT_ALGORITHMS, cache_size=JWT_CACHE_SIZE)
+elif JWT_SIGNING_KEY:
+    _jwt_verifier = JWTVerifier(
+        StaticKeyProvider([JWT_SIGNING_KEY] + JWT_PREVIOUS_SIGNING_KEYS.split(",")),
+        JWT_ALGORITHMS,
+        cache_size=JWT_CACHE_SIZE,
+    )
+else:
+    _jwt_verifier = None
+
+# Captura de tráfico para replay (src.interfaces.cli.replay). Desactivada si CAPTURE_FILE no está definido.
+CAPTURE_FILE = os.getenv("CAPTURE_FILE")
+CAPTURE_SAMPLE_RATE = float(os.getenv("CAPTURE_SAMPLE_RATE", "0.01"))
+CAPTURE_MAX_BODY_BYTES = int(os.getenv("CAPTURE_MAX_BODY_BYTES", "65536"))
+
+_capture_writer = JSONLCaptureWriter(CAPTURE_FILE) if CAPTURE_FILE else None
+
+# Perfilado bajo demanda en /debug/profile (header X-Debug-Token). Desactivado si DEBUG_PROFILE_TOKEN no está definido.
+DEBUG_PROFILE_TOKEN = os.getenv("DEBUG_PROFILE_TOKEN")
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+
+_profiler = Profiler(max_seconds=PROFILE_MAX_SECONDS) if DEBUG_PROFILE_TOKEN else None
+
+# Monitor del event loop: lag de planificación y bloqueos de más de LOOP_BLOCK_THRESHOLD_MS
+# (log "Event loop blocked" con stack y request_id). LOOP_BLOCK_THRESHOLD_MS=0 lo desactiva.
+LOOP_LAG_INTERVAL_MS = float(os.getenv("LOOP_LAG_INTERVAL_MS", "100"))
+LOOP_BLOCK_THRESHOLD_MS = float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "100"))
+
+_loop_monitor = LoopLagMonitor(
+    interval=LOOP_LAG_INTERVAL_MS / 1000,
+    threshold=LOOP_BLOCK_THRESHOLD_MS / 1000,
+) if LOOP_BLOCK_THRESHOLD_MS > 0 else None
+
+
 def get_service() -> LoanDomainService:
-    return _service
\ No newline at end of file
+    return _service
+
+
+async def startup() -> None:
+    if _reconciler is not None:
+        await _reconciler.reconcile()
+        _reconciler.start()
+    await _events.start()
+    if _capture_writer is not None:
+        await _capture_writer.start()
+    if _loop_monitor is not None:
+        _loop_monitor.start()
+
+
+async def shutdown() -> None:
+    if _loop_monitor is not None:
+        await _loop_monitor.stop()
+    if _capture_writer is not None:
+        await _capture_writer.stop()
+    await _events.stop()
+    if _reconciler is not None:
+        await _reconciler.stop()
+
+
+def get_loans_repo() -> LoansPort:
+    return _repo
+
+
+def get_event_bus():
+    return _events
+
+
+def get_admission() -> AdmissionController:
+    return _admission
+
+
+def get_rate_limiter():
+    return _rate_limiter
+
+
+def get_jwt_verifier():
+    return _jwt_verifier
+
+def get_capture_writer():
+    return _capture_writer
+
+
+def get_profiler():
+    return _profiler
@@ -0,0 +1,38 @@
+from ...infrastructure.services import deadline
+
+_HEADER = deadline.DEADLINE_HEADER.lower().encode()
+
+
+class DeadlineMiddleware:
+    """
+    ASGI middleware that starts the per-request time budget.
+
+    The budget comes from the X-Request-Timeout-Ms header (capped at `max_ms`) or
+    `default_ms`, and lives in a contextvar that the domain service and the HTTP
+    adapters read to shrink their timeouts and stop retrying.
+    """
+
+    def __init__(self, app, default_ms: int = 10000, max_ms: int = 60000):
+        self.app = app
+        self.default_ms = default_ms
+        self.max_ms = max_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        budget_ms = self.default_ms
+        for name, value in scope.get("headers", ()):
+            if name == _HEADER:
+                try:
+                    budget_ms = min(int(value), self.max_ms)
+                except ValueError:
+                    pass
+                break
+
+        token = deadline.set_deadline(budget_ms / 1000)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            deadline.reset_deadline(token)
@@ -1,11 +1,67 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from .views import router
+from .profiling import router as profiling_router, ProfilingMiddleware
+from .admission import AdmissionControlMiddleware
+from .deadline import DeadlineMiddleware
+from .auth import JWTAuthMiddleware
+from .capture import TrafficCaptureMiddleware
+from .request_context import RequestContextMiddleware
+from .container import (
+    get_admission,
+    get_rate_limiter,
+    get_jwt_verifier,
+    get_capture_writer,
+    get_profiler,
+    startup,
+    shutdown,
+    DEFAULT_DEADLINE_MS,
+    MAX_DEADLINE_MS,
+    CAPTURE_SAMPLE_RATE,
+    CAPTURE_MAX_BODY_BYTES,
+)
+from ...infrastructure.metrics.registry import metrics
 
 
-app = FastAPI(title="Loans Service", openapi_url="/openapi.json")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await startup()
+    yield
+    await shutdown()
+
+
+app = FastAPI(title="Loans Service", openapi_url="/openapi.json", lifespan=lifespan)
+app.add_middleware(
+    AdmissionControlMiddleware,
+    controller=get_admission(),
+    rate_limiter=get_rate_limiter(),
+)
+# Authentication runs before admission so rate limits key on the verified user
+if get_jwt_verifier() is not None:
+    app.add_middleware(JWTAuthMiddleware, verifier=get_jwt_verifier())
+# Outside admission control: time spent queued counts against the budget
+app.add_middleware(DeadlineMiddleware, default_ms=DEFAULT_DEADLINE_MS, max_ms=MAX_DEADLINE_MS)
+if get_profiler() is not None:
+    app.add_middleware(ProfilingMiddleware, profiler=get_profiler())
+# Request id for log correlation; the logged duration includes admission queueing
+app.add_middleware(RequestContextMiddleware)
+# Capture wraps everything so replays see the same responses clients saw (401/429/503 included)
+if get_capture_writer() is not None:
+    app.add_middleware(
+        TrafficCaptureMiddleware,
+        writer=get_capture_writer(),
+        sample_rate=CAPTURE_SAMPLE_RATE,
+        max_body=CAPTURE_MAX_BODY_BYTES,
+    )
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
-app.include_router(router)
\ No newline at end of file
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    return metrics.render()
+
+app.include_router(router)
+app.include_router(profiling_router)
@@ -0,0 +1,12 @@
+from typing import Tuple
+
+
+def is_exempt(path: str, exempt_paths: Tuple[str, ...]) -> bool:
+    """
+    True for an exempt path itself or anything below it ("/docs", "/docs/oauth2-redirect"),
+    but not for paths that only share the prefix ("/healthz", "/metrics-admin").
+    """
+    for exempt in exempt_paths:
+        if path == exempt or path.startswith(exempt.rstrip("/") + "/"):
+            return True
+    return False
@@ -0,0 +1,67 @@
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import Response
+
+from ...infrastructure.profiling.profiler import Profiler, ProfilerBusy, render_collapsed, render_pstats
+from .container import DEBUG_PROFILE_TOKEN, get_profiler
+
+router = APIRouter()
+DEFAULT_SECONDS = 10.0
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that lets a running profile session count finished requests"""
+
+    def __init__(self, app, profiler: Profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if self.profiler.active:
+                self.profiler.request_finished()
+
+
+@router.get("/debug/profile")
+async def profile(
+    seconds: Optional[float] = Query(None, gt=0),
+    requests: int = Query(0, ge=0),
+    mode: str = Query("cpu", pattern="^(cpu|wall|trace)$"),
+    format: str = Query("text", pattern="^(text|pstats)$"),
+    x_debug_token: Optional[str] = Header(None),
+):
+    """
+    Profile the service for `seconds` (default 10) or, with mode=trace and `requests`, until that
+    many more requests finish (at most `seconds` if given, else PROFILE_MAX_SECONDS).
+
+    - mode=cpu: sampled event loop thread stacks (where the loop is busy), collapsed format
+    - mode=wall: sampled await chains of all tasks (where requests wait), collapsed format
+    - mode=trace: cProfile of the loop thread; format=text (top functions) or pstats (binary)
+    """
+    profiler = get_profiler()
+    # Sin DEBUG_PROFILE_TOKEN el endpoint no existe
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_debug_token or not hmac.compare_digest(x_debug_token.encode(), DEBUG_PROFILE_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid debug token")
+
+    try:
+        if mode == "trace":
+            if requests:
+                result = await profiler.trace(seconds=seconds or 0, requests=requests)
+            else:
+                result = await profiler.trace(seconds=seconds or DEFAULT_SECONDS)
+            body = render_pstats(result, fmt=format)
+            media_type = "application/octet-stream" if format == "pstats" else "text/plain"
+            return Response(body, media_type=media_type)
+        stacks = await profiler.sample(seconds or DEFAULT_SECONDS, mode=mode)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return Response(render_collapsed(stacks), media_type="text/plain")
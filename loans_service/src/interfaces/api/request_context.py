@@ -0,0 +1,62 @@
+import time
+import uuid
+from typing import Iterable
+
+from ...infrastructure.logging.json_logger import logger, reset_request_id, set_request_id
+from ...infrastructure.profiling.loop_monitor import bind_request, unbind_request
+from .paths import is_exempt
+
+_HEADER = b"x-request-id"
+# Probes and scrapes would drown the request log
+EXEMPT_PATHS = ("/health", "/metrics")
+
+
+class RequestContextMiddleware:
+    """
+    ASGI middleware that tags every log record of a request with its id.
+
+    The id comes from the X-Request-Id header (so a caller's id is kept) or is
+    generated, and is echoed in the response. One "Request finished" record with
+    the status and total duration closes each request for the log analyzer
+    (src.interfaces.cli.log_latency).
+    """
+
+    def __init__(self, app, exempt_paths: Iterable[str] = EXEMPT_PATHS):
+        self.app = app
+        self.exempt_paths = tuple(exempt_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or is_exempt(scope["path"], self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", ()):
+            if name == _HEADER:
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        status = None
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = {**message, "headers": [*message.get("headers", ()), (_HEADER, request_id.encode())]}
+            await send(message)
+
+        token = set_request_id(request_id)
+        task = bind_request(request_id)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            logger.info("Request finished", extra={
+                "http_method": scope["method"],
+                "url": scope["path"],
+                "http_status": status,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                "stage": "request",
+            })
+            unbind_request(task)
+            reset_request_id(token)
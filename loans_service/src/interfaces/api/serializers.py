@@ -1,3 +1,4 @@
+from typing import List, Optional
 from pydantic import BaseModel, Field
 
 
@@ -13,4 +14,19 @@ class LoanResponse(BaseModel):
     book_id: str
     start_date: str
     due_date: str
-    status: str
\ No newline at end of file
+    status: str
+
+
+class BulkReturnRequest(BaseModel):
+    loan_ids: List[str] = Field(..., min_length=1, max_length=5000)
+
+
+class BulkReturnItem(BaseModel):
+    loan_id: str
+    status: str  # "returned" | "not_found" | "not_active" | "forbidden"
+    detail: Optional[str] = None
+
+
+class BulkReturnResponse(BaseModel):
+    returned: int
+    results: List[BulkReturnItem]
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, HTTPException
-from ..api.serializers import CreateLoanRequest, LoanResponse
-from ...infrastructure.repositories.memory_store import LOANS
-from .container import get_service
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Request
+from ..api.serializers import CreateLoanRequest, LoanResponse, BulkReturnRequest, BulkReturnResponse
+from .container import get_loans_repo, get_service
 from ...infrastructure.logging.json_logger import logger
+from ...infrastructure.services.deadline import DeadlineExceeded
 
 
 router = APIRouter()
@@ -12,13 +13,32 @@ def build_service():
     return get_service()
 
 
+def caller_id(request: Request) -> Optional[str]:
+    """
+    Verified user id of the caller (JWTAuthMiddleware), or None when requests aren't
+    authenticated or the token is staff, which may act on behalf of any user.
+    """
+    claims = getattr(request.state, "auth", None)
+    if not claims or claims.get("is_staff") or claims.get("user_id") is None:
+        return None
+    return str(claims["user_id"])
+
+
 @router.post("/api/loans", response_model=LoanResponse)
-async def create_loan(payload: CreateLoanRequest):
+async def create_loan(payload: CreateLoanRequest, request: Request):
     logger.info("API: Create loan request received", extra={
         "user_id": payload.user_id,
         "book_id": payload.book_id,
         "days": payload.days
     })
+    caller = caller_id(request)
+    if caller is not None and caller != payload.user_id:
+        logger.warning("API: Create loan request for another user", extra={
+            "user_id": payload.user_id,
+            "book_id": payload.book_id,
+            "caller_id": caller
+        })
+        raise HTTPException(status_code=403, detail="Cannot create loans for another user")
     
     service = build_service()
     try:
@@ -37,6 +57,13 @@ async def create_loan(payload: CreateLoanRequest):
             "error": str(e)
         })
         raise HTTPException(status_code=400, detail=str(e))
+    except DeadlineExceeded as e:
+        logger.warning("API: Create loan request deadline exceeded", extra={
+            "user_id": payload.user_id,
+            "book_id": payload.book_id,
+            "error": str(e)
+        })
+        raise HTTPException(status_code=504, detail="Deadline exceeded")
     except Exception as e:
         logger.error("API: Create loan request error", extra={
             "user_id": payload.user_id,
@@ -54,13 +81,35 @@ async def create_loan(payload: CreateLoanRequest):
     )
 
 
+@router.post("/api/loans/returns", response_model=BulkReturnResponse)
+async def return_loans(payload: BulkReturnRequest, request: Request):
+    logger.info("API: Bulk return request received", extra={"loans_count": len(payload.loan_ids)})
+
+    service = build_service()
+    try:
+        results = await service.return_loans(payload.loan_ids, owner=caller_id(request))
+    except DeadlineExceeded as e:
+        logger.warning("API: Bulk return request deadline exceeded", extra={"error": str(e)})
+        raise HTTPException(status_code=504, detail="Deadline exceeded")
+    except Exception as e:
+        logger.error("API: Bulk return request error", extra={"error": str(e)})
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    returned = sum(1 for r in results if r["status"] == "returned")
+    logger.info("API: Bulk return request successful", extra={
+        "loans_count": len(results),
+        "returned_count": returned
+    })
+    return BulkReturnResponse(returned=returned, results=results)
+
+
 @router.post("/api/loans/{loan_id}/return")
-async def return_loan(loan_id: str):
+async def return_loan(loan_id: str, request: Request):
     logger.info("API: Return loan request received", extra={"loan_id": loan_id})
     
     service = build_service()
     try:
-        result = await service.return_loan(loan_id)
+        result = await service.return_loan(loan_id, owner=caller_id(request))
         
         logger.info("API: Return loan request successful", extra={
             "loan_id": loan_id,
@@ -75,6 +124,18 @@ async def return_loan(loan_id: str):
             "error": str(e)
         })
         raise HTTPException(status_code=404, detail=str(e))
+    except PermissionError as e:
+        logger.warning("API: Return loan request forbidden", extra={
+            "loan_id": loan_id,
+            "error": str(e)
+        })
+        raise HTTPException(status_code=403, detail=str(e))
+    except DeadlineExceeded as e:
+        logger.warning("API: Return loan request deadline exceeded", extra={
+            "loan_id": loan_id,
+            "error": str(e)
+        })
+        raise HTTPException(status_code=504, detail="Deadline exceeded")
     except Exception as e:
         logger.error("API: Return loan request error", extra={
             "loan_id": loan_id,
@@ -86,9 +147,11 @@ async def return_loan(loan_id: str):
 @router.get("/api/debug/loans")
 async def debug_loans():
     logger.info("API: Debug loans request received")
+    # Del repositorio configurado (memoria o base de datos), no del store en memoria
+    ids = await get_loans_repo().list_ids()
     result = {
-        "count": len(LOANS),
-        "ids": list(LOANS.keys()),
+        "count": len(ids),
+        "ids": ids,
     }
-    logger.info("API: Debug loans request successful", extra={"loans_count": len(LOANS)})
+    logger.info("API: Debug loans request successful", extra={"loans_count": len(ids)})
     return result
\ No newline at end of file
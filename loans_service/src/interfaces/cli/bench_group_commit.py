@@ -0,0 +1,120 @@
+"""
+Writes/sec of per-row saves versus GroupCommitLoansRepo.
+
+    python -m src.interfaces.cli.bench_group_commit --writes 5000 --concurrency 50
+
+Both runs write the same loans from `--concurrency` concurrent callers into a SQLite
+file (WAL, synchronous=FULL, so every commit is a real fsync) through one connection,
+as a single database connection would: the per-row path pays one transaction per
+save, the grouped path one per batch.
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Sequence
+
+from ...domain.ports.loans_repo import LoansPort
+from ...infrastructure.repositories.group_commit import GroupCommitLoansRepo
+
+_UPSERT = (
+    "INSERT INTO loans (loan_id, user_id, book_id, start_date, due_date, status) VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (loan_id) DO UPDATE SET status = excluded.status, due_date = excluded.due_date"
+)
+
+
+class _SQLiteLoansRepo(LoansPort):
+    """Just enough of a LoansPort for the benchmark: save / save_many, one transaction each"""
+
+    def __init__(self, path: str):
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS loans (loan_id TEXT PRIMARY KEY, user_id TEXT, book_id TEXT, "
+            "start_date TEXT, due_date TEXT, status TEXT)"
+        )
+        self._lock = threading.Lock()
+        self.commits = 0
+
+    def _write(self, loans: List[dict]) -> None:
+        rows = [(l['loan_id'], l['user_id'], l['book_id'], l['start_date'].isoformat(),
+                 l['due_date'].isoformat(), l['status']) for l in loans]
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.executemany(_UPSERT, rows)
+            self._db.execute("COMMIT")
+            self.commits += 1
+
+    async def save(self, loan: dict) -> None:
+        await asyncio.to_thread(self._write, [loan])
+
+    async def save_many(self, loans: List[dict]) -> None:
+        await asyncio.to_thread(self._write, loans)
+
+    def count(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM loans").fetchone()[0]
+
+    def close(self) -> None:
+        self._db.close()
+
+
+async def _run(repo: LoansPort, writes: int, concurrency: int) -> List[float]:
+    today = date.today()
+    latencies: List[float] = []
+    remaining = iter(range(writes))
+
+    async def worker():
+        for i in remaining:
+            loan = {'loan_id': uuid.uuid4().hex, 'user_id': f"user{i % 1000}", 'book_id': f"book{i}",
+                    'start_date': today, 'due_date': today + timedelta(days=7), 'status': 'active'}
+            start = time.perf_counter()
+            await repo.save(loan)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+def _bench(path: str, writes: int, concurrency: int, grouped: bool, max_batch: int, linger: float) -> Dict:
+    store = _SQLiteLoansRepo(path)
+    repo = GroupCommitLoansRepo(store, max_batch=max_batch, linger=linger, name="bench") if grouped else store
+    start = time.perf_counter()
+    latencies = sorted(asyncio.run(_run(repo, writes, concurrency)))
+    elapsed = time.perf_counter() - start
+    written, commits = store.count(), store.commits
+    store.close()
+    return {
+        "mode": "group_commit" if grouped else "per_row",
+        "writes": written,
+        "writes_per_s": round(writes / elapsed, 1),
+        "commits": commits,
+        "mean_batch": round(writes / commits, 1),
+        "p50_ms": round(latencies[len(latencies) // 2], 2),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 2),
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Per-row saves vs group commit")
+    parser.add_argument("--writes", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--max-batch", type=int, default=100)
+    parser.add_argument("--linger-ms", type=float, default=2.0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for grouped in (False, True):
+            result = _bench(os.path.join(tmp, f"bench-{grouped}.db"), args.writes, args.concurrency,
+                            grouped, args.max_batch, args.linger_ms / 1000)
+            print("  ".join(f"{k}={v}" for k, v in result.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Serves FakeUpstream (users + books endpoints) on a local port.
+
+    python -m src.interfaces.cli.fake_upstream --port 8100 --latency-ms 20 --latency-p99-ms 250 \
+        --error-rate 0.02 --reset-rate 0.01 --slow-body-rate 0.01
+
+Point the service at it with USERS_BASE_URL=http://localhost:8100 BOOKS_BASE_URL=http://localhost:8100.
+Per-route outcome counters are served at /_fake/stats.
+"""
+import argparse
+import sys
+from typing import Optional, Sequence
+
+import uvicorn
+
+from ...infrastructure.stubs.fake_upstream import FakeUpstream, FaultProfile
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Fake users/books upstream with injected faults")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Median latency")
+    parser.add_argument("--latency-p99-ms", type=float, default=0.0, help="99th percentile latency (log-normal)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--reset-rate", type=float, default=0.0, help="Connections dropped mid-response")
+    parser.add_argument("--slow-body-rate", type=float, default=0.0)
+    parser.add_argument("--slow-body-ms", type=float, default=1000.0, help="Time to trickle a slow body")
+    parser.add_argument("--inactive-user", action="append", default=[])
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    profile = FaultProfile(
+        latency_ms=args.latency_ms,
+        latency_p99_ms=args.latency_p99_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        reset_rate=args.reset_rate,
+        slow_body_rate=args.slow_body_rate,
+        slow_body_ms=args.slow_body_ms,
+    )
+    app = FakeUpstream(profile, inactive_users=args.inactive_user, seed=args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+"""
+Latency breakdown from the service's JSON logs (setup_json_logging output).
+
+    python -m src.interfaces.cli.log_latency logs/loans.log* --top 5
+    docker compose logs --no-log-prefix loans | python -m src.interfaces.cli.log_latency -
+
+Streams the files once in constant memory: latencies go into fixed log-scale
+histograms and only requests still waiting for their "Request finished" record are
+kept (at most --max-open). Rotated files (loans.log.2.gz, loans.log.1, loans.log)
+are read oldest first; .gz files are decompressed on the fly.
+
+Reports total latency per endpoint, per stage (validation rules and fetches), per
+upstream call (with retry and error rates) and the slowest requests with their
+stage breakdown.
+"""
+import argparse
+import gzip
+import heapq
+import io
+import json
+import math
+import re
+import sys
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+from urllib.parse import urlsplit
+
+from .replay import endpoint_of
+
+_ROTATION_SUFFIX = re.compile(r"\.(\d+)(\.gz)?$")
+
+
+class Histogram:
+    """Log-scale latency histogram (~5% relative error) with constant memory"""
+
+    GROWTH = 1.1
+    MIN_MS = 0.001
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = defaultdict(int)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value_ms: float) -> None:
+        index = 0 if value_ms <= self.MIN_MS else math.ceil(math.log(value_ms / self.MIN_MS, self.GROWTH))
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += value_ms
+        self.max = max(self.max, value_ms)
+
+    def percentile(self, p: float) -> float:
+        rank = max(1, math.ceil(self.count * p))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(self.max, self.MIN_MS * self.GROWTH ** index)
+        return self.max
+
+    def summary(self) -> Dict:
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 3),
+            "p50_ms": round(self.percentile(0.50), 3),
+            "p90_ms": round(self.percentile(0.90), 3),
+            "p99_ms": round(self.percentile(0.99), 3),
+            "max_ms": round(self.max, 3),
+        }
+
+
+class UpstreamStats:
+    def __init__(self):
+        self.latency = Histogram()
+        self.calls = 0
+        self.retries = 0
+        self.errors = 0
+
+    def summary(self) -> Dict:
+        return {
+            **self.latency.summary(),
+            "calls": self.calls,
+            "retries": self.retries,
+            "retry_rate": round(self.retries / self.calls, 4) if self.calls else 0.0,
+            "errors": self.errors,
+        }
+
+
+class LatencyAnalyzer:
+    """Consumes parsed log records one by one; `report()` can be called at any time"""
+
+    def __init__(self, top: int = 10, max_open: int = 10000):
+        self.top = top
+        self.max_open = max_open
+        self.endpoints: Dict[str, Histogram] = defaultdict(Histogram)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.stages: Dict[str, Histogram] = defaultdict(Histogram)
+        self.upstreams: Dict[str, UpstreamStats] = defaultdict(UpstreamStats)
+        self.records = 0
+        self.incomplete = 0
+        self._open: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+        self._slowest: List = []
+
+    def add(self, record: Dict) -> None:
+        self.records += 1
+        request_id = record.get("request_id")
+        duration = record.get("duration_ms")
+        stage = record.get("stage")
+
+        if stage == "request":
+            if isinstance(duration, (int, float)):
+                self._finish(record, request_id, duration)
+            return
+
+        url = record.get("url")
+        if record.get("http_method") and isinstance(url, str) and url.startswith("http"):
+            parts = urlsplit(url)
+            stage = f"{endpoint_of(record['http_method'], parts.path)} @{parts.netloc}"
+            upstream = self.upstreams[stage]
+            if duration is None:
+                # "HTTP request started" is the only record with an attempt and no duration;
+                # terminal records ("failed after all retries") carry neither
+                if "attempt" not in record:
+                    return
+                if record["attempt"] > 1:
+                    upstream.retries += 1
+                else:
+                    upstream.calls += 1
+                return
+            if not isinstance(duration, (int, float)):
+                return
+            upstream.latency.add(duration)
+            status = record.get("http_status")
+            if not (isinstance(status, int) and status < 400):
+                upstream.errors += 1
+            stage = f"upstream:{stage}"
+        elif stage is not None and isinstance(duration, (int, float)):
+            self.stages[stage].add(duration)
+        else:
+            return
+
+        if request_id is not None:
+            breakdown = self._open.get(request_id)
+            if breakdown is None:
+                breakdown = self._open[request_id] = defaultdict(float)
+                if len(self._open) > self.max_open:
+                    self._open.popitem(last=False)
+                    self.incomplete += 1
+            breakdown[stage] += duration
+
+    def _finish(self, record: Dict, request_id: Optional[str], duration: float) -> None:
+        endpoint = endpoint_of(record.get("http_method", "?"), record.get("url", "?"))
+        self.endpoints[endpoint].add(duration)
+        self.statuses[endpoint][str(record.get("http_status"))] += 1
+        breakdown = self._open.pop(request_id, None) if request_id is not None else None
+        if self.top <= 0:
+            return
+        entry = (duration, self.records, {
+            "request_id": request_id,
+            "endpoint": endpoint,
+            "http_status": record.get("http_status"),
+            "timestamp": record.get("timestamp"),
+            "duration_ms": duration,
+            "breakdown_ms": {k: round(v, 3) for k, v in sorted((breakdown or {}).items(), key=lambda kv: -kv[1])},
+        })
+        if len(self._slowest) < self.top:
+            heapq.heappush(self._slowest, entry)
+        elif duration > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def report(self) -> Dict:
+        return {
+            "records": self.records,
+            "requests": sum(h.count for h in self.endpoints.values()),
+            "incomplete_requests": self.incomplete + len(self._open),
+            "endpoints": {
+                k: {**h.summary(), "statuses": dict(self.statuses[k])} for k, h in sorted(self.endpoints.items())
+            },
+            "stages": {k: h.summary() for k, h in sorted(self.stages.items())},
+            "upstreams": {k: u.summary() for k, u in sorted(self.upstreams.items())},
+            "slowest": [e[2] for e in sorted(self._slowest, key=lambda e: -e[0])],
+        }
+
+
+def rotation_order(paths: Sequence[str]) -> List[str]:
+    """loans.log.2.gz, loans.log.1, loans.log: higher rotation numbers are older"""
+    def key(path):
+        match = _ROTATION_SUFFIX.search(path)
+        base = path[:match.start()] if match else path[:-3] if path.endswith(".gz") else path
+        return base, -(int(match.group(1)) if match else 0)
+    return sorted(paths, key=key)
+
+
+def _open_log(path: str):
+    if path == "-":
+        return io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", errors="replace")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, encoding="utf-8", errors="replace")
+
+
+def iter_records(lines: Iterable[str]) -> Iterator[Dict]:
+    """JSON records from log lines; prefixes such as `docker compose logs` service names are skipped"""
+    for line in lines:
+        start = line.find("{")
+        if start < 0:
+            continue
+        try:
+            record = json.loads(line[start:])
+        except ValueError:
+            continue
+        if isinstance(record, dict):
+            yield record
+
+
+def analyze(paths: Sequence[str], top: int = 10, max_open: int = 10000) -> Dict:
+    analyzer = LatencyAnalyzer(top=top, max_open=max_open)
+    for path in rotation_order(paths):
+        with _open_log(path) as f:
+            for record in iter_records(f):
+                analyzer.add(record)
+    return analyzer.report()
+
+
+def _print_table(title: str, rows: Dict[str, Dict], extra: Sequence[str] = ()) -> None:
+    if not rows:
+        return
+    print(f"\n{title}")
+    print(f"  {'':<52} {'n':>7} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}" + "".join(f" {c:>10}" for c in extra))
+    for name, s in rows.items():
+        if not s.get("count"):
+            print(f"  {name:<52} {0:>7}")
+            continue
+        print(f"  {name:<52} {s['count']:>7} {s['p50_ms']:>9.2f} {s['p90_ms']:>9.2f} {s['p99_ms']:>9.2f} "
+              f"{s['max_ms']:>9.2f}" + "".join(f" {s[c]:>10}" for c in extra))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Latency breakdown from loans JSON logs")
+    parser.add_argument("files", nargs="+", help="Log files (.gz allowed, rotated files in any order) or - for stdin")
+    parser.add_argument("--top", type=int, default=10, help="Slowest requests to show")
+    parser.add_argument("--max-open", type=int, default=10000, help="Requests tracked while waiting for their end")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args(argv)
+
+    report = analyze(args.files, top=args.top, max_open=args.max_open)
+    print(f"{report['records']} records, {report['requests']} requests, "
+          f"{report['incomplete_requests']} incomplete")
+    _print_table("Requests", report["endpoints"])
+    _print_table("Stages", report["stages"])
+    _print_table("Upstreams", report["upstreams"], extra=("retry_rate", "errors"))
+    if report["slowest"]:
+        print("\nSlowest requests")
+        for e in report["slowest"]:
+            parts = ", ".join(f"{k}={v:.1f}" for k, v in list(e["breakdown_ms"].items())[:4])
+            print(f"  {e['duration_ms']:>9.1f} ms  {e['endpoint']} [{e['http_status']}] {e['request_id']}  {parts}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
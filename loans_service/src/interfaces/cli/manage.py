@@ -0,0 +1,20 @@
+"""
+Django management commands for the loans database (LOANS_DB_* env vars).
+
+    python -m src.interfaces.cli.manage migrate
+    python -m src.interfaces.cli.manage sqlmigrate loans 0001
+"""
+import sys
+
+from ...infrastructure.repositories.django_loans.settings import configure
+
+
+def main() -> None:
+    configure()
+    from django.core.management import execute_from_command_line
+
+    execute_from_command_line(["manage.py", *sys.argv[1:]])
+
+
+if __name__ == "__main__":
+    main()
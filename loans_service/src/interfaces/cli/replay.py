@@ -0,0 +1,251 @@
+"""
+Replays captured traffic (JSONL written by TrafficCaptureMiddleware) against a target.
+
+    python -m src.interfaces.cli.replay capture.jsonl --target http://localhost:8001 --speed 2 --concurrency 20
+
+--speed 1 keeps the original pacing, N replays N times faster and 0 sends as fast
+as --concurrency allows. Reports latency percentiles per endpoint and how many
+responses differ from the captured ones (status and JSON body).
+
+Loans created during the replay get new ids: each captured loan_id is mapped to the
+one the target returned, and later requests that use it (paths, query, bodies) are
+rewritten and wait for the request that creates it.
+"""
+import argparse
+import asyncio
+import json
+import re
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import httpx
+
+from ...infrastructure.capture.jsonl import read_records
+
+# Fields that legitimately change between runs (generated ids, dates)
+DEFAULT_IGNORED_FIELDS = ("loan_id", "start_date", "due_date")
+_ID_SEGMENT = re.compile(r"^([0-9a-fA-F-]{32,36}|\d+)$")
+_TOKEN = re.compile(r"[\w-]+")
+MAX_DIFF_SAMPLES = 20
+
+
+def endpoint_of(method: str, path: str) -> str:
+    """GET /api/loans/3f2c... -> GET /api/loans/{id}"""
+    segments = ["{id}" if _ID_SEGMENT.match(s) else s for s in path.split("/")]
+    return f"{method} {'/'.join(segments)}"
+
+
+def _strip(value, ignored: Sequence[str]):
+    if isinstance(value, dict):
+        return {k: _strip(v, ignored) for k, v in value.items() if k not in ignored}
+    if isinstance(value, list):
+        return [_strip(v, ignored) for v in value]
+    return value
+
+
+def bodies_match(expected: str, actual: str, ignored: Sequence[str]) -> bool:
+    try:
+        return _strip(json.loads(expected), ignored) == _strip(json.loads(actual), ignored)
+    except ValueError:
+        return expected == actual
+
+
+def _loan_ids(value) -> List[str]:
+    """loan_id values in a JSON document, in document order"""
+    if isinstance(value, dict):
+        found = [value["loan_id"]] if isinstance(value.get("loan_id"), str) else []
+        return found + [i for k, v in value.items() if k != "loan_id" for i in _loan_ids(v)]
+    if isinstance(value, list):
+        return [i for v in value for i in _loan_ids(v)]
+    return []
+
+
+def _json_loan_ids(text: Optional[str]) -> List[str]:
+    try:
+        return _loan_ids(json.loads(text)) if text else []
+    except ValueError:
+        return []
+
+
+class LoanIdMap:
+    """
+    Captured loan_id -> loan_id returned by the target.
+
+    A loan_id is produced by the first record whose response contains it without it
+    appearing in the request (the create). Later records using that id wait until the
+    producer has answered; if it failed or returned no id, the captured id is kept.
+    """
+
+    def __init__(self, records: Sequence[Dict]):
+        self._producers: Dict[int, List[str]] = defaultdict(list)
+        self._ids: Dict[str, asyncio.Future] = {}
+        loop = asyncio.get_running_loop()
+        used = set()  # tokens seen in requests so far: those ids existed before the replay
+        for index, record in enumerate(records):
+            used.update(_TOKEN.findall(f"{record['path']}?{record.get('query', '')} {record.get('body', '')}"))
+            for loan_id in _json_loan_ids(record.get("response_body")):
+                if loan_id not in self._ids and loan_id not in used:
+                    self._ids[loan_id] = loop.create_future()
+                    self._producers[index].append(loan_id)
+
+    async def rewrite(self, text: str) -> str:
+        mapped = {token: await asyncio.shield(self._ids[token])
+                  for token in set(_TOKEN.findall(text)) if token in self._ids}
+        return _TOKEN.sub(lambda m: mapped.get(m.group(0), m.group(0)), text) if mapped else text
+
+    def resolve(self, index: int, captured_body: Optional[str], actual_body: Optional[str]) -> None:
+        """Records the ids returned for record `index`; call it even when the request failed"""
+        produced = self._producers.pop(index, [])
+        if not produced:
+            return
+        pairs = dict(zip(_json_loan_ids(captured_body), _json_loan_ids(actual_body)))
+        for loan_id in produced:
+            self._ids[loan_id].set_result(pairs.get(loan_id, loan_id))
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+class ReplayReport:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.status_diffs: Dict[str, int] = defaultdict(int)
+        self.body_diffs: Dict[str, int] = defaultdict(int)
+        self.samples: List[Dict] = []
+        self.late = 0
+        self.elapsed = 0.0
+
+    def summary(self) -> Dict:
+        endpoints = {}
+        for endpoint in sorted(set(self.latencies) | set(self.errors)):
+            values = sorted(self.latencies[endpoint])
+            endpoints[endpoint] = {
+                "requests": len(values) + self.errors[endpoint],
+                "errors": self.errors[endpoint],
+                "status_diffs": self.status_diffs[endpoint],
+                "body_diffs": self.body_diffs[endpoint],
+                **({
+                    "p50_ms": round(percentile(values, 0.50), 2),
+                    "p90_ms": round(percentile(values, 0.90), 2),
+                    "p99_ms": round(percentile(values, 0.99), 2),
+                    "max_ms": round(values[-1], 2),
+                } if values else {}),
+            }
+        total = sum(e["requests"] for e in endpoints.values())
+        return {
+            "requests": total,
+            "elapsed_s": round(self.elapsed, 3),
+            "rps": round(total / self.elapsed, 1) if self.elapsed else None,
+            "late": self.late,
+            "endpoints": endpoints,
+            "diff_samples": self.samples,
+        }
+
+
+async def replay(records: Iterable[Dict], client: httpx.AsyncClient, speed: float = 1.0, concurrency: int = 10,
+                 ignored_fields: Sequence[str] = DEFAULT_IGNORED_FIELDS,
+                 extra_headers: Optional[Dict[str, str]] = None) -> ReplayReport:
+    """
+    Sends `records` through `client`, keeping their relative timing divided by `speed`.
+    At most `concurrency` requests are in flight; a record that cannot start on time
+    because of that limit is sent late and counted in `report.late`.
+    """
+    report = ReplayReport()
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = []
+    records = sorted(records, key=lambda rec: rec.get("ts", 0))
+    ids = LoanIdMap(records)
+
+    async def send(index: int, record: Dict):
+        endpoint = endpoint_of(record["method"], record["path"])
+        r = None
+        try:
+            # The producer of every id used here was started earlier and holds its own slot
+            url = await ids.rewrite(record["path"] + (f"?{record['query']}" if record.get("query") else ""))
+            body = await ids.rewrite(record.get("body", ""))
+            started = time.monotonic()
+            r = await client.request(record["method"], url, content=body.encode(),
+                                     headers={**record.get("headers", {}), **(extra_headers or {})})
+        except httpx.HTTPError:
+            report.errors[endpoint] += 1
+            return
+        finally:
+            ids.resolve(index, record.get("response_body"), r.text if r is not None else None)
+            semaphore.release()
+        report.latencies[endpoint].append((time.monotonic() - started) * 1000)
+
+        if record.get("status") is not None and r.status_code != record["status"]:
+            report.status_diffs[endpoint] += 1
+            diff = {"expected_status": record["status"], "actual_status": r.status_code}
+        elif "response_body" in record and not bodies_match(record["response_body"], r.text, ignored_fields):
+            report.body_diffs[endpoint] += 1
+            diff = {"expected_body": record["response_body"], "actual_body": r.text}
+        else:
+            return
+        if len(report.samples) < MAX_DIFF_SAMPLES:
+            report.samples.append({"endpoint": endpoint, "path": record["path"], **diff})
+
+    start = time.monotonic()
+    first_ts = records[0].get("ts", 0) if records else 0
+    for index, record in enumerate(records):
+        if speed > 0:
+            delay = (record.get("ts", 0) - first_ts) / speed - (time.monotonic() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        if semaphore.locked():
+            report.late += speed > 0
+        await semaphore.acquire()
+        tasks.append(asyncio.create_task(send(index, record)))
+    await asyncio.gather(*tasks)
+    report.elapsed = time.monotonic() - start
+    return report
+
+
+def _print_summary(summary: Dict) -> None:
+    print(f"{summary['requests']} requests in {summary['elapsed_s']}s ({summary['rps']} req/s), "
+          f"{summary['late']} sent late")
+    print(f"{'endpoint':<40} {'n':>6} {'p50':>8} {'p90':>8} {'p99':>8} {'errors':>7} {'status≠':>8} {'body≠':>6}")
+    for endpoint, e in summary["endpoints"].items():
+        print(f"{endpoint:<40} {e['requests']:>6} {e.get('p50_ms', 0):>8.1f} {e.get('p90_ms', 0):>8.1f} "
+              f"{e.get('p99_ms', 0):>8.1f} {e['errors']:>7} {e['status_diffs']:>8} {e['body_diffs']:>6}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay captured loans API traffic")
+    parser.add_argument("files", nargs="+", help="Capture files (JSONL)")
+    parser.add_argument("--target", default="http://localhost:8001")
+    parser.add_argument("--speed", type=float, default=1.0, help="1 = original pacing, N = N times faster, 0 = no pacing")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--ignore-fields", default=",".join(DEFAULT_IGNORED_FIELDS),
+                        help="JSON fields left out of the body comparison")
+    parser.add_argument("-H", "--header", action="append", default=[], help='Extra header, e.g. "Authorization: Bearer ..."')
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args(argv)
+
+    records = [record for path in args.files for record in read_records(path)]
+    if not records:
+        print("No records to replay", file=sys.stderr)
+        return 1
+    headers = dict(h.split(":", 1) for h in args.header)
+    headers = {k.strip(): v.strip() for k, v in headers.items()}
+
+    async def run():
+        async with httpx.AsyncClient(base_url=args.target, timeout=30.0) as client:
+            return await replay(records, client, speed=args.speed, concurrency=args.concurrency,
+                                ignored_fields=[f for f in args.ignore_fields.split(",") if f],
+                                extra_headers=headers)
+
+    summary = asyncio.run(run()).summary()
+    _print_summary(summary)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
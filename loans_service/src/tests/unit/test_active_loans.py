@@ -0,0 +1,96 @@
+import pytest
+from unittest.mock import AsyncMock
+from src.infrastructure.repositories.active_loans import (
+    ActiveLoanIndex,
+    ActiveLoansReconciler,
+    CountingLoansRepo,
+    UsersWithLocalLoanCounts,
+)
+
+
+def make_loan(loan_id, user_id, status="active"):
+    return {"loan_id": loan_id, "user_id": user_id, "book_id": "b1", "status": status}
+
+
+class TestActiveLoanIndex:
+    def test_activate_and_deactivate_are_idempotent(self):
+        """Test repeated writes for the same loan don't skew counts"""
+        index = ActiveLoanIndex()
+        index.activate("l1", "u1")
+        index.activate("l1", "u1")
+        index.activate("l2", "u1")
+        assert index.count("u1") == 2
+
+        index.deactivate("l1")
+        index.deactivate("l1")
+        index.deactivate("unknown")
+        assert index.count("u1") == 1
+
+    def test_rebuild_replays_writes_made_during_snapshot(self):
+        """Test writes that race with a reconciliation are not lost"""
+        index = ActiveLoanIndex()
+        index.activate("l1", "u1")
+        index.begin_rebuild()
+        index.activate("l2", "u1")
+        index.deactivate("l1")
+
+        drifted = index.finish_rebuild([("l1", "u1"), ("l3", "u2")])
+
+        assert index.count("u1") == 1
+        assert index.count("u2") == 1
+        assert drifted == 1
+
+
+class TestCountingLoansRepo:
+    @pytest.mark.asyncio
+    async def test_save_and_return_update_counts(self):
+        """Test counts follow save/mark_returned"""
+        index = ActiveLoanIndex()
+        repo = CountingLoansRepo(AsyncMock(), index)
+
+        await repo.save(make_loan("l1", "u1"))
+        await repo.save(make_loan("l2", "u1"))
+        assert index.count("u1") == 2
+
+        await repo.save(make_loan("l1", "u1", status="returned"))
+        await repo.mark_returned("l2")
+        assert index.count("u1") == 0
+
+    @pytest.mark.asyncio
+    async def test_users_count_is_local(self):
+        """Test active-loan count never reaches the upstream users adapter"""
+        index = ActiveLoanIndex()
+        index.activate("l1", "u1")
+        upstream = AsyncMock()
+        users = UsersWithLocalLoanCounts(upstream, index)
+
+        assert await users.get_user_active_loans_count("u1") == 1
+        upstream.get_user_active_loans_count.assert_not_called()
+
+
+class TestActiveLoansReconciler:
+    @pytest.mark.asyncio
+    async def test_reconcile_repairs_drift(self):
+        """Test reconciliation rebuilds counts from the repository"""
+        index = ActiveLoanIndex()
+        index.activate("stale", "u1")
+        repo = AsyncMock()
+        repo.list_active.return_value = [make_loan("l1", "u2"), make_loan("l2", "u2")]
+
+        drifted = await ActiveLoansReconciler(repo, index).reconcile()
+
+        assert drifted == 2
+        assert index.count("u1") == 0
+        assert index.count("u2") == 2
+
+    @pytest.mark.asyncio
+    async def test_reconcile_failure_keeps_index(self):
+        """Test a failing repository leaves the current counts untouched"""
+        index = ActiveLoanIndex()
+        index.activate("l1", "u1")
+        repo = AsyncMock()
+        repo.list_active.side_effect = RuntimeError("db down")
+
+        with pytest.raises(RuntimeError):
+            await ActiveLoansReconciler(repo, index).reconcile()
+        assert index.count("u1") == 1
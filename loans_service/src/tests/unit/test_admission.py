@@ -0,0 +1,157 @@
+import asyncio
+import pytest
+import httpx
+from src.infrastructure.admission.limiter import AdmissionController, GradientLimit, Overloaded
+from src.infrastructure.admission.rate_limit import TokenBucketLimiter
+from src.interfaces.api.admission import AdmissionControlMiddleware
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+class TestTokenBucketLimiter:
+    def test_burst_then_reject(self):
+        """Test bucket allows a burst and then reports the wait time"""
+        clock = FakeClock()
+        limiter = TokenBucketLimiter(rate=2, burst=3, now=clock)
+
+        assert all(limiter.try_acquire("u1")[0] for _ in range(3))
+        allowed, wait = limiter.try_acquire("u1")
+        assert not allowed
+        assert wait == pytest.approx(0.5)
+
+    def test_refill_and_isolation(self):
+        """Test tokens refill over time and users don't share buckets"""
+        clock = FakeClock()
+        limiter = TokenBucketLimiter(rate=1, burst=1, now=clock)
+
+        assert limiter.try_acquire("u1")[0]
+        assert not limiter.try_acquire("u1")[0]
+        assert limiter.try_acquire("u2")[0]
+        clock.t = 1.0
+        assert limiter.try_acquire("u1")[0]
+
+    def test_bounded_keys(self):
+        """Test the LRU evicts the oldest buckets"""
+        limiter = TokenBucketLimiter(rate=1, burst=1, max_keys=2)
+        for key in ("a", "b", "c"):
+            limiter.try_acquire(key)
+        assert len(limiter._buckets) == 2
+
+
+class TestGradientLimit:
+    def test_limit_shrinks_when_latency_grows(self):
+        """Test the limit backs off when latency rises above the baseline"""
+        limit = GradientLimit(initial=50, min_limit=5, max_limit=100)
+        for _ in range(20):
+            limit.on_sample(0.01, inflight=50)
+        before = limit.current
+        for _ in range(50):
+            limit.on_sample(0.5, inflight=50)
+        assert limit.current < before
+        assert limit.current >= 5
+
+    def test_limit_grows_under_stable_latency(self):
+        """Test the limit probes upwards while latency is stable"""
+        limit = GradientLimit(initial=10, min_limit=5, max_limit=100)
+        for _ in range(50):
+            limit.on_sample(0.01, inflight=10)
+        assert limit.current > 10
+
+
+class TestAdmissionController:
+    @pytest.mark.asyncio
+    async def test_queue_full_rejects_immediately(self):
+        """Test requests beyond limit + queue are rejected"""
+        ctrl = AdmissionController(GradientLimit(initial=1, min_limit=1, max_limit=1), max_queue=1, queue_timeout=1)
+        started = await ctrl.acquire()
+        waiter = asyncio.create_task(ctrl.acquire())
+        await asyncio.sleep(0)
+        assert ctrl.queue_depth == 1
+
+        with pytest.raises(Overloaded) as exc:
+            await ctrl.acquire()
+        assert exc.value.reason == "queue_full"
+
+        ctrl.release(started)
+        ctrl.release(await waiter)
+        assert ctrl.inflight == 0
+        assert ctrl.queue_depth == 0
+
+    @pytest.mark.asyncio
+    async def test_queue_timeout(self):
+        """Test queued requests give up after queue_timeout"""
+        ctrl = AdmissionController(GradientLimit(initial=1, min_limit=1, max_limit=1), max_queue=5, queue_timeout=0.01)
+        started = await ctrl.acquire()
+        with pytest.raises(Overloaded) as exc:
+            await ctrl.acquire()
+        assert exc.value.reason == "queue_timeout"
+        assert ctrl.queue_depth == 0
+        ctrl.release(started)
+        assert ctrl.inflight == 0
+
+
+class TestAdmissionControlMiddleware:
+    @staticmethod
+    def make_app(calls):
+        async def app(scope, receive, send):
+            calls.append(scope["path"])
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+        return app
+
+    @pytest.mark.asyncio
+    async def test_rate_limited_request_never_reaches_app(self):
+        """Test 429 with Retry-After and no downstream call"""
+        calls = []
+        ctrl = AdmissionController(GradientLimit(initial=10), max_queue=5)
+        middleware = AdmissionControlMiddleware(
+            self.make_app(calls), ctrl, TokenBucketLimiter(rate=0.5, burst=1)
+        )
+        transport = httpx.ASGITransport(app=middleware)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = await client.post("/api/loans", headers={"X-User-Id": "u1"})
+            # A different claimed user from the same address shares the bucket
+            second = await client.post("/api/loans", headers={"X-User-Id": "u2"})
+
+        assert first.status_code == 200
+        assert second.status_code == 429
+        assert second.headers["retry-after"] == "2"
+        assert calls == ["/api/loans"]
+
+    @pytest.mark.asyncio
+    async def test_overloaded_request_gets_503(self):
+        """Test 503 when no slot or queue space is available"""
+        calls = []
+        ctrl = AdmissionController(GradientLimit(initial=1, min_limit=1, max_limit=1), max_queue=0)
+        await ctrl.acquire()
+        middleware = AdmissionControlMiddleware(self.make_app(calls), ctrl)
+        transport = httpx.ASGITransport(app=middleware)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/api/loans")
+            health = await client.get("/health")
+
+        assert response.status_code == 503
+        assert "retry-after" in response.headers
+        assert health.status_code == 200
+        assert calls == ["/health"]
+
+    @pytest.mark.asyncio
+    async def test_exempt_paths_match_exactly(self):
+        """Test only exempt paths and their subpaths skip admission, not shared prefixes"""
+        calls = []
+        ctrl = AdmissionController(GradientLimit(initial=1, min_limit=1, max_limit=1), max_queue=0)
+        await ctrl.acquire()
+        middleware = AdmissionControlMiddleware(self.make_app(calls), ctrl)
+        transport = httpx.ASGITransport(app=middleware)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            docs = await client.get("/docs/oauth2-redirect")
+            lookalike = await client.get("/healthz-anything")
+
+        assert docs.status_code == 200
+        assert lookalike.status_code == 503
@@ -0,0 +1,102 @@
+import pytest
+from datetime import date
+from unittest.mock import AsyncMock
+from src.domain.events.loan_events import LoanCreated, LoanReturned
+from src.infrastructure.repositories.active_loans import ActiveLoanIndex
+from src.infrastructure.services.book_availability import BookAvailabilityIndex, BooksWithAvailabilityIndex
+from src.infrastructure.services.local_state import LocalLoanState
+from src.infrastructure.services.ttl_cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+class TestTTLCache:
+    def test_entries_expire(self):
+        """Test entries disappear after their TTL"""
+        clock = FakeClock()
+        cache = TTLCache(ttl=5, now=clock)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=20)
+        clock.t = 10
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+
+    def test_zero_ttl_disables_cache(self):
+        """Test ttl=0 stores nothing"""
+        cache = TTLCache(ttl=0)
+        cache.set("a", 1)
+        assert cache.get("a") is None
+
+
+class TestBookAvailabilityIndex:
+    @pytest.fixture
+    def index(self):
+        index = BookAvailabilityIndex(negative_ttl=5, loaned_ttl=300)
+        index._unavailable._now = self.clock = FakeClock()
+        return index
+
+    def test_negative_answers_are_short_lived(self, index):
+        """Test upstream "loaned" answers are cached for negative_ttl only"""
+        index.record_upstream({"id": "b1", "status": "loaned"})
+        assert index.status("b1") == "loaned"
+        self.clock.t = 6
+        assert index.status("b1") is None
+
+    def test_available_answers_are_not_cached(self, index):
+        """Test an "available" answer clears previous knowledge"""
+        index.record_upstream({"id": "b1", "status": "loaned"})
+        index.record_upstream({"id": "b1", "status": "available"})
+        assert index.status("b1") is None
+
+    def test_own_loans_until_returned(self, index):
+        """Test our own mark_loaned outlives the negative TTL and is dropped on return"""
+        index.mark_loaned("b1")
+        self.clock.t = 60
+        assert index.status("b1") == "loaned"
+        index.mark_available("b1")
+        assert index.status("b1") is None
+
+    @pytest.mark.asyncio
+    async def test_other_workers_loans_arrive_as_events(self, index):
+        """Test LoanCreated / LoanReturned from the bus update the index"""
+        index.mark_loaned("b1")
+        await index.event_handler([
+            LoanReturned(loan_id="l1", user_id="u1", book_id="b1", return_date=date(2025, 10, 29)),
+            LoanCreated(loan_id="l2", user_id="u2", book_id="b2",
+                        start_date=date(2025, 10, 29), due_date=date(2025, 11, 5)),
+        ])
+        assert index.status("b1") is None
+        assert index.status("b2") == "loaned"
+
+
+class TestBooksWithAvailabilityIndex:
+    @pytest.mark.asyncio
+    async def test_decorator_feeds_index(self):
+        """Test get_book/mark_loaned/mark_returned keep the index current"""
+        index = BookAvailabilityIndex()
+        inner = AsyncMock()
+        inner.get_book.return_value = {"id": "b1", "status": "maintenance"}
+        books = BooksWithAvailabilityIndex(inner, index)
+
+        await books.get_book("b1")
+        assert index.status("b1") == "maintenance"
+
+        await books.mark_loaned("b2")
+        assert index.status("b2") == "loaned"
+        await books.mark_returned("b2")
+        assert index.status("b2") is None
+        inner.mark_returned.assert_awaited_once_with("b2")
+
+    def test_local_state_exposes_only_unavailable_books(self):
+        """Test LocalLoanState answers get_book only for known-unavailable books"""
+        index = BookAvailabilityIndex()
+        state = LocalLoanState(ActiveLoanIndex(), books=index)
+        index.mark_loaned("b1")
+        assert state.get_book("b1") == {"id": "b1", "status": "loaned"}
+        assert state.get_book("b2") is None
@@ -0,0 +1,125 @@
+import io
+import json
+import logging
+import pytest
+import httpx
+from datetime import date
+from unittest.mock import AsyncMock, Mock
+from src.domain.services.loan_service import LoanDomainService
+from src.infrastructure.http_adapters.books_http import BooksHTTP
+from src.infrastructure.logging.json_logger import JSONFormatter, logger
+
+
+def make_loan(loan_id, status="active", book_id=None):
+    return {"loan_id": loan_id, "user_id": "u1", "book_id": book_id or f"b-{loan_id}", "status": status}
+
+
+class TestReturnLoans:
+    @pytest.fixture
+    def service(self):
+        loans, books = AsyncMock(), AsyncMock()
+        books.mark_returned_many.return_value = set()
+        clock = Mock()
+        clock.today.return_value = date(2025, 10, 29)
+        return LoanDomainService(users=AsyncMock(), books=books, loans=loans, clock=clock, uuidgen=Mock())
+
+    @pytest.mark.asyncio
+    async def test_bulk_return_uses_batched_calls(self, service):
+        """Test one bulk read, one bulk write and one batch of book notifications"""
+        service.loans.get_many.return_value = {
+            "l1": make_loan("l1"),
+            "l2": make_loan("l2", status="returned"),
+            "l3": make_loan("l3"),
+        }
+
+        results = await service.return_loans(["l1", "l2", "l3", "missing", "l1"])
+
+        assert [(r["loan_id"], r["status"]) for r in results] == [
+            ("l1", "returned"), ("l2", "not_active"), ("l3", "returned"), ("missing", "not_found"),
+        ]
+        service.loans.get_many.assert_awaited_once_with(["l1", "l2", "l3", "missing"])
+        saved = service.loans.save_many.call_args.args[0]
+        assert [l["loan_id"] for l in saved] == ["l1", "l3"]
+        assert all(l["status"] == "returned" and l["return_date"] == date(2025, 10, 29) for l in saved)
+        service.books.mark_returned_many.assert_awaited_once_with(["b-l1", "b-l3"])
+        service.loans.save.assert_not_called()
+        service.books.mark_returned.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_nothing_to_return(self, service):
+        """Test no writes when no loan can be returned"""
+        service.loans.get_many.return_value = {}
+        results = await service.return_loans(["x"])
+        assert results[0]["status"] == "not_found"
+        service.loans.save_many.assert_not_called()
+        service.books.mark_returned_many.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_book_notification_failures_are_reported(self, service):
+        """Test a failed book update is reported on the returned loan"""
+        service.loans.get_many.return_value = {"l1": make_loan("l1", book_id="b1")}
+        service.books.mark_returned_many.return_value = {"b1"}
+        results = await service.return_loans(["l1"])
+        assert results[0]["status"] == "returned"
+        assert results[0]["detail"] == "Book status update failed"
+
+    @pytest.mark.asyncio
+    async def test_other_users_loans_are_forbidden(self, service):
+        """Test with an owner only that user's loans are returned"""
+        service.loans.get_many.return_value = {
+            "l1": make_loan("l1"),
+            "l2": {**make_loan("l2"), "user_id": "u2"},
+        }
+
+        results = await service.return_loans(["l1", "l2"], owner="u1")
+
+        assert [(r["loan_id"], r["status"]) for r in results] == [("l1", "returned"), ("l2", "forbidden")]
+        assert [l["loan_id"] for l in service.loans.save_many.call_args.args[0]] == ["l1"]
+
+    @pytest.mark.asyncio
+    async def test_single_return_checks_owner(self, service):
+        """Test return_loan refuses another user's loan without touching it"""
+        service.loans.get.return_value = make_loan("l1")
+
+        with pytest.raises(PermissionError):
+            await service.return_loan("l1", owner="u2")
+        service.loans.save.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_summary_log_carries_counts(self, service):
+        """Test the bulk return summary record includes its counters in the JSON output"""
+        service.loans.get_many.return_value = {"l1": make_loan("l1")}
+        stream = io.StringIO()
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(JSONFormatter())
+        logger.addHandler(handler)
+        try:
+            await service.return_loans(["l1", "missing"])
+        finally:
+            logger.removeHandler(handler)
+
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        [summary] = [r for r in records if r["message"] == "Bulk loan return finished"]
+        assert summary["loans_count"] == 2
+        assert summary["returned_count"] == 1
+
+
+class TestBooksHTTPBulk:
+    @pytest.mark.asyncio
+    async def test_mark_returned_many_reports_failures(self):
+        """Test bulk notifications run per book and collect failures"""
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            if "bad" in request.url.path:
+                return httpx.Response(500)
+            return httpx.Response(204)
+
+        books = BooksHTTP("http://books", bulk_concurrency=2)
+        books.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+        failed = await books.mark_returned_many(["b1", "bad", "b2", "b1"])
+
+        assert failed == {"bad"}
+        assert sorted(set(calls)) == ["/api/books/b1/returned", "/api/books/b2/returned", "/api/books/bad/returned"]
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import pytest
+import httpx
+from src.infrastructure.capture.jsonl import JSONLCaptureWriter, read_records
+from src.interfaces.api.capture import TrafficCaptureMiddleware
+from src.interfaces.cli.replay import bodies_match, endpoint_of, replay
+
+
+def make_app(responses):
+    """ASGI app that answers from `responses` (path -> (status, body)) and echoes POST bodies"""
+
+    async def app(scope, receive, send):
+        message = await receive()
+        status, body = responses.get(scope["path"], (404, {"detail": "Not found"}))
+        if body is None:
+            body = json.loads(message.get("body") or b"{}")
+        payload = json.dumps(body).encode()
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": payload})
+
+    return app
+
+
+class TestTrafficCaptureMiddleware:
+    @pytest.mark.asyncio
+    async def test_captures_sampled_requests(self, tmp_path):
+        """Test sampled requests are recorded without the Authorization header"""
+        writer = JSONLCaptureWriter(str(tmp_path / "capture.jsonl"))
+        middleware = TrafficCaptureMiddleware(make_app({"/api/loans": (201, None)}), writer, sample_rate=1.0)
+        transport = httpx.ASGITransport(app=middleware)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.post("/api/loans?x=1", json={"user_id": "u1", "days": 7},
+                              headers={"Authorization": "Bearer secret", "X-User-Id": "u1"})
+            await client.get("/health")
+        await writer.flush()
+
+        records = list(read_records(writer.path))
+        assert len(records) == 1
+        record = records[0]
+        assert record["method"] == "POST"
+        assert record["path"] == "/api/loans"
+        assert record["query"] == "x=1"
+        assert record["status"] == 201
+        assert json.loads(record["body"]) == {"user_id": "u1", "days": 7}
+        assert json.loads(record["response_body"]) == {"user_id": "u1", "days": 7}
+        assert record["headers"]["x-user-id"] == "u1"
+        assert "authorization" not in record["headers"]
+        assert record["duration_ms"] >= 0
+
+    @pytest.mark.asyncio
+    async def test_sampling_and_truncation(self, tmp_path):
+        """Test unsampled requests are skipped and bodies are truncated"""
+        writer = JSONLCaptureWriter(str(tmp_path / "capture.jsonl"))
+        rolls = iter([0.5, 0.05])
+        middleware = TrafficCaptureMiddleware(make_app({"/api/loans": (201, None)}), writer,
+                                              sample_rate=0.1, max_body=10, rand=lambda: next(rolls))
+        transport = httpx.ASGITransport(app=middleware)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.post("/api/loans", json={"user_id": "first"})
+            await client.post("/api/loans", json={"user_id": "second"})
+        await writer.flush()
+
+        records = list(read_records(writer.path))
+        assert len(records) == 1
+        assert len(records[0]["body"]) == 10
+        assert records[0]["body"].startswith('{"user_id"')
+
+    @pytest.mark.asyncio
+    async def test_writer_drops_when_full(self, tmp_path):
+        """Test the writer buffer is bounded and skips malformed lines on read"""
+        path = tmp_path / "capture.jsonl"
+        writer = JSONLCaptureWriter(str(path), max_pending=2)
+        for i in range(3):
+            writer.write({"method": "GET", "path": f"/{i}"})
+        await writer.stop()
+        with open(path, "a") as f:
+            f.write("not json\n\n")
+
+        assert [r["path"] for r in read_records(str(path))] == ["/0", "/1"]
+
+
+class TestReplay:
+    def test_endpoint_normalization(self):
+        """Test ids in paths are grouped under {id}"""
+        assert endpoint_of("POST", "/api/loans/3f2c9a4e-1b2d-4c5e-8f9a-0b1c2d3e4f5a/return") == \
+            "POST /api/loans/{id}/return"
+        assert endpoint_of("GET", "/api/users/42") == "GET /api/users/{id}"
+        assert endpoint_of("POST", "/api/loans/returns") == "POST /api/loans/returns"
+
+    def test_bodies_match_ignores_fields(self):
+        """Test volatile fields are ignored in the comparison"""
+        assert bodies_match('{"loan_id": "a", "status": "active"}', '{"loan_id": "b", "status": "active"}',
+                            ["loan_id"])
+        assert not bodies_match('{"status": "active"}', '{"status": "returned"}', ["loan_id"])
+        assert bodies_match("plain", "plain", [])
+
+    @pytest.mark.asyncio
+    async def test_replay_reports_latency_and_diffs(self):
+        """Test replay reports per-endpoint latency, status and body diffs"""
+        records = [
+            {"ts": 100.0, "method": "POST", "path": "/api/loans", "body": '{"status": "active"}',
+             "status": 201, "response_body": '{"status": "active", "loan_id": "x"}'},
+            {"ts": 100.01, "method": "POST", "path": "/api/loans", "body": '{"status": "returned"}',
+             "status": 201, "response_body": '{"status": "active"}'},
+            {"ts": 100.02, "method": "POST", "path": "/api/loans/1/return", "body": "",
+             "status": 200, "response_body": "{}"},
+        ]
+        app = make_app({"/api/loans": (201, None)})
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            summary = (await replay(records, client, speed=0, concurrency=2)).summary()
+
+        assert summary["requests"] == 3
+        create = summary["endpoints"]["POST /api/loans"]
+        assert create["requests"] == 2
+        assert create["body_diffs"] == 1
+        assert create["status_diffs"] == 0
+        assert "p99_ms" in create
+        assert summary["endpoints"]["POST /api/loans/{id}/return"]["status_diffs"] == 1
+        assert len(summary["diff_samples"]) == 2
+
+    @pytest.mark.asyncio
+    async def test_replay_keeps_pacing(self):
+        """Test the original spacing is kept, divided by speed"""
+        records = [{"ts": 0.0, "method": "GET", "path": "/a"}, {"ts": 0.2, "method": "GET", "path": "/a"}]
+        transport = httpx.ASGITransport(app=make_app({"/a": (200, {})}))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            report = await replay(records, client, speed=2)
+
+        assert report.elapsed >= 0.1
+
+    @pytest.mark.asyncio
+    async def test_replay_maps_created_loan_ids(self):
+        """Test later requests use the loan_id the target returned, not the captured one"""
+        captured, returned = "3f2c9a4e-1b2d-4c5e-8f9a-0b1c2d3e4f5a", "9d8e7f6a-5b4c-4d3e-8f2a-1b0c9d8e7f6a"
+        loan = {"loan_id": returned, "status": "active"}
+        records = [
+            {"ts": 0.0, "method": "POST", "path": "/api/loans", "body": "{}",
+             "status": 201, "response_body": json.dumps({**loan, "loan_id": captured})},
+            {"ts": 0.0, "method": "GET", "path": f"/api/loans/{captured}",
+             "status": 200, "response_body": json.dumps({**loan, "loan_id": captured})},
+            {"ts": 0.0, "method": "POST", "path": "/api/loans/returns", "body": json.dumps({"loan_ids": [captured]}),
+             "status": 200},
+        ]
+        seen = []
+
+        async def app(scope, receive, send):
+            await asyncio.sleep(0.02 if scope["path"] == "/api/loans" else 0)
+            seen.append((scope["path"], (await receive()).get("body", b"").decode()))
+            body = json.dumps(loan if scope["path"] == "/api/loans" or returned in scope["path"] else {}).encode()
+            await send({"type": "http.response.start", "status": 201 if scope["path"] == "/api/loans" else 200,
+                        "headers": [(b"content-type", b"application/json")]})
+            await send({"type": "http.response.body", "body": body})
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            summary = (await replay(records, client, speed=0, concurrency=3)).summary()
+
+        assert seen[0][0] == "/api/loans"
+        assert (f"/api/loans/{returned}", "") in seen
+        assert ("/api/loans/returns", json.dumps({"loan_ids": [returned]})) in seen
+        assert summary["endpoints"]["GET /api/loans/{id}"]["status_diffs"] == 0
+        assert summary["diff_samples"] == []
@@ -0,0 +1,114 @@
+import asyncio
+import pytest
+import httpx
+from datetime import date
+from unittest.mock import AsyncMock, Mock
+from src.domain.services.loan_service import LoanDomainService
+from src.infrastructure.http_adapters.users_http import UsersHTTP
+from src.infrastructure.services import deadline
+from src.interfaces.api.deadline import DeadlineMiddleware
+
+
+@pytest.fixture
+def budget():
+    tokens = []
+
+    def start(seconds):
+        tokens.append(deadline.set_deadline(seconds))
+
+    yield start
+    for token in reversed(tokens):
+        try:
+            deadline.reset_deadline(token)
+        except ValueError:
+            pass  # set inside an async test's own task context
+
+
+class TestDeadline:
+    def test_no_deadline(self):
+        """Test defaults apply when no budget is set"""
+        assert deadline.remaining() is None
+        assert deadline.timeout_for(3.0) == 3.0
+        assert deadline.outgoing_headers() == {}
+
+    def test_timeout_shrinks_to_budget(self, budget):
+        """Test timeouts never exceed the remaining budget"""
+        budget(0.5)
+        assert deadline.timeout_for(3.0) <= 0.5
+        assert int(deadline.outgoing_headers()[deadline.DEADLINE_HEADER]) <= 500
+        assert not deadline.can_retry(1.0)
+
+    def test_expired_budget(self, budget):
+        """Test an exhausted budget raises"""
+        budget(-1)
+        with pytest.raises(deadline.DeadlineExceeded):
+            deadline.timeout_for(3.0)
+        with pytest.raises(deadline.DeadlineExceeded):
+            deadline.check()
+
+    def test_detached(self, budget):
+        """Test detached() suspends the budget"""
+        budget(-1)
+        with deadline.detached():
+            deadline.check()
+        assert deadline.expired()
+
+
+class TestDeadlineMiddleware:
+    @pytest.mark.asyncio
+    async def test_header_sets_budget(self):
+        """Test the header budget is visible to the app and capped"""
+        seen = []
+
+        async def app(scope, receive, send):
+            seen.append(deadline.remaining())
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        transport = httpx.ASGITransport(app=DeadlineMiddleware(app, default_ms=1000, max_ms=2000))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.get("/", headers={deadline.DEADLINE_HEADER: "250"})
+            await client.get("/", headers={deadline.DEADLINE_HEADER: "999999"})
+            await client.get("/")
+
+        assert 0 < seen[0] <= 0.25
+        assert 1.9 < seen[1] <= 2.0
+        assert 0.9 < seen[2] <= 1.0
+        assert deadline.remaining() is None
+
+
+class TestAdapterDeadline:
+    @pytest.mark.asyncio
+    async def test_adapter_forwards_budget_and_stops_retrying(self, budget):
+        """Test UsersHTTP forwards the remaining budget and gives up at the deadline"""
+        headers = []
+
+        async def handler(request):
+            headers.append(request.headers.get(deadline.DEADLINE_HEADER))
+            await asyncio.sleep(0.2)
+            return httpx.Response(200, json={"id": "u1", "status": "active"})
+
+        users = UsersHTTP("http://users")
+        users.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        budget(0.05)
+
+        with pytest.raises(deadline.DeadlineExceeded):
+            await users.get_user("u1")
+        assert len(headers) == 1
+        assert int(headers[0]) <= 50
+
+
+class TestServiceDeadline:
+    @pytest.mark.asyncio
+    async def test_expired_budget_does_no_remote_work(self, budget):
+        """Test an expired budget stops before remote validation"""
+        users, books, loans = AsyncMock(), AsyncMock(), AsyncMock()
+        clock, uuidgen = Mock(), Mock()
+        clock.today.return_value = date(2025, 10, 29)
+        service = LoanDomainService(users=users, books=books, loans=loans, clock=clock, uuidgen=uuidgen)
+        budget(-1)
+
+        with pytest.raises(deadline.DeadlineExceeded):
+            await service.create_loan("u1", "b1", 7)
+        users.get_user.assert_not_called()
+        loans.save.assert_not_called()
@@ -0,0 +1,323 @@
+import asyncio
+import json
+import pytest
+from datetime import date
+from unittest.mock import AsyncMock, Mock
+from src.domain.events.loan_events import LoanCreated, LoanReturned, event_from_dict, event_to_dict
+from src.domain.services.loan_service import LoanDomainService
+from src.infrastructure.events.batching import BatchingPublisher
+from src.infrastructure.events.in_process_bus import InProcessEventBus
+from src.infrastructure.events.redis_streams_bus import RedisStreamsEventBus
+
+
+def make_created(i):
+    return LoanCreated(loan_id=f"l{i}", user_id="u1", book_id="b1",
+                       start_date=date(2025, 10, 29), due_date=date(2025, 11, 5))
+
+
+class TestLoanEvents:
+    def test_roundtrip(self):
+        """Test events survive serialization"""
+        event = make_created(1)
+        assert event_from_dict(event_to_dict(event)) == event
+
+    def test_unknown_type(self):
+        """Test unknown event types are ignored"""
+        assert event_from_dict({"type": "Nope"}) is None
+
+
+class TestBatchingPublisher:
+    @pytest.mark.asyncio
+    async def test_events_are_batched(self):
+        """Test events published together are flushed in one batch"""
+        batches = []
+
+        async def sink(batch):
+            batches.append(list(batch))
+
+        publisher = BatchingPublisher(sink, max_batch=10, linger=0.05)
+        publisher.start()
+        for i in range(25):
+            await publisher.publish(i)
+        await publisher.stop()
+
+        assert [len(b) for b in batches] == [10, 10, 5]
+        assert sum(batches, []) == list(range(25))
+
+    @pytest.mark.asyncio
+    async def test_back_pressure(self):
+        """Test publish blocks once the buffer is full"""
+        release = asyncio.Event()
+
+        async def sink(batch):
+            await release.wait()
+
+        publisher = BatchingPublisher(sink, max_batch=1, linger=0, max_pending=2)
+        publisher.start()
+        for i in range(3):
+            await publisher.publish(i)  # 1 in flight + 2 buffered
+        blocked = asyncio.create_task(publisher.publish(3))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+
+        release.set()
+        await asyncio.wait_for(blocked, 1)
+        await publisher.stop()
+
+
+class TestInProcessEventBus:
+    @pytest.mark.asyncio
+    async def test_consumers_have_independent_offsets(self):
+        """Test each consumer receives every event and tracks its own offset"""
+        bus = InProcessEventBus(linger=0, consumer_batch=2)
+        seen = {"notifications": [], "analytics": []}
+
+        def collector(name):
+            async def handler(batch):
+                seen[name].extend(e.loan_id for e in batch)
+            return handler
+
+        bus.subscribe("notifications", collector("notifications"))
+        bus.subscribe("analytics", collector("analytics"))
+        await bus.start()
+        for i in range(5):
+            await bus.publish(make_created(i))
+        await bus.publisher.stop()
+        await asyncio.sleep(0.05)
+
+        expected = [f"l{i}" for i in range(5)]
+        assert seen["notifications"] == expected
+        assert seen["analytics"] == expected
+        assert bus.offset("notifications") == bus.offset("analytics") == 5
+        assert bus._log == []  # trimmed up to the slowest consumer
+        await bus.stop()
+
+    @pytest.mark.asyncio
+    async def test_log_is_bounded_without_consumers(self):
+        """Test events published with no subscriber are not retained"""
+        bus = InProcessEventBus(linger=0, max_retained=100)
+        await bus.start()
+        for i in range(5000):
+            await bus.publish(make_created(i))
+        await bus.publisher.stop()
+
+        assert bus.end_offset == 5000
+        assert bus._log == []
+        # A late subscriber starts at the end instead of replaying dropped events
+        bus.subscribe("late", AsyncMock())
+        assert bus.offset("late") == 5000
+        await bus.stop()
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_is_redelivered(self):
+        """Test a handler error doesn't advance the offset"""
+        bus = InProcessEventBus(linger=0)
+        calls = []
+
+        async def flaky(batch):
+            calls.append(len(batch))
+            if len(calls) == 1:
+                raise RuntimeError("boom")
+
+        bus.subscribe("c", flaky)
+        await bus.start()
+        await bus.publish(make_created(1))
+        await asyncio.sleep(0.3)
+
+        assert calls == [1, 1]
+        assert bus.offset("c") == 1
+        await bus.stop()
+
+
+class FakeStream:
+    """The stream commands RedisStreamsEventBus uses, over one in-memory list shared by several buses"""
+
+    def __init__(self):
+        self.entries = []
+        self.groups = []
+        self.pending = []
+        self.delivered = 0
+
+    def add(self, event=None, data=None):
+        entry_id = f"{len(self.entries) + 1}-0".encode()
+        data = data if data is not None else json.dumps(event_to_dict(event)).encode()
+        self.entries.append((entry_id, {b"data": data}))
+
+    async def xrevrange(self, stream, count):
+        return self.entries[-1:]
+
+    async def xread(self, streams, count, block):
+        [last_id] = streams.values()
+        seq = int((last_id.decode() if isinstance(last_id, bytes) else last_id).split("-")[0])
+        entries = self.entries[seq:seq + count]
+        if not entries:
+            await asyncio.sleep(block / 1000)
+            return []
+        return [[b"loans.events", entries]]
+
+    async def xgroup_create(self, *args, **kwargs):
+        self.groups.append(args[1])
+
+    async def xreadgroup(self, group, consumer, streams, count, block):
+        [last_id] = streams.values()
+        if last_id == "0":
+            return [[b"loans.events", list(self.pending)]]
+        entries = self.entries[self.delivered:self.delivered + count]
+        if not entries:
+            await asyncio.sleep(block / 1000)
+            return []
+        self.delivered += len(entries)
+        self.pending.extend(entries)
+        return [[b"loans.events", entries]]
+
+    async def xack(self, stream, group, *ids):
+        self.pending = [entry for entry in self.pending if entry[0] not in ids]
+
+    async def aclose(self):
+        pass
+
+
+class TestRedisStreamsBroadcast:
+    @pytest.mark.asyncio
+    async def test_every_process_gets_new_events_without_groups(self):
+        """Test broadcast subscribers in two processes see every new event and create no consumer group"""
+        stream = FakeStream()
+        stream.add(make_created(0))  # published before they subscribed
+        seen = {"w1": [], "w2": []}
+        buses = []
+
+        def collector(worker):
+            async def handler(batch):
+                seen[worker].extend(e.loan_id for e in batch)
+            return handler
+
+        for worker in seen:
+            bus = RedisStreamsEventBus("redis://localhost:6379", block_ms=5)
+            bus.redis = stream
+            bus.subscribe("loan-cache", collector(worker), broadcast=True)
+            await bus.start()
+            buses.append(bus)
+        await asyncio.sleep(0.02)
+        for i in range(1, 4):
+            stream.add(make_created(i))
+        await asyncio.sleep(0.05)
+        for bus in buses:
+            await bus.stop()
+
+        assert seen == {"w1": ["l1", "l2", "l3"], "w2": ["l1", "l2", "l3"]}
+        assert stream.groups == []
+
+    @pytest.mark.asyncio
+    async def test_failed_broadcast_batch_is_read_again(self):
+        """Test a handler error keeps the read position"""
+        stream = FakeStream()
+        bus = RedisStreamsEventBus("redis://localhost:6379", block_ms=5)
+        bus.redis = stream
+        calls = []
+
+        async def flaky(batch):
+            calls.append([e.loan_id for e in batch])
+            if len(calls) == 1:
+                raise RuntimeError("boom")
+
+        bus.subscribe("book-index", flaky, broadcast=True)
+        await bus.start()
+        await asyncio.sleep(0.02)
+        stream.add(make_created(1))
+        await asyncio.sleep(0.3)
+        await bus.stop()
+
+        assert calls == [["l1"], ["l1"]]
+
+
+class TestRedisStreamsDecoding:
+    @pytest.mark.asyncio
+    async def test_undecodable_entries_are_acked_and_skipped(self):
+        """Test a trimmed pending entry and a malformed payload don't stop the group consumer"""
+        stream = FakeStream()
+        stream.pending = [(b"0-1", None)]  # trimmed by MAXLEN while pending
+        stream.add(data=b"not json")
+        stream.add(make_created(1))
+        bus = RedisStreamsEventBus("redis://localhost:6379", block_ms=5)
+        bus.redis = stream
+        seen = []
+
+        async def handler(batch):
+            seen.extend(e.loan_id for e in batch)
+
+        bus.subscribe("notifications", handler)
+        await bus.start()
+        await asyncio.sleep(0.05)
+        stream.add(make_created(2))
+        await asyncio.sleep(0.05)
+        await bus.stop()
+
+        assert seen == ["l1", "l2"]
+        assert stream.pending == []
+
+    @pytest.mark.asyncio
+    async def test_broadcast_skips_malformed_entries(self):
+        """Test a malformed payload doesn't stop a broadcast subscriber"""
+        stream = FakeStream()
+        bus = RedisStreamsEventBus("redis://localhost:6379", block_ms=5)
+        bus.redis = stream
+        seen = []
+
+        async def handler(batch):
+            seen.extend(e.loan_id for e in batch)
+
+        bus.subscribe("loan-cache", handler, broadcast=True)
+        await bus.start()
+        await asyncio.sleep(0.02)
+        stream.add(data=b'{"type": "LoanCreated"}')
+        stream.add(make_created(1))
+        await asyncio.sleep(0.05)
+        await bus.stop()
+
+        assert seen == ["l1"]
+
+
+class TestLoanServiceEvents:
+    @pytest.fixture
+    def service(self):
+        users, books, loans = AsyncMock(), AsyncMock(), AsyncMock()
+        users.get_user.return_value = {"id": "u1", "status": "active"}
+        users.get_user_active_loans_count.return_value = 0
+        books.get_book.return_value = {"id": "b1", "status": "available"}
+        clock, uuidgen = Mock(), Mock()
+        clock.today.return_value = date(2025, 10, 29)
+        uuidgen.new.return_value = "loan-123"
+        return LoanDomainService(users=users, books=books, loans=loans, clock=clock,
+                                 uuidgen=uuidgen, events=AsyncMock())
+
+    @pytest.mark.asyncio
+    async def test_create_emits_loan_created(self, service):
+        """Test LoanCreated is published after a successful loan"""
+        await service.create_loan("u1", "b1", 7)
+        event = service.events.publish.call_args.args[0]
+        assert isinstance(event, LoanCreated)
+        assert event.loan_id == "loan-123"
+        assert event.due_date == date(2025, 11, 5)
+
+    @pytest.mark.asyncio
+    async def test_return_emits_loan_returned(self, service):
+        """Test LoanReturned is published after a return"""
+        service.loans.get.return_value = {"loan_id": "loan-123", "user_id": "u1", "book_id": "b1", "status": "active"}
+        await service.return_loan("loan-123")
+        event = service.events.publish.call_args.args[0]
+        assert isinstance(event, LoanReturned)
+        assert event.return_date == date(2025, 10, 29)
+
+    @pytest.mark.asyncio
+    async def test_rejected_loan_emits_nothing(self, service):
+        """Test failed validations publish no events"""
+        with pytest.raises(ValueError):
+            await service.create_loan("u1", "b1", 20)
+        service.events.publish.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_bus_failure_does_not_fail_loan(self, service):
+        """Test a failing bus doesn't break loan creation"""
+        service.events.publish.side_effect = RuntimeError("bus down")
+        loan = await service.create_loan("u1", "b1", 7)
+        assert loan["status"] == "active"
@@ -0,0 +1,84 @@
+import asyncio
+import pytest
+import httpx
+from src.infrastructure.http_adapters.books_http import BooksHTTP
+from src.infrastructure.http_adapters.users_http import UsersHTTP
+from src.infrastructure.stubs.fake_upstream import FakeUpstream, FaultProfile
+
+
+class TestFaultProfile:
+    def test_latency_distribution(self):
+        """Test latency is log-normal around the median with the configured tail"""
+        import random
+        profile = FaultProfile(latency_ms=10, latency_p99_ms=100)
+        rng = random.Random(1)
+        samples = sorted(profile.sample_latency(rng) for _ in range(5000))
+
+        assert samples[2500] == pytest.approx(10, rel=0.15)
+        assert samples[int(5000 * 0.99)] == pytest.approx(100, rel=0.3)
+        assert FaultProfile(latency_ms=5).sample_latency(rng) == 5
+
+
+class TestFakeUpstream:
+    @pytest.mark.asyncio
+    async def test_serves_adapter_endpoints(self):
+        """Test the adapters work unchanged against the fake"""
+        fake = FakeUpstream(inactive_users={"bob"})
+        users = UsersHTTP("http://users", transport=fake.transport())
+        books = BooksHTTP("http://books", transport=fake.transport())
+
+        assert (await users.get_user("alice"))["status"] == "active"
+        assert (await users.get_user("bob"))["status"] == "inactive"
+        assert await users.get_user_active_loans_count("alice") == 0
+        assert (await books.get_book("b1"))["status"] == "available"
+        await books.mark_loaned("b1")
+        assert (await books.get_book("b1"))["status"] == "loaned"
+        assert await books.mark_returned_many(["b1"]) == set()
+        assert fake.book_status["b1"] == "available"
+        assert fake.stats["get_user"]["ok"] == 2
+
+    @pytest.mark.asyncio
+    async def test_adapter_retries_injected_errors(self, monkeypatch):
+        """Test errors and resets are retried by the adapter and then surface"""
+        monkeypatch.setattr(asyncio, "sleep", _no_sleep(asyncio.sleep))
+        fake = FakeUpstream(profiles={"get_user": FaultProfile(error_rate=1.0),
+                                      "get_book": FaultProfile(reset_rate=1.0)})
+        users = UsersHTTP("http://users", transport=fake.transport())
+        books = BooksHTTP("http://books", transport=fake.transport())
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await users.get_user("alice")
+        with pytest.raises(httpx.RemoteProtocolError):
+            await books.get_book("b1")
+        assert fake.stats["get_user"]["error"] == 3
+        assert fake.stats["get_book"]["reset"] == 3
+
+    @pytest.mark.asyncio
+    async def test_slow_upstream_hits_adapter_timeout(self):
+        """Test latency and slow bodies beyond the adapter timeout fail the attempt"""
+        fake = FakeUpstream(profiles={"get_book": FaultProfile(slow_body_rate=1.0, slow_body_ms=500)})
+        books = BooksHTTP("http://books", transport=fake.transport())
+        books.timeout = 0.05
+
+        with pytest.raises(asyncio.TimeoutError):
+            await books.get_book("b1")
+        assert fake.stats["get_book"]["slow_body"] == 3
+
+    @pytest.mark.asyncio
+    async def test_stats_and_unknown_routes(self):
+        """Test the stats endpoint and 404 for routes the adapters don't use"""
+        fake = FakeUpstream()
+        async with httpx.AsyncClient(transport=fake.transport(), base_url="http://fake") as client:
+            await client.get("/api/users/1")
+            missing = await client.get("/api/other")
+            stats = await client.get("/_fake/stats")
+
+        assert missing.status_code == 404
+        assert stats.json() == {"get_user": {"ok": 1}}
+
+
+def _no_sleep(sleep):
+    """Skip the adapters' retry backoff but keep real sleeps used by the fake"""
+    async def fake_sleep(delay, *args, **kwargs):
+        return await sleep(0 if delay == 0.2 else delay, *args, **kwargs)
+    return fake_sleep
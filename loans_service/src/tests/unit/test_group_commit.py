@@ -0,0 +1,140 @@
+import asyncio
+import pytest
+from datetime import date
+from src.infrastructure.services import deadline
+from src.infrastructure.logging.json_logger import get_request_id, reset_request_id, set_request_id
+from src.infrastructure.repositories.group_commit import GroupCommitLoansRepo
+from src.infrastructure.repositories.loans_repo_django import LoansRepoMemory
+from src.infrastructure.repositories.memory_store import LOANS
+
+
+class RecordingRepo(LoansRepoMemory):
+    def __init__(self, fail_batches=False, bad_ids=()):
+        self.batches = []
+        self.single_saves = []
+        self.fail_batches = fail_batches
+        self.bad_ids = set(bad_ids)
+
+    async def save(self, loan):
+        if loan['loan_id'] in self.bad_ids:
+            raise ValueError("bad row")
+        self.single_saves.append(loan['loan_id'])
+        await super().save(loan)
+
+    async def save_many(self, loans):
+        await asyncio.sleep(0)
+        if self.fail_batches:
+            raise RuntimeError("batch failed")
+        self.batches.append([l['loan_id'] for l in loans])
+        await super().save_many(loans)
+
+
+def make_loan(loan_id, status='active'):
+    return {'loan_id': loan_id, 'user_id': 'u1', 'book_id': f'b-{loan_id}',
+            'start_date': date(2024, 1, 1), 'due_date': date(2024, 1, 8), 'status': status}
+
+
+@pytest.fixture(autouse=True)
+def clean_store():
+    LOANS.clear()
+    yield
+    LOANS.clear()
+
+
+class TestGroupCommitLoansRepo:
+    @pytest.mark.asyncio
+    async def test_concurrent_saves_share_one_commit(self):
+        """Test concurrent saves are written in one batch and resolve after it"""
+        inner = RecordingRepo()
+        repo = GroupCommitLoansRepo(inner, max_batch=100, linger=0.01)
+
+        await asyncio.gather(*(repo.save(make_loan(f"l{i}")) for i in range(10)))
+
+        assert inner.batches == [[f"l{i}" for i in range(10)]]
+        assert len(LOANS) == 10
+
+    @pytest.mark.asyncio
+    async def test_batches_capped_at_max_batch(self):
+        """Test a full batch is flushed without waiting for the linger"""
+        inner = RecordingRepo()
+        repo = GroupCommitLoansRepo(inner, max_batch=4, linger=10)
+
+        await asyncio.wait_for(asyncio.gather(*(repo.save(make_loan(f"l{i}")) for i in range(8))), 1)
+
+        assert [len(b) for b in inner.batches] == [4, 4]
+
+    @pytest.mark.asyncio
+    async def test_duplicate_loan_in_batch_last_write_wins(self):
+        """Test the same loan saved twice in one batch is upserted once with its last state"""
+        inner = RecordingRepo()
+        repo = GroupCommitLoansRepo(inner, linger=0.01)
+
+        await asyncio.gather(repo.save(make_loan("l1")), repo.save(make_loan("l1", status="returned")))
+
+        assert inner.batches == [["l1"]]
+        assert LOANS["l1"]["status"] == "returned"
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_isolates_bad_rows(self):
+        """Test a failed batch is retried per row and only the bad row's caller fails"""
+        inner = RecordingRepo(fail_batches=True, bad_ids={"bad"})
+        repo = GroupCommitLoansRepo(inner, linger=0.01)
+
+        results = await asyncio.gather(repo.save(make_loan("ok")), repo.save(make_loan("bad")),
+                                       return_exceptions=True)
+
+        assert results[0] is None
+        assert isinstance(results[1], ValueError)
+        assert inner.single_saves == ["ok"]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_write(self):
+        """Test cancelling a waiting caller still commits its loan, and flush drains the queue"""
+        inner = RecordingRepo()
+        repo = GroupCommitLoansRepo(inner, linger=0.05)
+
+        task = asyncio.create_task(repo.save(make_loan("l1")))
+        await asyncio.sleep(0)
+        task.cancel()
+        await repo.flush()
+
+        assert "l1" in LOANS
+
+    @pytest.mark.asyncio
+    async def test_flusher_does_not_inherit_the_first_callers_context(self):
+        """Test the shared flusher runs without the request id and deadline of whoever started it"""
+        seen = []
+
+        class ContextRepo(RecordingRepo):
+            async def save_many(self, loans):
+                seen.append((get_request_id(), deadline.remaining()))
+                await super().save_many(loans)
+
+        repo = GroupCommitLoansRepo(ContextRepo(), linger=0.01)
+        request_token, deadline_token = set_request_id("req-1"), deadline.set_deadline(5)
+        try:
+            await repo.save(make_loan("l1"))
+        finally:
+            deadline.reset_deadline(deadline_token)
+            reset_request_id(request_token)
+
+        assert seen == [(None, None)]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_flusher_fails_pending_saves(self):
+        """Test cancelling the flusher mid-commit fails the waiting callers instead of hanging them"""
+        started = asyncio.Event()
+
+        class StuckRepo(RecordingRepo):
+            async def save_many(self, loans):
+                started.set()
+                await asyncio.Event().wait()
+
+        repo = GroupCommitLoansRepo(StuckRepo(), max_batch=1, linger=0)
+        saves = [asyncio.create_task(repo.save(make_loan(f"l{i}"))) for i in range(2)]
+        await started.wait()
+        repo._flusher.cancel()
+        results = await asyncio.wait_for(asyncio.gather(*saves, return_exceptions=True), 1)
+
+        assert [type(r) for r in results] == [RuntimeError, RuntimeError]
+        assert repo._flusher is None
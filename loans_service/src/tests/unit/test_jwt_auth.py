@@ -0,0 +1,206 @@
+import time
+import pytest
+import httpx
+import jwt
+from fastapi import FastAPI
+from src.infrastructure.auth.jwt_verifier import (
+    InvalidToken,
+    JWKSKeyProvider,
+    JWTVerifier,
+    KeysUnavailable,
+    StaticKeyProvider,
+)
+from src.interfaces.api.auth import JWTAuthMiddleware
+from src.interfaces.api.views import router
+
+KEY = "shared-secret-at-least-32-bytes-long"
+
+
+def make_token(key=KEY, **overrides):
+    """Token shaped like SimpleJWT's AccessToken"""
+    claims = {"token_type": "access", "exp": int(time.time()) + 300, "iat": int(time.time()),
+              "jti": "abc", "user_id": 42}
+    claims.update(overrides)
+    return jwt.encode(claims, key, algorithm="HS256")
+
+
+class TestJWTVerifier:
+    @pytest.fixture
+    def verifier(self):
+        return JWTVerifier(StaticKeyProvider([KEY, "old-secret-at-least-32-bytes-long!!"]), ["HS256"])
+
+    @pytest.mark.asyncio
+    async def test_valid_token(self, verifier):
+        """Test a SimpleJWT-style access token verifies locally"""
+        claims = await verifier.verify(make_token())
+        assert claims["user_id"] == 42
+
+    @pytest.mark.asyncio
+    async def test_rotated_key_still_accepted(self, verifier):
+        """Test tokens signed with a previous key verify during rotation"""
+        assert (await verifier.verify(make_token(key="old-secret-at-least-32-bytes-long!!")))["user_id"] == 42
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("token", [
+        make_token(key="wrong-secret-at-least-32-bytes-long"),
+        make_token(exp=int(time.time()) - 10),
+        make_token(token_type="refresh"),
+        "not-a-jwt",
+    ])
+    async def test_invalid_tokens(self, verifier, token):
+        """Test bad signature, expired, refresh tokens and garbage are rejected"""
+        with pytest.raises(InvalidToken):
+            await verifier.verify(token)
+
+    @pytest.mark.asyncio
+    async def test_claims_cache_skips_signature_check(self, verifier, monkeypatch):
+        """Test repeated tokens are served from the claims cache"""
+        token = make_token()
+        await verifier.verify(token)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("decode should not run")
+
+        monkeypatch.setattr(jwt, "decode", fail)
+        assert (await verifier.verify(token))["user_id"] == 42
+
+    @pytest.mark.asyncio
+    async def test_cached_claims_expire(self, monkeypatch):
+        """Test the cache never outlives the token's exp"""
+        now = [time.time()]
+        verifier = JWTVerifier(StaticKeyProvider([KEY]), ["HS256"], now=lambda: now[0])
+        token = make_token(exp=int(now[0]) + 5)
+        await verifier.verify(token)
+
+        def expired(*args, **kwargs):
+            raise jwt.ExpiredSignatureError("Signature has expired")
+
+        monkeypatch.setattr(jwt, "decode", expired)
+        now[0] += 10
+        with pytest.raises(InvalidToken):
+            await verifier.verify(token)
+
+
+class TestJWKSKeyProvider:
+    @pytest.mark.asyncio
+    async def test_keys_cached_and_refreshed_on_unknown_kid(self):
+        """Test JWKS is fetched once and refetched for a new kid"""
+        fetches = []
+        clock = [0.0]
+        jwks = {"keys": [{"kty": "oct", "kid": "k1", "k": "c2hhcmVkLXNlY3JldC1hdC1sZWFzdC0zMi1ieXRlcy1sb25n"}]}
+
+        async def fetch(url):
+            fetches.append(url)
+            return jwks
+
+        provider = JWKSKeyProvider("http://auth/jwks", ttl=300, min_refresh=30, fetch=fetch, now=lambda: clock[0])
+        assert len(await provider.candidates("k1")) == 1
+        assert len(await provider.candidates("k1")) == 1
+        assert len(fetches) == 1
+
+        assert await provider.candidates("k2") == []  # within min_refresh: no refetch
+        clock[0] = 60
+        await provider.candidates("k2")
+        assert len(fetches) == 2
+
+    @pytest.mark.asyncio
+    async def test_refresh_failure_keeps_stale_keys(self):
+        """Test an unreachable JWKS endpoint keeps the cached keys and backs off"""
+        fetches = []
+        clock = [0.0]
+        jwks = {"keys": [{"kty": "oct", "kid": "k1", "k": "c2hhcmVkLXNlY3JldC1hdC1sZWFzdC0zMi1ieXRlcy1sb25n"}]}
+
+        async def fetch(url):
+            fetches.append(url)
+            if len(fetches) > 1:
+                raise httpx.ConnectError("auth-service down")
+            return jwks
+
+        provider = JWKSKeyProvider("http://auth/jwks", ttl=300, min_refresh=30, fetch=fetch, now=lambda: clock[0])
+        await provider.candidates("k1")
+        clock[0] = 400  # keys expired: refresh fails
+        assert len(await provider.candidates("k1")) == 1
+        clock[0] = 410  # within min_refresh of the failure: no retry
+        assert len(await provider.candidates("k1")) == 1
+        assert len(fetches) == 2
+        clock[0] = 431
+        await provider.candidates("k1")
+        assert len(fetches) == 3
+
+    @pytest.mark.asyncio
+    async def test_cold_start_failure_is_unavailable(self):
+        """Test a failing JWKS endpoint with no cached keys raises KeysUnavailable"""
+        async def fetch(url):
+            raise httpx.ConnectError("auth-service down")
+
+        provider = JWKSKeyProvider("http://auth/jwks", fetch=fetch)
+        with pytest.raises(KeysUnavailable):
+            await provider.candidates("k1")
+
+
+class TestJWTAuthMiddleware:
+    @pytest.mark.asyncio
+    async def test_middleware(self):
+        """Test 401 without/with bad token and claims exposed on success"""
+        seen = []
+
+        async def app(scope, receive, send):
+            seen.append(scope.get("state", {}).get("auth", {}).get("user_id"))
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        middleware = JWTAuthMiddleware(app, JWTVerifier(StaticKeyProvider([KEY]), ["HS256"]))
+        transport = httpx.ASGITransport(app=middleware)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            missing = await client.post("/api/loans")
+            bad = await client.post("/api/loans", headers={"Authorization": "Bearer nope"})
+            ok = await client.post("/api/loans", headers={"Authorization": f"Bearer {make_token()}"})
+            health = await client.get("/health")
+
+        assert missing.status_code == 401
+        assert missing.headers["www-authenticate"].startswith("Bearer")
+        assert bad.status_code == 401
+        assert ok.status_code == 200
+        assert health.status_code == 200
+        assert seen == [42, None]
+
+    @pytest.mark.asyncio
+    async def test_unavailable_keys_are_503(self):
+        """Test a verification outage answers 503 instead of 500 or 401"""
+        async def fetch(url):
+            raise httpx.ConnectError("auth-service down")
+
+        async def app(scope, receive, send):
+            raise AssertionError("must not be reached")
+
+        verifier = JWTVerifier(JWKSKeyProvider("http://auth/jwks", fetch=fetch), ["RS256"])
+        transport = httpx.ASGITransport(app=JWTAuthMiddleware(app, verifier))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/api/loans", headers={"Authorization": f"Bearer {make_token()}"})
+
+        assert response.status_code == 503
+        assert "retry-after" in response.headers
+
+
+class TestLoanOwnership:
+    @pytest.fixture
+    def client(self):
+        api = FastAPI()
+        api.include_router(router)
+        verifier = JWTVerifier(StaticKeyProvider([KEY]), ["HS256"])
+        transport = httpx.ASGITransport(app=JWTAuthMiddleware(api, verifier))
+        return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+    @pytest.mark.asyncio
+    async def test_cannot_create_loans_for_another_user(self, client):
+        """Test the body user_id must match the verified token unless it is staff"""
+        body = {"user_id": "7", "book_id": "b1", "days": 7}
+        async with client:
+            other = await client.post("/api/loans", json=body,
+                                      headers={"Authorization": f"Bearer {make_token(user_id=42)}"})
+            staff = await client.post("/api/loans", json={**body, "book_id": "missing-book"},
+                                      headers={"Authorization": f"Bearer {make_token(user_id=1, is_staff=True)}"})
+
+        assert other.status_code == 403
+        # Staff passes the ownership check and reaches the validation rules
+        assert staff.status_code != 403
@@ -0,0 +1,145 @@
+import asyncio
+import pytest
+from datetime import date
+from src.domain.events.loan_events import LoanCreated, LoanReturned
+from src.infrastructure.metrics.registry import metrics
+from src.infrastructure.repositories.loan_cache import CachedLoansRepo
+from src.infrastructure.repositories.loans_repo_django import LoansRepoMemory
+from src.infrastructure.repositories.memory_store import LOANS
+
+
+class CountingRepo(LoansRepoMemory):
+    """In-memory repo that counts reads and returns copies, like a database would"""
+
+    def __init__(self):
+        self.reads = 0
+        self.read_gate = None
+
+    async def get(self, loan_id):
+        self.reads += 1
+        loan = await super().get(loan_id)
+        if self.read_gate is not None:
+            await self.read_gate.wait()
+        return dict(loan) if loan else None
+
+    async def get_many(self, loan_ids):
+        self.reads += 1
+        return {k: dict(v) for k, v in (await super().get_many(loan_ids)).items()}
+
+
+def make_loan(loan_id, status="active"):
+    return {"loan_id": loan_id, "user_id": "u1", "book_id": "b1",
+            "start_date": date(2024, 1, 1), "due_date": date(2024, 1, 8), "status": status}
+
+
+@pytest.fixture(autouse=True)
+def clean_store():
+    LOANS.clear()
+    yield
+    LOANS.clear()
+
+
+class TestCachedLoansRepo:
+    @pytest.mark.asyncio
+    async def test_read_through_and_hit_metrics(self):
+        """Test repeated gets are served from the cache and counted as hits"""
+        inner = CountingRepo()
+        repo = CachedLoansRepo(inner, name="test_hits")
+        LOANS["l1"] = make_loan("l1")
+
+        assert (await repo.get("l1"))["status"] == "active"
+        assert (await repo.get("l1"))["status"] == "active"
+        assert await repo.get("missing") is None
+        assert await repo.get("missing") is None
+
+        assert inner.reads == 3
+        rendered = metrics.render()
+        assert 'loans_repo_cache_requests_total{cache="test_hits",result="hit"} 1' in rendered
+        assert 'loans_repo_cache_requests_total{cache="test_hits",result="miss"} 3' in rendered
+
+    @pytest.mark.asyncio
+    async def test_callers_get_copies(self):
+        """Test mutating a returned loan (as return_loan does) doesn't touch the cache"""
+        repo = CachedLoansRepo(CountingRepo())
+        LOANS["l1"] = make_loan("l1")
+
+        loan = await repo.get("l1")
+        loan["status"] = "returned"
+
+        assert (await repo.get("l1"))["status"] == "active"
+
+    @pytest.mark.asyncio
+    async def test_write_through(self):
+        """Test save and mark_returned update the cache without another read"""
+        inner = CountingRepo()
+        repo = CachedLoansRepo(inner)
+        await repo.save(make_loan("l1"))
+        assert (await repo.get("l1"))["status"] == "active"
+
+        await repo.mark_returned("l1")
+        assert (await repo.get("l1"))["status"] == "returned"
+        await repo.save_many([make_loan("l1", status="active")])
+        assert (await repo.get_many(["l1"]))["l1"]["status"] == "active"
+        assert inner.reads == 0
+
+    @pytest.mark.asyncio
+    async def test_racing_read_does_not_cache_stale_status(self):
+        """Test a read started before a local write can't overwrite the written status"""
+        inner = CountingRepo()
+        repo = CachedLoansRepo(inner)
+        LOANS["l1"] = make_loan("l1")
+        inner.read_gate = asyncio.Event()
+
+        slow_read = asyncio.create_task(repo.get("l1"))
+        await asyncio.sleep(0)
+        await repo.save(make_loan("l1", status="returned"))
+        inner.read_gate.set()
+        await slow_read
+
+        inner.read_gate = None
+        assert (await repo.get("l1"))["status"] == "returned"
+
+    @pytest.mark.asyncio
+    async def test_failed_write_invalidates(self):
+        """Test a failed write leaves nothing cached for the loan"""
+        class FailingRepo(CountingRepo):
+            async def save(self, loan):
+                raise RuntimeError("db down")
+
+        repo = CachedLoansRepo(FailingRepo())
+        LOANS["l1"] = make_loan("l1")
+        await repo.get("l1")
+
+        with pytest.raises(RuntimeError):
+            await repo.save(make_loan("l1", status="returned"))
+        assert len(repo) == 0
+
+    @pytest.mark.asyncio
+    async def test_lru_bound_and_get_many(self):
+        """Test the cache keeps at most max_entries and get_many mixes hits and misses"""
+        inner = CountingRepo()
+        repo = CachedLoansRepo(inner, max_entries=2)
+        for i in range(3):
+            LOANS[f"l{i}"] = make_loan(f"l{i}")
+
+        found = await repo.get_many(["l0", "l1", "l2", "missing"])
+        assert set(found) == {"l0", "l1", "l2"}
+        assert len(repo) == 2
+        await repo.get_many(["l1", "l2"])
+        assert inner.reads == 1
+
+    @pytest.mark.asyncio
+    async def test_invalidation_from_other_workers(self):
+        """Test events that disagree with the cached status invalidate it; matching ones don't"""
+        repo = CachedLoansRepo(CountingRepo())
+        await repo.save(make_loan("l1"))
+        await repo.save(make_loan("l2"))
+
+        await repo.invalidation_handler([
+            LoanCreated(loan_id="l1", user_id="u1", book_id="b1",
+                        start_date=date(2024, 1, 1), due_date=date(2024, 1, 8)),
+            LoanReturned(loan_id="l2", user_id="u1", book_id="b1", return_date=date(2024, 1, 2)),
+        ])
+
+        assert "l1" in repo._entries
+        assert "l2" not in repo._entries
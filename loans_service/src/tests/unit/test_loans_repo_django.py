@@ -0,0 +1,114 @@
+import asyncio
+import httpx
+import pytest
+from datetime import date
+from django.core.management import call_command
+from django.db import connection
+from fastapi import FastAPI
+from src.interfaces.api import views
+from src.infrastructure.repositories.django_loans.settings import configure
+from src.infrastructure.repositories.active_loans import UsersWithRepoLoanCounts
+from src.infrastructure.repositories.group_commit import GroupCommitLoansRepo
+from src.infrastructure.repositories.loans_repo_django import LoansDjangoRepo
+
+
+@pytest.fixture(scope="module")
+def repo(tmp_path_factory):
+    # File database: the ORM runs in sync_to_async's thread, a :memory: db would be per connection
+    configure({"default": {"ENGINE": "django.db.backends.sqlite3",
+                           "NAME": str(tmp_path_factory.mktemp("db") / "loans.sqlite3")}})
+    call_command("migrate", verbosity=0)
+    return LoansDjangoRepo()
+
+
+@pytest.fixture(autouse=True)
+def clean_table(repo):
+    repo.LoanModel.objects.all().delete()
+
+
+def make_loan(loan_id, user_id="u1", book_id="b1", status="active"):
+    return {"loan_id": loan_id, "user_id": user_id, "book_id": book_id,
+            "start_date": date(2024, 1, 1), "due_date": date(2024, 1, 8), "status": status}
+
+
+class TestLoansDjangoRepo:
+    @pytest.mark.asyncio
+    async def test_save_is_an_upsert(self, repo):
+        """Test saving an existing loan updates it instead of inserting a duplicate"""
+        await repo.save(make_loan("l1"))
+        await repo.save(make_loan("l1", status="returned"))
+
+        assert await repo.get("l1") == {**make_loan("l1", status="returned"), "return_date": None}
+        assert await repo.list_active() == []
+        assert await repo.get("missing") is None
+
+    @pytest.mark.asyncio
+    async def test_reads_and_bulk_writes(self, repo):
+        """Test list_active, get_many, save_many and mark_returned"""
+        await repo.save_many([make_loan("l1"), make_loan("l2", user_id="u2"), make_loan("l3")])
+        await repo.mark_returned("l3")
+
+        assert {l["loan_id"] for l in await repo.list_active()} == {"l1", "l2"}
+        many = await repo.get_many(["l2", "l3", "missing"])
+        assert set(many) == {"l2", "l3"}
+        assert many["l3"]["status"] == "returned"
+
+    @pytest.mark.asyncio
+    async def test_return_date_round_trip(self, repo):
+        """Test return_date is persisted by save and by mark_returned"""
+        await repo.save_many([make_loan("l1"), make_loan("l2")])
+        assert (await repo.get("l1"))["return_date"] is None
+
+        await repo.save({**make_loan("l1", status="returned"), "return_date": date(2024, 1, 5)})
+        await repo.mark_returned("l2")
+
+        assert await repo.get("l1") == {**make_loan("l1", status="returned"), "return_date": date(2024, 1, 5)}
+        assert (await repo.get("l2"))["return_date"] == date.today()
+
+    @pytest.mark.asyncio
+    async def test_group_commit_over_django(self, repo):
+        """Test concurrent saves through GroupCommitLoansRepo land as one batch"""
+        grouped = GroupCommitLoansRepo(repo, linger=0.01)
+        await asyncio.gather(*(grouped.save(make_loan(f"l{i}", book_id=f"b{i}")) for i in range(20)))
+
+        assert len(await repo.list_active()) == 20
+
+    @pytest.mark.asyncio
+    async def test_active_count_sees_other_processes(self, repo):
+        """Test the shared-repo count reflects writes made through another repo instance"""
+        users = UsersWithRepoLoanCounts(inner=None, repo=repo)
+        other_worker = LoansDjangoRepo()
+        await other_worker.save_many([make_loan("l1"), make_loan("l2"), make_loan("l3", user_id="u2")])
+        await other_worker.mark_returned("l2")
+
+        assert await users.get_user_active_loans_count("u1") == 1
+        assert await users.get_user_active_loans_count("u2") == 1
+        assert await users.get_user_active_loans_count("nobody") == 0
+
+    @pytest.mark.asyncio
+    async def test_debug_endpoint_lists_database_loans(self, repo, monkeypatch):
+        """Test /api/debug/loans reads the configured repo, returned loans included"""
+        await repo.save_many([make_loan("l1"), make_loan("l2")])
+        await repo.mark_returned("l2")
+        monkeypatch.setattr(views, "get_loans_repo", lambda: repo)
+        api = FastAPI()
+        api.include_router(views.router)
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api), base_url="http://test") as client:
+            data = (await client.get("/api/debug/loans")).json()
+
+        assert data["count"] == 2
+        assert sorted(data["ids"]) == ["l1", "l2"]
+
+    def test_schema_indexes(self, repo):
+        """Test the migration creates the query indexes, including the partial one"""
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, "loans")
+
+        assert constraints["loans_active_user_idx"]["columns"] == ["user_id"]
+        assert constraints["loans_book_status_idx"]["columns"] == ["book_id", "status"]
+        assert constraints["loans_due_date_idx"]["columns"] == ["due_date"]
+        assert any(c["primary_key"] and c["columns"] == ["loan_id"] for c in constraints.values())
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'loans_active_user_idx'")
+            assert "WHERE" in cursor.fetchone()[0]
@@ -0,0 +1,161 @@
+import gzip
+import io
+import json
+import logging
+import pytest
+import httpx
+from src.infrastructure.http_adapters.books_http import BooksHTTP
+from src.infrastructure.logging.json_logger import JSONFormatter, logger
+from src.interfaces.api.request_context import RequestContextMiddleware
+from src.interfaces.cli.log_latency import Histogram, LatencyAnalyzer, analyze, iter_records, rotation_order
+
+
+def request_records(request_id, total_ms, users_ms, attempts=1, status=201):
+    records = [{"request_id": request_id, "stage": "rule:max_days", "duration_ms": 0.01}]
+    for attempt in range(1, attempts + 1):
+        records.append({"request_id": request_id, "http_method": "GET",
+                        "url": "http://auth:8000/api/users/42", "attempt": attempt})
+        records.append({"request_id": request_id, "http_method": "GET", "url": "http://auth:8000/api/users/42",
+                        "attempt": attempt, "duration_ms": users_ms,
+                        "http_status": 200 if attempt == attempts else None})
+    records.append({"request_id": request_id, "stage": "request", "http_method": "POST", "url": "/api/loans",
+                    "http_status": status, "duration_ms": total_ms})
+    return records
+
+
+class TestHistogram:
+    def test_percentiles_within_bucket_error(self):
+        """Test percentiles are approximated within the bucket growth factor"""
+        histogram = Histogram()
+        for value in range(1, 1001):
+            histogram.add(float(value))
+
+        assert histogram.count == 1000
+        assert histogram.percentile(0.5) == pytest.approx(500, rel=0.1)
+        assert histogram.percentile(0.99) == pytest.approx(990, rel=0.1)
+        assert histogram.percentile(1.0) == 1000
+        assert len(histogram.buckets) < 100
+
+
+class TestLatencyAnalyzer:
+    def test_breakdown_retries_and_slowest(self):
+        """Test records are correlated per request into stage/upstream stats and exemplars"""
+        analyzer = LatencyAnalyzer(top=1)
+        for record in request_records("a", 50, 40) + request_records("b", 300, 100, attempts=2):
+            analyzer.add(record)
+        report = analyzer.report()
+
+        assert report["requests"] == 2
+        assert report["endpoints"]["POST /api/loans"]["statuses"] == {"201": 2}
+        upstream = report["upstreams"]["GET /api/users/{id} @auth:8000"]
+        assert upstream["calls"] == 2
+        assert upstream["retries"] == 1
+        assert upstream["retry_rate"] == 0.5
+        assert upstream["errors"] == 1
+        assert report["stages"]["rule:max_days"]["count"] == 2
+        assert [e["request_id"] for e in report["slowest"]] == ["b"]
+        assert report["slowest"][0]["breakdown_ms"]["upstream:GET /api/users/{id} @auth:8000"] == 200
+        assert report["incomplete_requests"] == 0
+
+    def test_terminal_error_record_is_not_a_call(self):
+        """Test the "failed after all retries" record doesn't count as another call"""
+        analyzer = LatencyAnalyzer()
+        for attempt in range(1, 4):
+            analyzer.add({"http_method": "GET", "url": "http://auth:8000/api/users/42", "attempt": attempt})
+            analyzer.add({"http_method": "GET", "url": "http://auth:8000/api/users/42", "attempt": attempt,
+                          "duration_ms": 5, "http_status": 503})
+        analyzer.add({"http_method": "GET", "url": "http://auth:8000/api/users/42", "total_attempts": 3,
+                      "error": "503"})
+
+        upstream = analyzer.report()["upstreams"]["GET /api/users/{id} @auth:8000"]
+        assert upstream["calls"] == 1
+        assert upstream["retries"] == 2
+        assert upstream["errors"] == 3
+
+    @pytest.mark.asyncio
+    async def test_books_notifications_are_analyzed(self):
+        """Test BooksHTTP POST notifications log the same fields as GETs and show up as an upstream"""
+        statuses = iter([503, 204])
+        transport = httpx.MockTransport(lambda request: httpx.Response(next(statuses)))
+        books = BooksHTTP("http://books:8000", transport=transport)
+        stream = io.StringIO()
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(JSONFormatter())
+        logger.addHandler(handler)
+        try:
+            await books.mark_loaned("b1")
+        finally:
+            logger.removeHandler(handler)
+
+        analyzer = LatencyAnalyzer()
+        for line in stream.getvalue().splitlines():
+            analyzer.add(json.loads(line))
+        upstream = analyzer.report()["upstreams"]["POST /api/books/b1/loaned @books:8000"]
+        assert upstream["calls"] == 1
+        assert upstream["retries"] == 1
+        assert upstream["errors"] == 1
+
+    def test_open_requests_are_bounded(self):
+        """Test requests without an end record don't grow memory past max_open"""
+        analyzer = LatencyAnalyzer(max_open=10)
+        for i in range(100):
+            analyzer.add({"request_id": str(i), "stage": "fetch:user", "duration_ms": 1.0})
+
+        assert len(analyzer._open) == 10
+        assert analyzer.report()["incomplete_requests"] == 100
+
+    def test_reads_rotated_and_gzipped_files(self, tmp_path):
+        """Test rotated files are read oldest first, gzip included, prefixes and noise skipped"""
+        older = tmp_path / "loans.log.1.gz"
+        newer = tmp_path / "loans.log"
+        records = request_records("a", 50, 40)
+        with gzip.open(older, "wt") as f:
+            f.writelines(json.dumps(r) + "\n" for r in records[:-1])
+        with open(newer, "w") as f:
+            f.write("not json\n")
+            f.write("loans-1  | " + json.dumps(records[-1]) + "\n")
+
+        assert rotation_order([str(newer), str(older)]) == [str(older), str(newer)]
+        report = analyze([str(newer), str(older)])
+        assert report["requests"] == 1
+        assert "upstream:GET /api/users/{id} @auth:8000" in report["slowest"][0]["breakdown_ms"]
+
+    def test_iter_records_skips_malformed(self):
+        """Test malformed lines are ignored"""
+        lines = io.StringIO('{"a": 1}\n{broken\n[1, 2]\nplain\n')
+        assert list(iter_records(lines)) == [{"a": 1}]
+
+
+class TestRequestContextMiddleware:
+    @pytest.mark.asyncio
+    async def test_request_id_propagates_to_logs(self):
+        """Test every record of a request carries its id and the end record has the duration"""
+        stream = io.StringIO()
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(JSONFormatter())
+        logger.addHandler(handler)
+
+        async def app(scope, receive, send):
+            logger.info("Inside", extra={"stage": "fetch:user", "duration_ms": 1.5})
+            await send({"type": "http.response.start", "status": 201, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        transport = httpx.ASGITransport(app=RequestContextMiddleware(app))
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                given = await client.post("/api/loans", headers={"X-Request-Id": "abc"})
+                generated = await client.post("/api/loans")
+                await client.get("/health")
+        finally:
+            logger.removeHandler(handler)
+
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert given.headers["x-request-id"] == "abc"
+        assert len(generated.headers["x-request-id"]) == 32
+        assert [r["request_id"] for r in records[:2]] == ["abc", "abc"]
+        assert records[1]["stage"] == "request"
+        assert records[1]["http_status"] == 201
+        assert records[3]["request_id"] == generated.headers["x-request-id"]
+        # /health is exempt: no id and no end record
+        assert len(records) == 5
+        assert "request_id" not in records[4]
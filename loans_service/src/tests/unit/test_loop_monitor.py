@@ -0,0 +1,101 @@
+import asyncio
+import io
+import json
+import logging
+import time
+import pytest
+import httpx
+from src.infrastructure.logging.json_logger import JSONFormatter, logger
+from src.infrastructure.metrics.registry import metrics
+from src.infrastructure.profiling import loop_monitor
+from src.infrastructure.profiling.loop_monitor import LoopLagMonitor
+from src.interfaces.api.request_context import RequestContextMiddleware
+
+
+def busy_wait(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class LogCapture:
+    def __enter__(self):
+        self.stream = io.StringIO()
+        self.handler = logging.StreamHandler(self.stream)
+        self.handler.setFormatter(JSONFormatter())
+        logger.addHandler(self.handler)
+        return self
+
+    def __exit__(self, *exc):
+        logger.removeHandler(self.handler)
+
+    def blocked(self):
+        records = [json.loads(line) for line in self.stream.getvalue().splitlines()]
+        return [r for r in records if r["message"] == "Event loop blocked"]
+
+
+class TestLoopLagMonitor:
+    @pytest.mark.asyncio
+    async def test_records_lag_without_blocking(self):
+        """Test an idle loop only records lag samples, without block events"""
+        monitor = LoopLagMonitor(interval=0.005, threshold=0.2)
+        with LogCapture() as logs:
+            monitor.start()
+            await asyncio.sleep(0.05)
+            await monitor.stop()
+
+        assert logs.blocked() == []
+        assert "loans_event_loop_lag_ms_count" in metrics.render()
+        assert monitor.max_lag < 0.2
+
+    @pytest.mark.asyncio
+    async def test_block_reports_stack_and_duration(self):
+        """Test a blocking callback is logged with its duration and the stack that blocked"""
+        monitor = LoopLagMonitor(interval=0.01, threshold=0.05)
+        with LogCapture() as logs:
+            monitor.start()
+            await asyncio.sleep(0.02)
+            busy_wait(0.2)
+            await asyncio.sleep(0.05)
+            await monitor.stop()
+
+        [event] = logs.blocked()
+        assert event["level"] == "WARNING"
+        assert event["stage"] == "loop_block"
+        assert event["duration_ms"] >= 150
+        assert "busy_wait" in event["stack"]
+        assert "request_id" not in event
+
+    @pytest.mark.asyncio
+    async def test_block_attributed_to_request(self):
+        """Test a block inside a request carries that request's id"""
+        monitor = LoopLagMonitor(interval=0.01, threshold=0.05)
+
+        async def app(scope, receive, send):
+            busy_wait(0.2)
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        transport = httpx.ASGITransport(app=RequestContextMiddleware(app))
+        with LogCapture() as logs:
+            monitor.start()
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                await asyncio.sleep(0.02)
+                await client.get("/api/loans", headers={"X-Request-Id": "slow-1"})
+            await asyncio.sleep(0.05)
+            await monitor.stop()
+
+        [event] = logs.blocked()
+        assert event["request_id"] == "slow-1"
+        assert "app" in event["stack"]
+        # Finished requests are no longer tracked
+        assert loop_monitor._task_requests == {}
+
+    @pytest.mark.asyncio
+    async def test_stop_is_idempotent(self):
+        """Test stopping twice (or without starting) is a no-op"""
+        monitor = LoopLagMonitor()
+        await monitor.stop()
+        monitor.start()
+        await monitor.stop()
+        await monitor.stop()
@@ -0,0 +1,109 @@
+import asyncio
+import marshal
+import time
+import pytest
+import httpx
+from fastapi import FastAPI
+from src.infrastructure.profiling.profiler import Profiler, ProfilerBusy, render_collapsed, render_pstats
+from src.interfaces.api import profiling
+
+
+def busy_wait(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+async def slow_handler():
+    await asyncio.sleep(0.05)
+
+
+class TestProfiler:
+    @pytest.mark.asyncio
+    async def test_cpu_sampling_sees_blocking_code(self):
+        """Test cpu mode attributes loop time to the function blocking it"""
+        profiler = Profiler()
+
+        async def block():
+            await asyncio.sleep(0.01)
+            busy_wait(0.15)
+
+        task = asyncio.create_task(block())
+        stacks = await profiler.sample(0.2, mode="cpu", interval=0.002)
+        await task
+
+        assert any("busy_wait" in stack for stack in stacks)
+        assert not profiler.active
+        line = render_collapsed(stacks).splitlines()[0]
+        assert line.rsplit(" ", 1)[1].isdigit()
+
+    @pytest.mark.asyncio
+    async def test_wall_sampling_sees_awaiting_tasks(self):
+        """Test wall mode records the await chain of waiting tasks"""
+        profiler = Profiler()
+        tasks = [asyncio.create_task(slow_handler()) for _ in range(3)]
+        stacks = await profiler.sample(0.03, mode="wall", interval=0.002)
+        await asyncio.gather(*tasks)
+
+        assert any(stack.startswith("slow_handler") for stack in stacks)
+        assert not any("sample" in stack.split(";")[0] for stack in stacks)
+
+    @pytest.mark.asyncio
+    async def test_trace_until_n_requests(self):
+        """Test a trace stops after the requested number of finished requests"""
+        profiler = Profiler(max_seconds=5)
+
+        async def requests():
+            for _ in range(3):
+                await asyncio.sleep(0.01)
+                busy_wait(0.001)
+                profiler.request_finished()
+
+        started = time.monotonic()
+        worker = asyncio.create_task(requests())
+        result = await profiler.trace(requests=3)
+        await worker
+
+        assert time.monotonic() - started < 1
+        assert b"busy_wait" in render_pstats(result)
+        assert isinstance(marshal.loads(render_pstats(result, fmt="pstats")), dict)
+
+    @pytest.mark.asyncio
+    async def test_one_session_at_a_time(self):
+        """Test a second concurrent session is rejected"""
+        profiler = Profiler()
+        first = asyncio.create_task(profiler.sample(0.05))
+        await asyncio.sleep(0)
+
+        with pytest.raises(ProfilerBusy):
+            await profiler.sample(0.05)
+        await first
+
+
+class TestProfileEndpoint:
+    @pytest.mark.asyncio
+    async def test_endpoint_requires_token(self, monkeypatch):
+        """Test the endpoint is hidden without a configured token and checks the header"""
+        app = FastAPI()
+        app.include_router(profiling.router)
+        transport = httpx.ASGITransport(app=app)
+
+        monkeypatch.setattr(profiling, "get_profiler", lambda: None)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            assert (await client.get("/debug/profile")).status_code == 404
+
+        monkeypatch.setattr(profiling, "get_profiler", lambda: Profiler())
+        monkeypatch.setattr(profiling, "DEBUG_PROFILE_TOKEN", "secret")
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            forbidden = await client.get("/debug/profile", headers={"X-Debug-Token": "nope"})
+            non_ascii = await client.get("/debug/profile", headers={"X-Debug-Token": "señal".encode("latin-1")})
+            ok = await client.get("/debug/profile?seconds=0.05&mode=wall", headers={"X-Debug-Token": "secret"})
+            trace = await client.get("/debug/profile?seconds=0.05&mode=trace",
+                                     headers={"X-Debug-Token": "secret"})
+
+        assert forbidden.status_code == 403
+        assert non_ascii.status_code == 403
+        assert ok.status_code == 200
+        assert ok.headers["content-type"].startswith("text/plain")
+        assert trace.status_code == 200
+        assert "cumulative" in trace.text
@@ -0,0 +1,114 @@
+import asyncio
+import pytest
+from datetime import date
+from unittest.mock import AsyncMock, Mock
+from src.domain.ports.local_state import LocalStatePort
+from src.domain.rules.pipeline import LOCAL, REMOTE, Rule, Source, ValidationPipeline
+from src.domain.rules.validators import CREATE_LOAN_RULES
+from src.domain.services.loan_service import LoanDomainService
+from src.infrastructure.metrics.registry import metrics
+
+
+def must_be(key, expected):
+    def check(ctx):
+        if ctx[key] != expected:
+            raise ValueError(f"{key} is {ctx[key]}")
+    return check
+
+
+class TestValidationPipeline:
+    @pytest.mark.asyncio
+    async def test_local_rejection_skips_remote_fetches(self):
+        """Test a failing local rule short-circuits before any network call"""
+        remote = AsyncMock(return_value="x")
+        pipeline = ValidationPipeline([
+            Rule("remote_rule", ("r",), must_be("r", "x"), cost=0),
+            Rule("local_rule", ("days",), must_be("days", 1), cost=5),
+        ])
+        with pytest.raises(ValueError, match="days is 99"):
+            await pipeline.run({"days": 99}, [Source("r", remote, REMOTE)])
+        remote.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_remote_fetches_run_concurrently(self):
+        """Test independent remote sources of the same tier are fetched together"""
+        running = []
+
+        async def slow(key):
+            running.append(key)
+            await asyncio.sleep(0.05)
+            assert len(running) == 2
+            return key
+
+        pipeline = ValidationPipeline([
+            Rule("a", ("a",), must_be("a", "a")),
+            Rule("b", ("b",), must_be("b", "b")),
+        ])
+        ctx = await asyncio.wait_for(
+            pipeline.run({}, [Source("a", lambda: slow("a")), Source("b", lambda: slow("b"))]), 0.09
+        )
+        assert ctx["a"] == "a" and ctx["b"] == "b"
+
+    @pytest.mark.asyncio
+    async def test_local_source_falls_back_to_remote(self):
+        """Test unknown local values (None) are fetched remotely"""
+        remote = AsyncMock(return_value=2)
+        pipeline = ValidationPipeline([Rule("n", ("n",), must_be("n", 2))])
+        await pipeline.run({}, [Source("n", lambda: None, LOCAL), Source("n", remote, REMOTE)])
+        remote.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_missing_source(self):
+        """Test a rule without any source is a configuration error"""
+        pipeline = ValidationPipeline([Rule("n", ("n",), must_be("n", 2))])
+        with pytest.raises(LookupError):
+            await pipeline.run({}, [])
+
+    @pytest.mark.asyncio
+    async def test_rejections_are_counted(self):
+        """Test rejection counters per rule"""
+        pipeline = ValidationPipeline([Rule("days", ("days",), must_be("days", 1))], name="t_count")
+        with pytest.raises(ValueError):
+            await pipeline.run({"days": 3}, [])
+        assert metrics.get("loans_validation_rejections_total", pipeline="t_count", rule="days") == 1
+
+
+class KnownLoanedBook(LocalStatePort):
+    def get_book(self, book_id):
+        return {"id": book_id, "status": "loaned"}
+
+
+class TestCreateLoanPipeline:
+    @pytest.fixture
+    def deps(self):
+        users, books = AsyncMock(), AsyncMock()
+        users.get_user.return_value = {"id": "u1", "status": "active"}
+        users.get_user_active_loans_count.return_value = 0
+        books.get_book.return_value = {"id": "b1", "status": "available"}
+        clock, uuidgen = Mock(), Mock()
+        clock.today.return_value = date(2025, 10, 29)
+        uuidgen.new.return_value = "loan-123"
+        return dict(users=users, books=books, loans=AsyncMock(), clock=clock, uuidgen=uuidgen)
+
+    @pytest.mark.asyncio
+    async def test_known_unavailable_book_needs_no_network(self, deps):
+        """Test locally known book status rejects before any remote lookup"""
+        service = LoanDomainService(**deps, local=KnownLoanedBook())
+        with pytest.raises(ValueError, match="Book is not available"):
+            await service.create_loan("u1", "b1", 7)
+        deps["users"].get_user.assert_not_called()
+        deps["books"].get_book.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_error_priority_is_preserved(self, deps):
+        """Test an inactive user is still reported before an unavailable book"""
+        deps["users"].get_user.return_value = {"id": "u1", "status": "suspended"}
+        deps["books"].get_book.return_value = {"id": "b1", "status": "loaned"}
+        service = LoanDomainService(**deps)
+        with pytest.raises(ValueError, match="User is not active"):
+            await service.create_loan("u1", "b1", 7)
+
+    def test_rule_declarations(self):
+        """Test every create-loan rule declares its data dependencies"""
+        assert [r.name for r in CREATE_LOAN_RULES] == ["max_days", "user_active", "user_loans_count", "book_available"]
+        assert all(r.needs for r in CREATE_LOAN_RULES)